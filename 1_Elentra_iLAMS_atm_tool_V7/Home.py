@@ -1,11 +1,10 @@
 # Home.py
 
 import streamlit as st
-import pandas as pd
 
-from core.config import get_config, set_config
-from core.selenium_utils import check_selenium_environment
-from core.selenium_utils import launch_chrome_with_debug
+from core.config import DEFAULT_PROFILE, debugger_port, get_profiles
+from core.debug_ports import get_port_pool
+from core.session_config import LEASE_KEY, session_config, set_session_config
 
 import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
@@ -35,7 +34,8 @@ Use this page to run **pre-checks** before performing any Selenium task.
 
 st.markdown("---")
 
-config = get_config()
+profiles = get_profiles()
+config = session_config()
 
 st.subheader("Environment Configuration")
 
@@ -45,6 +45,20 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Each browser session edits its own snapshot; saved profiles are shared.
+profile_names = profiles.names()
+if profile_names:
+    p1, p2 = st.columns([3, 1], vertical_alignment="bottom")
+    chosen_profile = p1.selectbox(
+        "Saved profile",
+        profile_names,
+        index=None,
+        placeholder="Choose a profile to load",
+    )
+    if p2.button("Load", width="stretch", disabled=chosen_profile is None):
+        config = set_session_config(profiles.get(chosen_profile))
+        st.success(f"Loaded profile '{chosen_profile}' for this session.")
+
 col1, col2 = st.columns(2)
 with col1:
     driver_path = st.text_input(
@@ -69,14 +83,54 @@ with col2:
     )
 
 
+form_config = config.replace(
+    driver_path=driver_path,
+    debugger_address=debugger_address,
+    lams_base_url=lams_base_url or None,
+    elentra_base_url=elentra_base_url or None,
+)
+
 if st.button("Save Config", type="secondary", width="stretch"):
-    set_config(
-        driver_path=driver_path,
-        debugger_address=debugger_address,
-        lams_base_url=lams_base_url or None,
-        elentra_base_url=elentra_base_url or None,
+    try:
+        debugger_port(form_config.debugger_address)
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        config = set_session_config(form_config)
+        st.success("Configuration saved for this session.")
+
+with st.expander("Save as a named profile", expanded=False):
+    profile_name = st.text_input(
+        "Profile name",
+        value=DEFAULT_PROFILE,
+        help=f"The '{DEFAULT_PROFILE}' profile is what new sessions and the CLI start with.",
+    )
+    if st.button("Save profile", width="stretch"):
+        try:
+            profiles.save(profile_name, form_config)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            config = set_session_config(form_config)
+            st.success(f"Profile '{profile_name.strip()}' saved and applied to this session.")
+
+with st.expander("Shared server: one Chrome per run", expanded=False):
+    st.caption(
+        "When several operators use this server at once, give each run its own Chrome "
+        "debugger port and profile instead of the address above. Runs wait in turn while "
+        "every port is busy. The first run on a port opens a fresh Chrome profile: log into "
+        "iLAMS / Elentra in it once and the login is kept for later runs."
+    )
+    st.session_state[LEASE_KEY] = st.checkbox(
+        "Give each run its own Chrome",
+        value=st.session_state.get(LEASE_KEY, False),
     )
-    st.success("Configuration saved for this session.")
+
+    pool = get_port_pool()
+    leases = pool.status()
+    st.caption(f"{len(leases)} of {len(pool.ports)} ports in use · {pool.waiting} run(s) waiting")
+    if leases:
+        st.dataframe(leases, width="stretch")
 
 
 
@@ -87,8 +141,21 @@ st.subheader("Run Pre-checks")
 if st.button("Run Pre-configuration checks", type="primary", width="stretch"):
     st.write("Starting Selenium Pre-checks...")
 
+    # Selenium is only needed once the checks run, not to render the form.
+    from core.selenium_utils import check_selenium_environment, launch_chrome_with_debug
+
     # 1️⃣ Try launching Chrome first (retry up to 3 times)
-    chrome_ok = launch_chrome_with_debug(port=9222, retries=3)
+    cfg = session_config()
+    try:
+        port = debugger_port(cfg.debugger_address)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    chrome_ok = launch_chrome_with_debug(
+        port=port,
+        retries=3,
+        profile_dir=cfg.chrome_profile_dir,
+    )
 
     if not chrome_ok:
         st.error("❌ Unable to launch Chrome with remote debugging after 3 attempts.")
@@ -103,7 +170,6 @@ if st.button("Run Pre-configuration checks", type="primary", width="stretch"):
         st.success("Chrome debugging session launched successfully.")
 
         # 2️⃣ Proceed with your existing environment checks
-        cfg = get_config()
         ok, logs = check_selenium_environment(cfg)
 
         st.session_state["precheck_ok"] = ok
@@ -127,6 +193,8 @@ else:
         st.error("Pre-checks failed. See details below.")
 
 if logs:
+    import pandas as pd
+
     df_logs = pd.DataFrame(logs)
     st.subheader("Pre-check Logs")
     st.dataframe(df_logs, width='stretch')
@@ -0,0 +1,93 @@
+# benchmarks/import_time.py
+"""
+Cold import time of the backend modules, measured with `python -X importtime`
+in a fresh interpreter per run (so nothing is cached in sys.modules).
+
+    python benchmarks/import_time.py                 # all backends, 5 runs each
+    python benchmarks/import_time.py --repeat 10 core.cli
+    python benchmarks/import_time.py --json > import_times.json
+
+Reports the median cumulative import time of each module and whether the
+import dragged in Streamlit. Run from the folder that holds Home.py.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+BACKENDS = [
+    "core.backend_1_Lesson_Link_Upload",
+    "core.backend_2_Bulk_Search_Users",
+    "core.backend_3_Bulk_User_Excel_Gen",
+    "core.backend_4_Bulk_Courses_Archive",
+    "core.cli",
+]
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """`import time: self | cumulative | name` lines → {module: cumulative µs}."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        times[name] = int(cumulative_us)
+    return times
+
+
+def measure(module: str) -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = parse_importtime(result.stderr)
+    return {
+        "cumulative_ms": times[module] / 1000,
+        "streamlit": "streamlit" in times,
+    }
+
+
+def benchmark(modules: List[str], repeat: int) -> List[Dict]:
+    rows = []
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        times = [r["cumulative_ms"] for r in runs]
+        rows.append({
+            "module": module,
+            "median_ms": round(statistics.median(times), 1),
+            "min_ms": round(min(times), 1),
+            "streamlit": runs[0]["streamlit"],
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=BACKENDS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table.")
+    args = parser.parse_args()
+
+    rows = benchmark(args.modules, args.repeat)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    width = max(len(r["module"]) for r in rows)
+    print(f"{'module':<{width}}  {'median ms':>10}  {'min ms':>8}  streamlit")
+    for r in rows:
+        print(f"{r['module']:<{width}}  {r['median_ms']:>10.1f}  {r['min_ms']:>8.1f}  {'yes' if r['streamlit'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
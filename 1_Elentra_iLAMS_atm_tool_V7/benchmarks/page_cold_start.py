@@ -0,0 +1,132 @@
+# benchmarks/page_cold_start.py
+"""
+Cold start of Home.py and every page: the first render of the script under
+Streamlit's AppTest, in a fresh interpreter per run (so nothing is cached in
+sys.modules). Streamlit itself is imported before the clock starts; what is
+timed is the page's own imports plus its first run.
+
+    python benchmarks/page_cold_start.py                  # all pages, 5 runs each
+    python benchmarks/page_cold_start.py --repeat 10 Home.py
+    python benchmarks/page_cold_start.py --json > benchmarks/results/page_cold_start.json
+    python benchmarks/page_cold_start.py --profile benchmarks/results/importtime
+
+The script exits 1 if any page's median first run is over its cold-start
+budget (--budget-ms, or PAGE_BUDGETS_MS for pages that need pandas to
+render). --profile also writes the `python -X importtime` output of one
+cold run per page to <folder>/<page>.txt and adds the slowest top-level
+imports to each row, so a regression can be traced to the module that
+caused it. Run from the folder that holds Home.py.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from import_time import parse_importtime
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+PAGES = ["Home.py"] + sorted(str(p.relative_to(APP_DIR)) for p in (APP_DIR / "pages").glob("*.py"))
+
+DEFAULT_BUDGET_MS = 500
+
+# Run History draws its charts from pandas frames on first render.
+PAGE_BUDGETS_MS = {"pages/6_Run_History.py": 1000}
+
+# Modules a page should only load once the user actually starts a run.
+HEAVY_MODULES = ["selenium", "pandas", "numpy", "xlwt", "ollama", "faiss", "docling", "pytesseract"]
+
+# Runs inside the child interpreter; prints one JSON line.
+_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({page!r}, default_timeout=60)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "first_run_ms": elapsed * 1000,
+    "exception": bool(at.exception),
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(page: str, importtime: bool = False) -> Dict:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", _PROBE.format(page=page, heavy=HEAVY_MODULES)]
+
+    result = subprocess.run(cmd, cwd=APP_DIR, capture_output=True, text=True, check=True)
+    row = json.loads(result.stdout.strip().splitlines()[-1])
+    if importtime:
+        row["importtime"] = result.stderr
+    return row
+
+
+def benchmark(pages: List[str], repeat: int, profile_dir: Optional[Path] = None) -> List[Dict]:
+    rows = []
+    for page in pages:
+        runs = [measure(page) for _ in range(repeat)]
+        times = [r["first_run_ms"] for r in runs]
+        rows.append({
+            "page": page,
+            "median_ms": round(statistics.median(times), 1),
+            "min_ms": round(min(times), 1),
+            "exception": runs[0]["exception"],
+            "heavy_loaded": runs[0]["loaded"],
+        })
+
+        if profile_dir is not None:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            stderr = measure(page, importtime=True)["importtime"]
+            (profile_dir / f"{Path(page).stem}.txt").write_text(stderr, encoding="utf-8")
+            rows[-1]["slowest_imports"] = slowest_imports(stderr, top=5)
+    return rows
+
+
+def slowest_imports(stderr: str, top: int = 10) -> List[Dict]:
+    """Largest cumulative imports in an importtime profile (top-level packages only)."""
+    times = parse_importtime(stderr)
+    roots = {name: us for name, us in times.items() if "." not in name}
+    ranked = sorted(roots.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", default=PAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table.")
+    parser.add_argument("--profile", type=Path, help="Folder for one importtime profile per page.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Cold-start budget for pages without their own (default: {DEFAULT_BUDGET_MS}).")
+    args = parser.parse_args()
+
+    rows = benchmark(args.pages, args.repeat, args.profile)
+    for r in rows:
+        r["budget_ms"] = PAGE_BUDGETS_MS.get(r["page"], args.budget_ms)
+    over = [r["page"] for r in rows if r["median_ms"] > r["budget_ms"]]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        sys.exit(1 if over else 0)
+
+    width = max(len(r["page"]) for r in rows)
+    print(f"{'page':<{width}}  {'median ms':>10}  {'min ms':>8}  {'budget':>7}  heavy modules loaded")
+    for r in rows:
+        flag = "  (exception)" if r["exception"] else ""
+        print(f"{r['page']:<{width}}  {r['median_ms']:>10.1f}  {r['min_ms']:>8.1f}  {r['budget_ms']:>7.0f}  "
+              f"{', '.join(r['heavy_loaded']) or '-'}{flag}")
+    if over:
+        print(f"\nOver budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/roster_frames.py
+"""
+Time and peak memory of building the USERS and ROLES frames of a package:
+the old per-row dict builders against the vectorised ones in backend_3.
+
+    python benchmarks/roster_frames.py               # 50k rows, 3 runs each
+    python benchmarks/roster_frames.py --rows 10000 --courses 20
+    python benchmarks/roster_frames.py --json > benchmarks/results/roster_frames.json
+
+Cases:
+- users:      _make_users_df for --rows emails.
+- course_map: staff-style map of --rows / --courses users x --courses
+              course IDs, the combined frame plus one frame per user.
+
+Peak memory is measured with tracemalloc (Python allocations only) in a
+separate pass from the timing. Run from the folder that holds Home.py.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from core.backend_3_Bulk_User_Excel_Gen import (  # noqa: E402
+    ROLES_COLUMNS, USERS_COLUMNS, _make_roles_df, _make_users_df,
+)
+
+
+# ----- the builders as they were before vectorising -----
+
+def legacy_users_df(emails: List[str], names: List[str]) -> pd.DataFrame:
+    rows = []
+    for email, name in zip(emails, names):
+        rows.append({
+            "login": email, "password": "Nanyang!23", "title": "", "first_name": name,
+            "last_name": ".", "authentication_method_id": "", "email": email, "theme_id": "",
+            "locale_id": "", "address_1": "", "address_2": "", "address_3": "", "city": "",
+            "state": "", "postcode": "", "country": "Australia", "day_phone": "",
+            "evening_phone": "", "mobile_phone": "", "time_zone": "",
+        })
+    df = pd.DataFrame(rows).rename(columns={
+        "login": "* login", "password": "* password", "first_name": "* first_name",
+        "last_name": "* last_name", "email": "* email",
+    })
+    return df[USERS_COLUMNS]
+
+
+def legacy_roles_df(rows: List[Dict]) -> pd.DataFrame:
+    df = pd.DataFrame(rows).rename(columns={
+        "login": "* login", "organisation": "* organisation",
+        "roles": "* roles", "add_to_lessons": "* add_to_lessons",
+    })
+    return df[ROLES_COLUMNS]
+
+
+def legacy_course_map(emails: List[str], course_ids: List[str]) -> List[pd.DataFrame]:
+    frames, all_rows = [], []
+    for email in emails:
+        user_rows = []
+        for cid in course_ids:
+            row = {"login": email, "organisation": cid, "roles": "monitor", "add_to_lessons": "yes"}
+            user_rows.append(row)
+            all_rows.append(row)
+        frames.append(legacy_roles_df(user_rows))
+    frames.append(legacy_roles_df(all_rows))
+    return frames
+
+
+def vectorised_course_map(emails: List[str], course_ids: List[str]) -> List[pd.DataFrame]:
+    df = _make_roles_df(emails, course_ids, "monitor", by="email")
+    k = len(course_ids)
+    return [df.iloc[i * k:(i + 1) * k] for i in range(len(emails))] + [df]
+
+
+# ----- measurement -----
+
+def _measure(build: Callable[[], object], repeat: int) -> Dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"s": round(statistics.median(times), 4), "peak_mb": round(peak / 2**20, 1)}
+
+
+def benchmark(rows: int, courses: int, repeat: int) -> List[Dict]:
+    emails = [f"user{i}@e.ntu.edu.sg" for i in range(rows)]
+    names = [f"Student {i}" for i in range(rows)]
+    users = rows // courses
+    course_ids = [str(1000 + c) for c in range(courses)]
+
+    cases = [
+        ("users", rows,
+         lambda: legacy_users_df(emails, names),
+         lambda: _make_users_df(emails, names)),
+        ("course_map", users * courses,
+         lambda: legacy_course_map(emails[:users], course_ids),
+         lambda: vectorised_course_map(emails[:users], course_ids)),
+    ]
+    results = []
+    for case, n, legacy, vectorised in cases:
+        old, new = _measure(legacy, repeat), _measure(vectorised, repeat)
+        results.append({
+            "case": case,
+            "rows": n,
+            "legacy_s": old["s"],
+            "vectorised_s": new["s"],
+            "speedup": round(old["s"] / new["s"], 1) if new["s"] else None,
+            "legacy_peak_mb": old["peak_mb"],
+            "vectorised_peak_mb": new["peak_mb"],
+        })
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--courses", type=int, default=100, help="course IDs per user in the course_map case")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.rows, args.courses, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'case':<11} {'rows':>7} {'legacy s':>9} {'vector s':>9} {'speedup':>8} {'legacy MB':>10} {'vector MB':>10}")
+    for r in results:
+        print(f"{r['case']:<11} {r['rows']:>7} {r['legacy_s']:>9.4f} {r['vectorised_s']:>9.4f} {r['speedup']:>7}x "
+              f"{r['legacy_peak_mb']:>10.1f} {r['vectorised_peak_mb']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# benchmarks/roster_validation.py
+"""
+Time of checking a pasted roster: the old per-email regex loop against
+core.roster.validate_roster (which also finds duplicates, near
+duplicates and name / email mismatches).
+
+    python benchmarks/roster_validation.py               # 20k rows, 3 runs each
+    python benchmarks/roster_validation.py --rows 100000
+    python benchmarks/roster_validation.py --json > benchmarks/results/roster_validation.json
+
+The roster is firstname.lastname student emails with names, about 1% bad
+formats, 1% staff domains and 1% case-variant duplicates. Run from the
+folder that holds Home.py.
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from core.roster import validate_roster  # noqa: E402
+
+EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+# ----- the check as it was: one regex per email, no duplicate or name checks -----
+
+def legacy_validate(emails: List[str]) -> List[str]:
+    valid = []
+    for email in emails:
+        if not email or not EMAIL_REGEX.match(email):
+            continue
+        if not email.endswith("@e.ntu.edu.sg"):
+            continue
+        valid.append(email)
+    return valid
+
+
+def roster(rows: int) -> Tuple[List[str], List[str]]:
+    emails, names = [], []
+    for i in range(rows):
+        email = f"first{i}.last{i}@e.ntu.edu.sg"
+        if i % 100 == 1:
+            email = f"first{i}.last{i}"
+        elif i % 100 == 2:
+            email = f"first{i}.last{i}@ntu.edu.sg"
+        elif i % 100 == 3:
+            email = emails[-1].upper()
+        emails.append(email)
+        names.append(f"First{i} Last{i}")
+    return emails, names
+
+
+def _time(build: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times), 4)
+
+
+def benchmark(rows: int, repeat: int) -> Dict:
+    emails, names = roster(rows)
+    report = validate_roster(emails, names, "student")
+    return {
+        "rows": rows,
+        "legacy_s": _time(lambda: legacy_validate(emails), repeat),
+        "vectorised_s": _time(lambda: validate_roster(emails, names, "student"), repeat),
+        "legacy_kept": len(legacy_validate(emails)),
+        "vectorised_kept": len(report.emails),
+        "problems": len(report.problems),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.rows, args.repeat)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"{'rows':>7} {'legacy s':>9} {'vector s':>9} {'legacy kept':>12} {'vector kept':>12} {'problems':>9}")
+    print(f"{result['rows']:>7} {result['legacy_s']:>9.4f} {result['vectorised_s']:>9.4f} "
+          f"{result['legacy_kept']:>12} {result['vectorised_kept']:>12} {result['problems']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# benchmarks/student_course_map.py
+"""
+Peak memory and time of a student course-map package as the number of
+courses grows. Only one course's workbook is built at a time, so the
+peak is that workbook plus the ZIP spool, which keeps up to
+SPOOL_MAX_BYTES (8 MB) in memory before it moves to disk; it stops
+growing once the spool has rolled over.
+
+    python benchmarks/student_course_map.py                  # 2,000 students; 10 / 40 / 160 courses
+    python benchmarks/student_course_map.py --students 5000 --courses 20 80
+    python benchmarks/student_course_map.py --json > benchmarks/results/student_course_map.json
+
+Rendering is serial (workers=1) and uncached so every workbook is built
+in this process. Peak memory is measured with tracemalloc (Python
+allocations only, including the in-memory part of the ZIP spool) in a
+separate pass from the timing. Run from the folder that holds Home.py.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from core.backend_3_Bulk_User_Excel_Gen import generate_student_package  # noqa: E402
+from core.package_zip import SPOOL_MAX_BYTES  # noqa: E402
+
+
+def run(students: int, courses: int):
+    pkg = generate_student_package(
+        cohort_name="Bench",
+        full_names=[],
+        raw_emails="\n".join(f"s{i:06d}@e.ntu.edu.sg" for i in range(students)),
+        raw_course_ids="\n".join(str(1000 + c) for c in range(courses)),
+        generate_y1_new_users=False,
+        generate_course_map=True,
+        workers=1,
+    )
+    pkg.zip_file.close()
+
+
+def benchmark(students: int, course_counts: List[int]) -> List[Dict]:
+    results = []
+    for courses in course_counts:
+        start = time.perf_counter()
+        run(students, courses)
+        seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        run(students, courses)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            "students": students,
+            "courses": courses,
+            "rows": students * courses,
+            "s": round(seconds, 3),
+            "peak_mb": round(peak / 2**20, 1),
+        })
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2_000)
+    parser.add_argument("--courses", type=int, nargs="+", default=[10, 40, 160])
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.students, args.courses)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"(the ZIP spool keeps up to {SPOOL_MAX_BYTES / 2**20:.0f} MB in memory before it moves to disk)")
+    print(f"{'students':>8} {'courses':>8} {'rows':>9} {'s':>7} {'peak MB':>8}")
+    for r in results:
+        print(f"{r['students']:>8} {r['courses']:>8} {r['rows']:>9} {r['s']:>7.3f} {r['peak_mb']:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
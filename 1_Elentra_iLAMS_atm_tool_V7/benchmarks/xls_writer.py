@@ -0,0 +1,116 @@
+# benchmarks/xls_writer.py
+"""
+USERS / ROLES workbook write time: the old cell-by-cell ws.write() loop
+against core.xls_writer, on synthetic rosters shaped like the ones
+backend_3 builds.
+
+    python benchmarks/xls_writer.py                  # 100, 10k and 60k rows, 3 runs each
+    python benchmarks/xls_writer.py --rows 1000 --repeat 5
+    python benchmarks/xls_writer.py --json > benchmarks/results/xls_writer.json
+
+Reports the median seconds per workbook for each writer and the speedup.
+Run from the folder that holds Home.py.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+import xlwt
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from core.backend_3_Bulk_User_Excel_Gen import ROLES_COLUMNS, USERS_COLUMNS  # noqa: E402
+from core.xls_writer import frame_to_xls  # noqa: E402
+
+DEFAULT_ROWS = [100, 10_000, 60_000]
+
+
+def legacy_dataframe_to_xls(df) -> bytes:
+    """dataframe_to_xls as it was before core.xls_writer."""
+    wb = xlwt.Workbook()
+    ws = wb.add_sheet("Sheet1")
+    for col_idx, col in enumerate(df.columns):
+        ws.write(0, col_idx, col)
+    for row_idx, row in enumerate(df.itertuples(index=False), start=1):
+        for col_idx, value in enumerate(row):
+            ws.write(row_idx, col_idx, value)
+    bio = BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
+
+
+def users_frame(n: int) -> pd.DataFrame:
+    emails = [f"user{i}@e.ntu.edu.sg" for i in range(n)]
+    row = dict.fromkeys(USERS_COLUMNS, "")
+    row.update({"* password": "Nanyang!23", "* last_name": ".", "country": "Australia"})
+    df = pd.DataFrame([row] * n, columns=USERS_COLUMNS)
+    df["* login"] = emails
+    df["* email"] = emails
+    df["* first_name"] = [f"Student {i}" for i in range(n)]
+    return df
+
+
+def roles_frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "* login": [f"user{i}@e.ntu.edu.sg" for i in range(n)],
+        "* organisation": [str(1000 + i % 12) for i in range(n)],
+        "* roles": ["learner"] * n,
+        "* add_to_lessons": ["yes"] * n,
+    }, columns=ROLES_COLUMNS)
+
+
+def _median_seconds(write: Callable, df: pd.DataFrame, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        write(df)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def benchmark(rows: List[int], repeat: int) -> List[Dict]:
+    results = []
+    for n in rows:
+        for sheet, make in (("USERS", users_frame), ("ROLES", roles_frame)):
+            df = make(n)
+            legacy = _median_seconds(legacy_dataframe_to_xls, df, repeat)
+            fast = _median_seconds(frame_to_xls, df, repeat)
+            results.append({
+                "sheet": sheet,
+                "rows": n,
+                "cells": n * len(df.columns),
+                "legacy_s": round(legacy, 4),
+                "columnar_s": round(fast, 4),
+                "speedup": round(legacy / fast, 1) if fast else None,
+            })
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.rows, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'sheet':<6} {'rows':>7} {'cells':>9} {'legacy s':>9} {'columnar s':>11} {'speedup':>8}")
+    for r in results:
+        print(f"{r['sheet']:<6} {r['rows']:>7} {r['cells']:>9} {r['legacy_s']:>9.4f} {r['columnar_s']:>11.4f} {r['speedup']:>7}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
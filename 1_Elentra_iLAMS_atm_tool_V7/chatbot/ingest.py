@@ -2,9 +2,9 @@
 
 from pathlib import Path
 from typing import List
-from docling.document_converter import DocumentConverter
-from pdf2image import convert_from_path
-import pytesseract
+
+# docling, pdf2image and pytesseract are imported inside the functions that
+# use them: they take seconds to import and most runs never need OCR.
 
 
 def chunk_text(text: str, chunk_size: int = 1200, overlap: int = 200):
@@ -19,6 +19,8 @@ def chunk_text(text: str, chunk_size: int = 1200, overlap: int = 200):
     return chunks
 
 def ocr_pdf(file_path: Path) -> str:
+    from pdf2image import convert_from_path
+    import pytesseract
 
     images = convert_from_path(file_path)
     text = "\n".join(pytesseract.image_to_string(img) for img in images)
@@ -26,6 +28,8 @@ def ocr_pdf(file_path: Path) -> str:
 
 
 def parse_with_docling(file_path: Path) -> str:
+    from docling.document_converter import DocumentConverter
+
     converter = DocumentConverter()
     result = converter.convert(str(file_path))
 
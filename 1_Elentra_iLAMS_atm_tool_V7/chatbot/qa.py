@@ -1,6 +1,5 @@
 # core/chatbot/qa.py
 
-import ollama
 from typing import List
 from chatbot.ingest import load_and_chunk_docs
 from chatbot.vector_store import VectorStore
@@ -17,6 +16,8 @@ prompt_model = "gpt-oss:20b" #14gb vram minimum
 
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
+    import ollama
+
     embeddings = []
     for text in texts:
         res = ollama.embeddings(
@@ -147,6 +148,8 @@ class KnowledgeAssistant:
 
     def _llm_answer(self, prompt: str) -> str:
         try:
+            import ollama
+
             res = ollama.chat(
                 model=prompt_model,
                 messages=[{"role": "user", "content": prompt}],
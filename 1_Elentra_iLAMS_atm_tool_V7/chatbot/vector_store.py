@@ -1,12 +1,13 @@
 # core/chatbot/vector_store.py
 
 from typing import List
-import numpy as np
-import faiss
 
 
 class VectorStore:
     def __init__(self, embeddings: List[List[float]], chunks: List[str]):
+        import faiss
+        import numpy as np
+
         if len(embeddings) != len(chunks):
             raise ValueError("Embeddings and chunks length mismatch")
 
@@ -17,6 +18,8 @@ class VectorStore:
         self.index.add(np.array(embeddings).astype("float32"))
 
     def search(self, query_embedding: List[float], k: int = 5) -> List[str]:
+        import numpy as np
+
         query_vector = np.array([query_embedding]).astype("float32")
         _, indices = self.index.search(query_vector, k)
 
@@ -1,3 +1,3 @@
 # core/__init__.py
 
-from .config import SeleniumConfig, get_config, set_config
+from .config import ConfigProfiles, SeleniumConfig, get_config, get_profiles, load_profile, set_config
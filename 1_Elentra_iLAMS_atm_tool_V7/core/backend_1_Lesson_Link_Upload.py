@@ -2,8 +2,9 @@
 
 
 import re
-from typing import Dict, List, Any, Union, IO, Callable
+from typing import Dict, List, Any, Union, IO, Callable, ContextManager, Optional
 import time
+from contextlib import contextmanager
 from datetime import datetime
 
 from selenium import webdriver
@@ -18,9 +19,6 @@ from selenium.common.exceptions import (
     NoSuchElementException,
     StaleElementReferenceException,
 )
-
-import streamlit as st
-
 from .config import SeleniumConfig, get_config
 from .selenium_utils import (
     LogCallback,
@@ -36,6 +34,10 @@ from .selenium_utils import (
     time_out,
     click_text
 )
+from .rate_limiter import AdaptiveRateLimiter
+from .run_history import STOPPED, RunHistory, open_run
+from .session_supervisor import DriverSupervisor
+from .tab_pool import TabContext, run_in_tabs
 
 def _parse_multi_input(text: str) -> List[str]:
     if not text:
@@ -43,6 +45,475 @@ def _parse_multi_input(text: str) -> List[str]:
     parts = re.split(r"[,\n]+", text)
     return [p.strip() for p in parts if p.strip()]
 
+
+def _lesson_links(lesson: Dict) -> Dict[str, str]:
+    """The Elentra event URL and the Monitor / Student resource titles and URLs."""
+    lams_lesson_title = lesson["lesson_title"]
+    lams_lesson_id = lesson["lams_lesson_id"]
+    return {
+        "event_url": f"https://ntu.elentra.cloud/events?id={lesson['elentra_event_id']}",
+        "monitor_title": f"LAMS {lams_lesson_title} (Facilitator/CE)",
+        "monitor_url": (
+            "https://ilams.lamsinternational.com/lams/monitoring/"
+            f"monitoring/monitorLesson.do?lessonID={lams_lesson_id}"
+        ),
+        "student_title": f"LAMS {lams_lesson_title}",
+        "student_url": (
+            "https://ilams.lamsinternational.com/lams/home/learner.do?"
+            f"lessonID={lams_lesson_id}"
+        ),
+    }
+
+
+def _open_event(
+    driver,
+    event_url: str,
+    log: Callable[..., None],
+    should_stop: Callable[[], bool],
+    limiter: AdaptiveRateLimiter,
+) -> Optional[str]:
+    """
+    Open the event's Administrator View > Content tab. Returns the event
+    name, or None if a stop was requested. The page loads are the server
+    round-trips fed to limiter.
+    """
+    # STEP 1: Attach to Selenium
+    log("Attached to Selenium driver.")
+
+    # STEP 2: Open Elentra Event Page (Twice)
+    with limiter.track(log):
+        driver.get(event_url)
+    log("Navigated to Elentra event page (1st load).")
+    with limiter.track(log):
+        driver.get(event_url)
+    log("Navigated to Elentra event page (2nd load).")
+    time.sleep(time_sleep)
+
+    # ----------------------------------------------
+    # STEP 3: Click Admin > Content tabs
+    # ----------------------------------------------
+    # wait_and_click(driver, "//a[contains(text(), 'Administrator View')]", timeout=time_out, highlight_fn=highlight, 
+    #             message="Administrator View clicked",sleep_after=time_sleep)
+
+    # wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[2]/ul/li[2]/a", timeout=time_out, highlight_fn=highlight,
+    #             message="Content tab clicked", sleep_after=time_sleep)
+
+    click_text(driver, "Administrator View")
+
+    click_text(driver, "Content")
+    if should_stop():
+        log("🛑 Stop requested — stopping.")
+        return None
+
+    # ----------------------------------------------
+    # STEP 4: Read Event Name
+    # ----------------------------------------------
+    h1 = WebDriverWait(driver, time_out).until(
+        EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div[3]/div/h1[1]"))
+    )
+    highlight(h1)
+    elentra_event_name = h1.text
+    log(f"Page title detected: {elentra_event_name}")
+    return elentra_event_name
+
+
+def _add_monitor_resource(
+    driver,
+    lams_monitor_title: str,
+    lams_monitor_url: str,
+    log: Callable[..., None],
+    should_stop: Callable[[], bool],
+    saving: Callable[[], ContextManager],
+) -> bool:
+    """
+    Add the Monitor (Facilitator/CE) link resource on the open event page.
+    The Save click runs inside saving(). Returns False if a stop was
+    requested first.
+    """
+    log("⏳ Inserting MONITOR URL...")
+
+    if should_stop():
+        log("🛑 Stop requested — stopping.")
+        return False
+
+    # scrolling
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    log("Scrolled to bottom.")
+    time.sleep(time_sleep)
+
+    # Add a Resource
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[3]/div[1]/a",
+                timeout=time_out, highlight_fn=highlight,
+                message="Add a Resource clicked", sleep_after=time_sleep)
+
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div/label[6]",
+                timeout=time_out, highlight_fn=highlight,
+                message="Link option selected", sleep_after=time_sleep)
+
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
+                timeout=time_out, highlight_fn=highlight,
+                message="Next clicked", sleep_after=time_sleep)
+
+    # Optional / No timeframe / Next
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[1]", timeout=time_out,
+                highlight_fn=highlight, message="Optional selected", sleep_after=time_sleep)
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/label[4]", timeout=time_out,
+                highlight_fn=highlight, message="No timeframe selected", sleep_after=time_sleep)
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]", timeout=time_out,
+                highlight_fn=highlight, message="Next clicked", sleep_after=time_sleep)
+
+    # Accessibility, hidden, published
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[1]", timeout=time_out,
+                highlight_fn=highlight, message="Accessible Anytime selected", sleep_after=time_sleep)
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/label[2]", timeout=time_out,
+                highlight_fn=highlight, message="Hide this resource", sleep_after=time_sleep)
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[4]/label[1]", timeout=time_out,
+                highlight_fn=highlight, message="Published selected", sleep_after=time_sleep)
+
+    # Next step (final)
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]", timeout=time_out,
+                highlight_fn=highlight, message="Final Next clicked", sleep_after=time_sleep)
+
+    # Proxy not required
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/div/label[1]", timeout=time_out,
+                highlight_fn=highlight, message="Proxy disabled", sleep_after=time_sleep)
+
+    # Fill URL
+    el = WebDriverWait(driver, time_out).until(
+        EC.visibility_of_element_located((By.XPATH, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/div/input"))
+    )
+    highlight(el)
+    el.clear()
+    el.send_keys(lams_monitor_url)
+    log("Monitor URL entered.")
+
+    # Title
+    el = WebDriverWait(driver, time_out).until(
+        EC.visibility_of_element_located((By.XPATH, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/div/input"))
+    )
+    highlight(el)
+    el.clear()
+    el.send_keys(lams_monitor_title)
+    log("Monitor title entered.")
+
+    # Scroll modal
+    modal = WebDriverWait(driver, time_out).until(
+        EC.presence_of_element_located((By.ID, "event-resource-modal"))
+    )
+    highlight(modal)
+    driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", modal)
+
+    # Description iframe
+    iframe = driver.find_element(
+        By.CSS_SELECTOR,
+        "#cke_event-resource-link-description iframe.cke_wysiwyg_frame"
+    )
+    driver.switch_to.frame(iframe)
+    editor_body = driver.find_element(By.CSS_SELECTOR, "body[contenteditable='true']")
+    highlight(editor_body)
+    editor_body.clear()
+    editor_body.send_keys(lams_monitor_title)
+    driver.switch_to.default_content()
+    log("Monitor description entered.")
+
+    if should_stop():
+        log("🛑 Stop requested — stopping.")
+        return False
+
+    # Save + Close
+    with saving():
+        wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]", timeout=time_out,
+                    highlight_fn=highlight, message="Monitor resource saved")
+    time.sleep(time_sleep)
+    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[1]", timeout=time_out,
+                highlight_fn=highlight, message="Monitor resource dialog closed", sleep_after=time_sleep)
+
+    return True
+
+
+def _add_student_resource(
+    driver,
+    lams_student_title: str,
+    lams_student_url: str,
+    log: Callable[..., None],
+    should_stop: Callable[[], bool],
+    saving: Callable[[], ContextManager],
+) -> bool:
+    """
+    Add the Student link resource on the open event page. The Save click
+    runs inside saving(). Returns False if a stop was requested first.
+    """
+
+    log("⏳ Inserting STUDENT URL...")
+
+    if should_stop():
+        log("🛑 Stop requested — stopping.")
+        return False
+
+    if True: #to group the lines of code
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(time_sleep)
+
+    # 9) Add a Resource
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[3]/div[1]/a", timeout=time_out, highlight_fn=highlight,
+        message="Add a Resource link clicked", sleep_after=time_sleep)
+    # 10) 'Link' Resource checkbox
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div/label[6]", timeout=time_out, highlight_fn=highlight,
+        message="Link checkbox selected", sleep_after=time_sleep)
+
+    # 11) Next Step
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ Next Step Button clicked", sleep_after=time_sleep
+    )
+
+    # 12) Required
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[2]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ Optional selected", sleep_after=time_sleep
+    )
+
+    # 13) No Timeframe
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/label[4]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ No Timeframe link clicked", sleep_after=time_sleep
+    )
+
+    # 14) Next Step
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ Next step (to Hide)", sleep_after=time_sleep
+    )
+
+    # 15) No, this resource is accessible any time
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[1]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ No, this resource is accessible any time selected", sleep_after=time_sleep
+    )
+
+    # 16) Hide this resource from learners
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/label[1]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ Allow learners to view this resource selected", sleep_after=time_sleep
+    )
+
+    # 17) Published
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[4]/label[1]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ Published selected", sleep_after=time_sleep
+    )
+
+    # 18) Next Step
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ Final Next Step clicked", sleep_after=time_sleep
+    )
+
+    # 18.5) No, the proxy isn’t required to be enabled
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/div/label[1]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ No, the proxy isnt required to be enabled selected", sleep_after=time_sleep
+    )
+
+    print("⏳ Inserting LAMS title & URL now ⏳")
+    log("⏳ Inserting LAMS title & URL now ⏳")
+
+    if should_stop():
+        log("🛑 Stop requested — stopping.")
+        return False
+
+    # 19) Enter Student URL
+    time.sleep(0.5)
+    el = WebDriverWait(driver, time_sleep).until(
+        EC.visibility_of_element_located((By.XPATH,
+            "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/div/input"
+        ))
+    )
+    highlight(el)
+    el.clear()
+    el.send_keys(lams_student_url)
+    print("✅ Monitor URL entered")
+    log("✅ Monitor URL entered")
+    time.sleep(time_sleep)
+
+    # 20) Enter Lesson Title
+    el = WebDriverWait(driver, time_sleep).until(
+        EC.visibility_of_element_located((By.XPATH,
+            "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/div/input"
+        ))
+    )
+    highlight(el)
+    el.clear()
+    el.send_keys(lams_student_title)
+    print("✅ Title entered")
+    time.sleep(time_sleep)
+
+    # 21) Scroll the message box to the bottom
+    modal = WebDriverWait(driver, time_out).until(
+        EC.presence_of_element_located((By.ID, "event-resource-modal"))
+    )
+    highlight(modal)
+    driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", modal)
+    print("✅ Modal scrolled to bottom")
+    log("✅ Modal scrolled to bottom")
+    time.sleep(time_sleep)
+    time.sleep(0.5)
+
+    # 22) Enter Description
+    time.sleep(0.5)
+    iframe = driver.find_element(
+        By.CSS_SELECTOR,
+        "#cke_event-resource-link-description iframe.cke_wysiwyg_frame"
+    )
+    driver.switch_to.frame(iframe)
+    print("✅ Switched to iframe")
+    log("✅ Switched to iframe")
+
+    editor_body = driver.find_element(
+        By.CSS_SELECTOR,
+        "body[contenteditable='true']"
+    )
+    highlight(editor_body)
+    try:
+        editor_body.clear()
+    except Exception:
+        editor_body.send_keys(Keys.COMMAND + "a", Keys.DELETE)
+
+    editor_body.send_keys(lams_student_title)
+    driver.switch_to.default_content()
+    print("✅ Description added")
+    log("✅ Description added")
+    time.sleep(time_sleep)
+
+    if should_stop():
+        log("🛑 Stop requested — stopping.")
+        return False
+
+    # 23) Save Resource
+    time.sleep(0.5)
+    with saving():
+        wait_and_click(
+            driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
+            timeout=time_out, highlight_fn=highlight,
+            message="✅ Resource saved",
+        )
+    time.sleep(time_sleep)
+
+    # 24) Close
+    time.sleep(0.5)
+    wait_and_click(
+        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[1]",
+        timeout=time_out, highlight_fn=highlight,
+        message="✅ Closed attachment dialog", sleep_after=time_sleep
+    )
+
+    return True
+
+
+def _upload_lesson(
+    supervisor: DriverSupervisor,
+    lesson: Dict,
+    upload_student: bool,
+    upload_monitor: bool,
+    log: Callable[..., None],
+    should_stop: Callable[[], bool],
+    limiter: AdaptiveRateLimiter,
+) -> Optional[Dict]:
+    """
+    Add the Monitor and/or Student link resources for one lesson in the
+    supervisor's tab. Returns the result row, or None if a stop was
+    requested part-way through.
+
+    limiter is fed the lesson's server round-trips (the page loads and
+    Save clicks), not the whole multi-step lesson, and reports back-offs
+    through log.
+
+    Each resource is a checkpoint of its own. If the browser dies before a
+    resource's Save click, only the unsaved dialog is lost, so the session
+    is recovered, the event reopened and that resource redone. After the
+    Save click the resource may already exist in Elentra, so it is never
+    replayed: the session is recovered for the next lesson and this one
+    fails with a note to check the event.
+    """
+    links = _lesson_links(lesson)
+
+    def open_event(driver, wait):
+        return _open_event(driver, links["event_url"], log, should_stop, limiter)
+
+    # Nothing has been saved yet, so opening the event is simply retried.
+    elentra_event_name = supervisor.run_item(open_event)
+    if elentra_event_name is None:
+        return None
+
+    steps = []
+    if upload_monitor:
+        steps.append(("monitor", _add_monitor_resource))
+    if upload_student:
+        steps.append(("student", _add_student_resource))
+
+    for kind, add_resource in steps:
+        submitted = []
+
+        @contextmanager
+        def saving():
+            # From here on the resource may exist in Elentra
+            submitted.append(True)
+            with limiter.track(log):
+                yield
+
+        while True:
+            try:
+                added = add_resource(
+                    supervisor.driver, links[f"{kind}_title"], links[f"{kind}_url"],
+                    log, should_stop, saving,
+                )
+                break
+            except Exception as e:
+                if submitted:
+                    # The lesson fails either way, so no page is restored.
+                    if supervisor.try_recover(e):
+                        raise RuntimeError(
+                            f"Browser lost after saving the {kind} resource; not retried, so check "
+                            f"event {lesson['elentra_event_id']} in Elentra for it. ({e})"
+                        ) from e
+                    raise
+                if not supervisor.try_recover(e, resume=open_event):
+                    raise
+                log(f"Browser recovered — redoing the {kind} resource.", "warn")
+        if not added:
+            return None
+
+    if upload_student:
+        log("🎉 Resource added successfully.")
+        log(f"Elentra Event Name: {elentra_event_name}")
+        log(f"LAMS Lesson ID: {lesson['lams_lesson_id']}")
+
+    if upload_monitor:
+        log(f"Monitor Title: {links['monitor_title']}")
+        log(f"Monitor URL: {links['monitor_url']}")
+
+    if upload_student:
+        log(f"Student Title: {links['student_title']}")
+        log(f"Student URL: {links['student_url']}")
+
+    return {**lesson, "status": "success"}
+
+
+def _lesson_error(lesson: Dict, e: Exception) -> Dict:
+    return {**lesson, "status": f"error: {e}"}
+
+
 def run_elentra_link_upload(
     lams_lesson_titles_raw: str,
     elentra_event_ids_raw: str,
@@ -51,8 +522,30 @@ def run_elentra_link_upload(
     upload_monitor: bool,
     log_callback: LogCallback = default_log_callback,
     progress_callback: ProgressCallback = default_progress_callback,
-
+    workers: int = 1,
+    debugger_addresses: Optional[List[str]] = None,
+    history: Optional[RunHistory] = None,
+    stop_flag: Callable[[], bool] = lambda: False,
+    config: Optional[SeleniumConfig] = None,
 ) -> List[Dict]:
+    """
+    Upload iLAMS lesson links to Elentra events.
+
+    With workers > 1 the lessons are spread across that many Chrome tabs
+    (see core.tab_pool.run_in_tabs); debugger_addresses optionally spreads
+    the tabs over several Chrome instances.
+
+    With a history store, the run and each lesson's outcome and duration
+    are recorded (see core.run_history).
+
+    stop_flag is polled between lessons and between steps of a lesson;
+    once it returns True the run stops at the next checkpoint.
+
+    config is the caller's SeleniumConfig snapshot (default: get_config()).
+
+    Returns {"logs", "results", "completed", "stopped"} however the run
+    ends; results holds the lessons processed before a stop.
+    """
     start_time = time.time() 
 
     lams_lesson_titles = _parse_multi_input(lams_lesson_titles_raw)
@@ -92,428 +585,142 @@ def run_elentra_link_upload(
 
     logs: List[Dict] = []
 
-    def log(msg: str, level: str = "INFO"):
-        entry = {
-            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "module": "ElentraUpload",
-            "level": level,
-            "message": msg,
-        }
+    def log(msg: str, level: str = "INFO", **fields):
+        entry = make_log_entry("ElentraUpload", msg, level, **fields)
         logs.append(entry)
         log_callback(entry)
 
 
-    config = get_config()
+    config = config or get_config()
 
-    def should_stop():
-        return st.session_state.get("stop_requested", False)
+    should_stop = stop_flag
+    results: List[Dict] = []
+
+    def finish(completed: bool = True, stopped: bool = False) -> Dict:
+        return {"logs": logs, "results": results, "completed": completed, "stopped": stopped}
 
     if not config.elentra_base_url:
         log("Elentra base URL is not configured. Set it in Home page.", "error")
-        return logs
-
-    try:
-        
-        driver, wait = get_driver(config)
-        total = len(lams_lesson_titles)
-        results = []
-
-    
-        for idx in range(total):
-
-
-            if should_stop():
-                log("🛑 Stop requested — stopping.")
-                return logs
+        return finish(completed=False)
 
-            lams_lesson_title = lams_lesson_titles[idx]
-            lams_lesson_id = lams_lesson_ids[idx]
-            elentra_event_id = event_ids[idx]
-
-            log(f"[{idx+1}/{total}] Processing {lams_lesson_title}")
-
-            elentra_event_url = (
-                f"https://ntu.elentra.cloud/events?id={elentra_event_id}"
-            )
-
-            lams_monitor_title = f"LAMS {lams_lesson_title} (Facilitator/CE)"
-            lams_monitor_url = (
-                "https://ilams.lamsinternational.com/lams/monitoring/"
-                f"monitoring/monitorLesson.do?lessonID={lams_lesson_id}"
-            )
-
-            lams_student_title = f"LAMS {lams_lesson_title}"
-            lams_student_url = (
-                "https://ilams.lamsinternational.com/lams/home/learner.do?"
-                f"lessonID={lams_lesson_id}"
+    lessons = [
+        {
+            "lesson_title": title,
+            "lams_lesson_id": lesson_id,
+            "elentra_event_id": event_id,
+        }
+        for title, lesson_id, event_id in zip(lams_lesson_titles, lams_lesson_ids, event_ids)
+    ]
+    total = len(lessons)
+
+    if should_stop():
+        log("🛑 Stop requested — stopping.")
+        return finish(completed=False, stopped=True)
+
+    run = open_run(
+        history,
+        "lesson_link_upload",
+        {
+            "lessons": total,
+            "upload_student": upload_student,
+            "upload_monitor": upload_monitor,
+            "workers": workers,
+        },
+        profile=",".join(debugger_addresses or [config.debugger_address]),
+    )
+
+    with run:
+        # One limiter paces every tab, so parallel runs back off together.
+        limiter = AdaptiveRateLimiter(log=log)
+
+        if workers > 1:
+            def upload_in_tab(ctx: TabContext, idx: int, lesson: Dict) -> Optional[Dict]:
+                limiter.wait()
+                ctx.log(
+                    f"[{idx+1}/{total}] Processing {lesson['lesson_title']} · {limiter.describe()}",
+                    item=lesson["lesson_title"], step="upload",
+                )
+                with run.item(lesson["lesson_title"], step="upload") as outcome:
+                    try:
+                        # Back-offs are logged through ctx.log, which the
+                        # pool relays (tagged) on the script thread.
+                        result = _upload_lesson(
+                            ctx.supervisor, lesson, upload_student, upload_monitor,
+                            ctx.log, ctx.should_stop, limiter,
+                        )
+                    except Exception as e:
+                        ctx.log(f"❌ Failed lesson {idx+1}: {e}", "error", item=lesson["lesson_title"], step="upload")
+                        outcome.fail(str(e))
+                        return _lesson_error(lesson, e)
+                    if result is None:
+                        outcome.skip("stopped")
+                    return result
+
+            tab_results = run_in_tabs(
+                lessons,
+                upload_in_tab,
+                workers=workers,
+                log=log,
+                progress_callback=progress_callback,
+                stop_flag=should_stop,
+                config=config,
+                debugger_addresses=debugger_addresses,
+                driver_factory=get_driver,
             )
-
-            log(f"[{idx+1}/{total}] Processing {lams_lesson_title}")
-            
+            results = [r for r in tab_results if r is not None]
+            if len(results) < total and should_stop():
+                run.status = STOPPED
+                return finish(completed=False, stopped=True)
+
+        else:
+            # _upload_lesson checkpoints each resource with the supervisor,
+            # so a dead browser never replays a resource already saved.
+            supervisor = DriverSupervisor(config, driver_factory=get_driver, log=log)
             try:
+                supervisor.attach()
 
-
-                # STEP 1: Attach to Selenium
-                log("Attached to Selenium driver.")
-
-                # STEP 2: Open Elentra Event Page (Twice)
-                driver.get(elentra_event_url)
-                log("Navigated to Elentra event page (1st load).")
-                driver.get(elentra_event_url)
-                log("Navigated to Elentra event page (2nd load).")
-                time.sleep(time_sleep)
-
-                # ----------------------------------------------
-                # STEP 3: Click Admin > Content tabs
-                # ----------------------------------------------
-                # wait_and_click(driver, "//a[contains(text(), 'Administrator View')]", timeout=time_out, highlight_fn=highlight, 
-                #             message="Administrator View clicked",sleep_after=time_sleep)
-                
-                # wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[2]/ul/li[2]/a", timeout=time_out, highlight_fn=highlight,
-                #             message="Content tab clicked", sleep_after=time_sleep)
-
-                click_text(driver, "Administrator View")
-
-                click_text(driver, "Content")
-                if should_stop():
-                    log("🛑 Stop requested — stopping.")
-                    return logs
-
-                # ----------------------------------------------
-                # STEP 4: Read Event Name
-                # ----------------------------------------------
-                h1 = WebDriverWait(driver, time_out).until(
-                    EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div[3]/div/h1[1]"))
-                )
-                highlight(h1)
-                elentra_event_name = h1.text
-                log(f"Page title detected: {elentra_event_name}")
-
-                # ----------------------------------------------
-                # STEP 5: MONITOR RESOURCE WORKFLOW
-                # ----------------------------------------------
-                if upload_monitor:
-                    log("⏳ Inserting MONITOR URL...")
+                for idx, lesson in enumerate(lessons):
 
                     if should_stop():
                         log("🛑 Stop requested — stopping.")
-                        return logs
-
-                    # scrolling
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    log("Scrolled to bottom.")
-                    time.sleep(time_sleep)
-
-                    # Add a Resource
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[3]/div[1]/a",
-                                timeout=time_out, highlight_fn=highlight,
-                                message="Add a Resource clicked", sleep_after=time_sleep)
-
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div/label[6]",
-                                timeout=time_out, highlight_fn=highlight,
-                                message="Link option selected", sleep_after=time_sleep)
-
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
-                                timeout=time_out, highlight_fn=highlight,
-                                message="Next clicked", sleep_after=time_sleep)
-
-                    # Optional / No timeframe / Next
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[1]", timeout=time_out,
-                                highlight_fn=highlight, message="Optional selected", sleep_after=time_sleep)
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/label[4]", timeout=time_out,
-                                highlight_fn=highlight, message="No timeframe selected", sleep_after=time_sleep)
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]", timeout=time_out,
-                                highlight_fn=highlight, message="Next clicked", sleep_after=time_sleep)
-
-                    # Accessibility, hidden, published
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[1]", timeout=time_out,
-                                highlight_fn=highlight, message="Accessible Anytime selected", sleep_after=time_sleep)
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/label[2]", timeout=time_out,
-                                highlight_fn=highlight, message="Hide this resource", sleep_after=time_sleep)
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[4]/label[1]", timeout=time_out,
-                                highlight_fn=highlight, message="Published selected", sleep_after=time_sleep)
-
-                    # Next step (final)
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]", timeout=time_out,
-                                highlight_fn=highlight, message="Final Next clicked", sleep_after=time_sleep)
-
-                    # Proxy not required
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/div/label[1]", timeout=time_out,
-                                highlight_fn=highlight, message="Proxy disabled", sleep_after=time_sleep)
-
-                    # Fill URL
-                    el = WebDriverWait(driver, time_out).until(
-                        EC.visibility_of_element_located((By.XPATH, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/div/input"))
-                    )
-                    highlight(el)
-                    el.clear()
-                    el.send_keys(lams_monitor_url)
-                    log("Monitor URL entered.")
-
-                    # Title
-                    el = WebDriverWait(driver, time_out).until(
-                        EC.visibility_of_element_located((By.XPATH, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/div/input"))
-                    )
-                    highlight(el)
-                    el.clear()
-                    el.send_keys(lams_monitor_title)
-                    log("Monitor title entered.")
-
-                    # Scroll modal
-                    modal = WebDriverWait(driver, time_out).until(
-                        EC.presence_of_element_located((By.ID, "event-resource-modal"))
-                    )
-                    highlight(modal)
-                    driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", modal)
-
-                    # Description iframe
-                    iframe = driver.find_element(
-                        By.CSS_SELECTOR,
-                        "#cke_event-resource-link-description iframe.cke_wysiwyg_frame"
-                    )
-                    driver.switch_to.frame(iframe)
-                    editor_body = driver.find_element(By.CSS_SELECTOR, "body[contenteditable='true']")
-                    highlight(editor_body)
-                    editor_body.clear()
-                    editor_body.send_keys(lams_monitor_title)
-                    driver.switch_to.default_content()
-                    log("Monitor description entered.")
-
-                    if should_stop():
-                        log("🛑 Stop requested — stopping.")
-                        return logs
-                    
-                    # Save + Close
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]", timeout=time_out,
-                                highlight_fn=highlight, message="Monitor resource saved", sleep_after=time_sleep)
-                    wait_and_click(driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[1]", timeout=time_out,
-                                highlight_fn=highlight, message="Monitor resource dialog closed", sleep_after=time_sleep)
-
-                # ----------------------------------------------
-                # STEP 6: STUDENT RESOURCE WORKFLOW
-                # ----------------------------------------------
-                if upload_student:
-
-                    log("⏳ Inserting STUDENT URL...")
-
-                    if should_stop():
-                        log("🛑 Stop requested — stopping.")
-                        return logs
-
-                    if True: #to group the lines of code
-                        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(time_sleep)
-                    
-                    # 9) Add a Resource
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[3]/div[1]/a", timeout=time_out, highlight_fn=highlight,
-                        message="Add a Resource link clicked", sleep_after=time_sleep)
-                    # 10) 'Link' Resource checkbox
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div/label[6]", timeout=time_out, highlight_fn=highlight,
-                        message="Link checkbox selected", sleep_after=time_sleep)
-
-                    # 11) Next Step
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Next Step Button clicked", sleep_after=time_sleep
-                    )
-
-                    # 12) Required
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[2]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Optional selected", sleep_after=time_sleep
-                    )
+                        run.status = STOPPED
+                        return finish(completed=False, stopped=True)
 
-                    # 13) No Timeframe
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/label[4]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ No Timeframe link clicked", sleep_after=time_sleep
+                    limiter.wait()
+                    log(
+                        f"[{idx+1}/{total}] Processing {lesson['lesson_title']} · {limiter.describe()}",
+                        item=lesson["lesson_title"], step="upload",
                     )
 
-                    # 14) Next Step
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Next step (to Hide)", sleep_after=time_sleep
-                    )
+                    with run.item(lesson["lesson_title"], step="upload") as outcome:
+                        try:
+                            result = _upload_lesson(
+                                supervisor, lesson, upload_student, upload_monitor, log, should_stop, limiter,
+                            )
+                        except Exception as e:
+                            log(f"❌ Failed lesson {idx+1}: {e}", "error", item=lesson["lesson_title"], step="upload")
+                            outcome.fail(str(e))
+                            result = _lesson_error(lesson, e)
 
-                    # 15) No, this resource is accessible any time
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/label[1]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ No, this resource is accessible any time selected", sleep_after=time_sleep
-                    )
-
-                    # 16) Hide this resource from learners
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/label[1]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Allow learners to view this resource selected", sleep_after=time_sleep
-                    )
-
-                    # 17) Published
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[4]/label[1]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Published selected", sleep_after=time_sleep
-                    )
-
-                    # 18) Next Step
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Final Next Step clicked", sleep_after=time_sleep
-                    )
-
-                    # 18.5) No, the proxy isn’t required to be enabled
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[1]/div/label[1]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ No, the proxy isnt required to be enabled selected", sleep_after=time_sleep
-                    )
+                        if result is None:
+                            outcome.skip("stopped")
 
-                    print("⏳ Inserting LAMS title & URL now ⏳")
-                    log("⏳ Inserting LAMS title & URL now ⏳")
+                    if result is None:
+                        run.status = STOPPED
+                        return finish(completed=False, stopped=True)
 
-                    if should_stop():
-                        log("🛑 Stop requested — stopping.")
-                        return logs
-
-                    # 19) Enter Student URL
-                    time.sleep(0.5)
-                    el = WebDriverWait(driver, time_sleep).until(
-                        EC.visibility_of_element_located((By.XPATH,
-                            "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[2]/div/input"
-                        ))
-                    )
-                    highlight(el)
-                    el.clear()
-                    el.send_keys(lams_student_url)
-                    print("✅ Monitor URL entered")
-                    log("✅ Monitor URL entered")
-                    time.sleep(time_sleep)
-
-                    # 20) Enter Lesson Title
-                    el = WebDriverWait(driver, time_sleep).until(
-                        EC.visibility_of_element_located((By.XPATH,
-                            "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[2]/form/div[2]/div[3]/div/input"
-                        ))
-                    )
-                    highlight(el)
-                    el.clear()
-                    el.send_keys(lams_student_title)
-                    print("✅ Title entered")
-                    time.sleep(time_sleep)
-
-                    # 21) Scroll the message box to the bottom
-                    modal = WebDriverWait(driver, time_out).until(
-                        EC.presence_of_element_located((By.ID, "event-resource-modal"))
-                    )
-                    highlight(modal)
-                    driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", modal)
-                    print("✅ Modal scrolled to bottom")
-                    log("✅ Modal scrolled to bottom")
-                    time.sleep(time_sleep)
-                    time.sleep(0.5)
-
-                    # 22) Enter Description
-                    time.sleep(0.5)
-                    iframe = driver.find_element(
-                        By.CSS_SELECTOR,
-                        "#cke_event-resource-link-description iframe.cke_wysiwyg_frame"
-                    )
-                    driver.switch_to.frame(iframe)
-                    print("✅ Switched to iframe")
-                    log("✅ Switched to iframe")
+                    results.append(result)
+                    progress_callback(idx + 1, total)
 
-                    editor_body = driver.find_element(
-                        By.CSS_SELECTOR,
-                        "body[contenteditable='true']"
-                    )
-                    highlight(editor_body)
+            finally:
+                if supervisor.driver is not None:
                     try:
-                        editor_body.clear()
+                        supervisor.quit()
+                        log("🧹 Selenium driver closed")
                     except Exception:
-                        editor_body.send_keys(Keys.COMMAND + "a", Keys.DELETE)
-
-                    editor_body.send_keys(lams_student_title)
-                    driver.switch_to.default_content()
-                    print("✅ Description added")
-                    log("✅ Description added")
-                    time.sleep(time_sleep)
-
-                    if should_stop():
-                        log("🛑 Stop requested — stopping.")
-                        return logs
-
-                    # 23) Save Resource
-                    time.sleep(0.5)
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[3]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Resource saved", sleep_after=time_sleep
-                    )
-
-                    # 24) Close
-                    time.sleep(0.5)
-                    wait_and_click(
-                        driver, "/html/body/div[1]/div/div[3]/div/div[7]/div[1]/div[6]/div/div/div/div[3]/button[1]",
-                        timeout=time_out, highlight_fn=highlight,
-                        message="✅ Closed attachment dialog", sleep_after=time_sleep
-                    )
-
-                    results.append({
-                        "lesson_title": lams_lesson_title,
-                        "lams_lesson_id": lams_lesson_id,
-                        "elentra_event_id": elentra_event_id,
-                        "status": "success",
-                    })
-                    progress_callback(idx + 1, total)
-                    # ----------------------------------------------
-                    # STEP 7: Final Summary
-                    # ----------------------------------------------
-                    log("🎉 Resource added successfully.")
-                    log(f"Elentra Event Name: {elentra_event_name}")
-                    log(f"LAMS Lesson ID: {lams_lesson_id}")
-
-                if upload_monitor:
-                    log(f"Monitor Title: {lams_monitor_title}")
-                    log(f"Monitor URL: {lams_monitor_url}")
-
-                if upload_student:
-                    log(f"Student Title: {lams_student_title}")
-                    log(f"Student URL: {lams_student_url}")
-
-            except Exception as e:
-                log(f"❌ Failed lesson {idx+1}: {e}", "error")
-                results.append({
-                    "lesson_title": lams_lesson_title,
-                    "lams_lesson_id": lams_lesson_id,
-                    "elentra_event_id": elentra_event_id,
-                    "status": f"error: {e}",
-                })
-                continue
-
-            progress_callback(idx + 1, total)
-
-    finally:
-        if driver is not None:
-            try:
-                driver.quit()
-                log("🧹 Selenium driver closed")
-            except Exception:
-                pass
-
-    elapsed = time.time() - start_time
-    log(f"⏱ Total elapsed time: {elapsed:.1f} seconds")
-
-    return {
-        "logs": logs,
-        "results": results,
-    }
+                        pass
 
+        elapsed = time.time() - start_time
+        log(f"⏱ Total elapsed time: {elapsed:.1f} seconds")
 
+        return finish()
@@ -2,9 +2,8 @@
 
 
 import re
-from typing import Dict, List, Union, IO, Callable
+from typing import Dict, List, Optional, Union, IO, Callable
 import time
-import random
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
@@ -12,7 +11,7 @@ from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -22,9 +21,6 @@ from selenium.common.exceptions import (
     StaleElementReferenceException,
 )
 
-
-import streamlit as st
-
 from .config import SeleniumConfig, get_config
 from .selenium_utils import (
     LogCallback,
@@ -40,6 +36,13 @@ from .selenium_utils import (
     time_out,
     click_text
 )
+from .session_supervisor import DriverSupervisor
+from .rate_limiter import AdaptiveRateLimiter
+from .user_query import EMAIL, plan_queries
+from .result_sink import CsvResultSink
+from .run_history import FAILED, STOPPED, RunHistory, open_run
+from .search_cache import SearchResultCache
+from .user_directory import RESOLVED, UserDirectory, resolve_locally
 
 # core/bulk_search_users.py
 
@@ -58,19 +61,30 @@ lams_url = r"https://ilams.lamsinternational.com/lams/admin/usersearch.do"
 
 TIMESLEEP = 1.5
 
+# === iLAMS user list paging (used by crawl_user_directory) ===
+# Not yet checked against the live admin page. The crawl never relies on
+# them blindly: a missing page-size or sort control fails the crawl, and
+# the snapshot is only marked fresh once the users read match the total
+# the list reports (USER_LIST_TOTAL_CSS, e.g. "1 - 100 of 5,321").
+USER_LIST_PAGE_SIZE_CSS = "select.pagesize"
+USER_LIST_NEXT_CSS = ".pager .next"
+USER_LIST_TOTAL_CSS = ".pager .total"
+USER_LIST_ID_HEADER_XPATH = "/html/body/div[1]/div/main/table/thead/tr/th[1]"
+
 def go_user_search_page(
     log_callback: Callable = lambda x: None,
     progress_callback: Callable = lambda c, t: None,
+    config: Optional[SeleniumConfig] = None,
 ) -> dict:
 
     logs = []
 
-    def log(msg: str, level: str = "info"):
-        entry = make_log_entry("iLAMS User Search", msg, level)
+    def log(msg: str, level: str = "info", **fields):
+        entry = make_log_entry("iLAMS User Search", msg, level, **fields)
         logs.append(entry)
         log_callback(entry)
 
-    config = get_config()
+    config = config or get_config()
 
     try:
         driver, wait = get_driver(config)
@@ -89,131 +103,456 @@ def go_user_search_page(
     return {"logs": logs}
 
 
-def run_user_search(
-    search_values: List[str],
+def _ensure_search_page(driver, wait, retries: int = 3) -> None:
+    for attempt in range(retries + 1):
+        try:
+            wait.until(EC.presence_of_element_located((By.XPATH, SEARCH_INPUT_XPATH)))
+            return
+        except TimeoutException:
+            if attempt < retries:
+                driver.get(lams_url)
+                time.sleep(1.5)
+                driver.get(lams_url)
+                time.sleep(1.5)
+            else:
+                raise
+
+
+def _read_result_table(driver) -> List[List[str]]:
+    return [
+        [c.text.strip() for c in row_el.find_elements(By.TAG_NAME, "td")]
+        for row_el in driver.find_elements(By.XPATH, RESULT_ROWS_XPATH)
+    ]
+
+
+def _open_full_user_list(driver, wait, log_fn: Callable[[str, str], None], newest_first: bool) -> None:
+    """
+    Empty search (lists every user), largest page size, optionally newest
+    IDs first. Raises if the page-size or sort control is missing, since
+    the crawl's paging depends on them.
+    """
+    driver.get(lams_url)
+    _ensure_search_page(driver, wait)
+
+    box = wait.until(EC.presence_of_element_located((By.XPATH, SEARCH_INPUT_XPATH)))
+    box.clear()
+    box.send_keys(Keys.RETURN)
+    time.sleep(TIMESLEEP)
+
+    select = Select(driver.find_element(By.CSS_SELECTOR, USER_LIST_PAGE_SIZE_CSS))
+    select.select_by_index(len(select.options) - 1)
+    time.sleep(TIMESLEEP)
+
+    if newest_first:
+        # twice: ascending, then descending (as in the course archive sort).
+        # An incremental crawl stops at the first page with no new user,
+        # which is only right when the list really is newest first.
+        for _ in range(2):
+            wait.until(EC.element_to_be_clickable((By.XPATH, USER_LIST_ID_HEADER_XPATH))).click()
+            time.sleep(0.5)
+
+
+def _user_list_total(driver) -> Optional[int]:
+    """The number of users the list reports ("1 - 100 of 5,321"), or None if it shows none."""
+    elements = driver.find_elements(By.CSS_SELECTOR, USER_LIST_TOTAL_CSS)
+    numbers = re.findall(r"\d[\d,]*", elements[0].text) if elements else []
+    return int(numbers[-1].replace(",", "")) if numbers else None
+
+
+def _next_user_list_page(driver, wait) -> bool:
+    """Click the pager's next button; False when there is no further page."""
+    buttons = driver.find_elements(By.CSS_SELECTOR, USER_LIST_NEXT_CSS)
+    if not buttons or "disabled" in (buttons[0].get_attribute("class") or ""):
+        return False
+
+    first_row = driver.find_elements(By.XPATH, RESULT_ROWS_XPATH)
+    buttons[0].click()
+    if first_row:
+        wait.until(EC.staleness_of(first_row[0]))
+    time.sleep(0.5)
+    return True
+
+
+def crawl_user_directory(
+    directory: UserDirectory,
+    incremental: bool = True,
     log_callback: Callable = lambda x: None,
-    progress_callback: Callable = lambda c, t: None,
     stop_flag: Callable[[], bool] = lambda: False,
+    max_pages: int = 2000,
+    config: Optional[SeleniumConfig] = None,
 ) -> Dict:
-
+    """
+    Snapshot the iLAMS admin user list into the local directory, page by
+    page, so names can later be resolved offline (see run_user_search).
+
+    A full crawl walks every page. An incremental crawl sorts newest user
+    IDs first and stops at the first page that adds no new user. Each page
+    is saved as soon as it is read, so an interrupted crawl keeps what it
+    got.
+
+    The snapshot is marked refreshed (and so trusted for "Acc Not Found")
+    only when the crawl reaches its end and is verified against the total
+    the list reports: a full crawl must have read that many distinct
+    users, an incremental one must leave the directory holding at least
+    that many. Otherwise complete is False and the snapshot keeps its old
+    refresh time.
+    """
     logs = []
 
-    def log(msg: str, level: str = "info"):
-        entry = make_log_entry("iLAMS User Search", msg, level)
+    def log(msg: str, level: str = "info", **fields):
+        entry = make_log_entry("iLAMS User Directory", msg, level, **fields)
         logs.append(entry)
         log_callback(entry)
 
-    config = get_config()
+    config = config or get_config()
+    supervisor = DriverSupervisor(config, driver_factory=get_driver, log=log)
 
     try:
-        driver, wait = get_driver(config)
+        supervisor.attach()
         log("Attached to Chrome via remote debugging.")
     except Exception as e:
         log(f"Failed to attach to Chrome: {e}", "error")
-        return {"dataframe": pd.DataFrame(), "logs": logs}
+        return {"logs": logs, "new_users": 0, "pages": 0, "complete": False}
 
-    def safe_text(xpath: str) -> str:
+    reopen = lambda driver, wait: _open_full_user_list(driver, wait, log, newest_first=incremental)
+    new_total = 0
+    pages = 0
+    seen_ids = set()
+    reached_end = False
+    completed = False
+
+    try:
+        supervisor.run_item(reopen)
+        total = supervisor.run_item(lambda driver, wait: _user_list_total(driver))
+
+        while pages < max_pages:
+            if stop_flag():
+                log("Stop requested by user. Snapshot keeps the pages read so far.", "warn")
+                break
+
+            rows = supervisor.run_item(lambda driver, wait: _read_result_table(driver), resume=reopen)
+            pages += 1
+            new = directory.upsert(rows)
+            new_total += new
+            seen_ids.update(r[0] for r in rows if r)
+            log(f"Page {pages}: {len(rows)} user(s), {new} new.")
+
+            if incremental and rows and new == 0:
+                log("No new users on this page.")
+                reached_end = True
+                break
+
+            if not supervisor.run_item(_next_user_list_page):
+                reached_end = True
+                break
+
+        if reached_end:
+            have = directory.count() if incremental else len(seen_ids)
+            if total is None:
+                log("The user list shows no total, so the crawl cannot be verified; "
+                    "the snapshot is not marked fresh.", "warn")
+            elif have < total:
+                log(f"Read {have} of the {total} users the list reports; "
+                    "the snapshot is not marked fresh.", "warn")
+            else:
+                log(f"Verified against the list's total of {total} users.")
+                completed = True
+
+    except Exception as e:
+        log(f"Directory crawl failed: {e}", "error")
+
+    finally:
         try:
-            return driver.find_element(By.XPATH, xpath).text.strip()
-        except (NoSuchElementException, StaleElementReferenceException):
-            return ""
+            supervisor.quit()
+        except Exception:
+            pass
+
+    if completed:
+        directory.mark_refreshed()
+    log(f"Directory now holds {directory.count()} user(s) ({new_total} new this crawl).")
+    return {"logs": logs, "new_users": new_total, "pages": pages, "complete": completed}
+
+
+def _search_ilams(driver, wait, search_term: str) -> List[List[str]]:
+    """
+    Run one search on the iLAMS User Search page and return the cell texts
+    of every result row (User ID, Login, First Name, Last Name, ...).
+    """
+    _ensure_search_page(driver, wait)
+
+    box = wait.until(EC.presence_of_element_located((By.XPATH, SEARCH_INPUT_XPATH)))
+    box.clear()
+    time.sleep(0.1)
+    box.send_keys(search_term)
+    box.send_keys(Keys.RETURN)
+    time.sleep(TIMESLEEP)
+
+    return _read_result_table(driver)
+
+
+def _exact_login_matches(matches: List[List[str]], term: str) -> List[List[str]]:
+    """
+    iLAMS searches by substring, so "atan@..." can also list "natan@...".
+    For an email/login query keep only rows whose login is that exact
+    value, if there are any.
+    """
+    exact = [m for m in matches if len(m) > 1 and m[1].strip().casefold() == term.casefold()]
+    return exact or matches
+
+
+def _match_status(matches: List[List[str]]) -> str:
+    if not matches:
+        return "Acc Not Found"
+    return "Acc >1" if len(matches) > 1 else "Exist"
+
+
+# Column order of the results table / streamed CSV
+RESULT_COLUMNS = ["Input", "Row #", "DL check account?", "User ID", "Login", "First Name", "Last Name"]
+
+
+def _error_row(original_input: str) -> Dict:
+    return {
+        "Input": original_input,
+        "Row #": "ERROR",
+        "DL check account?": "ERROR",
+        "User ID": "",
+        "Login": "",
+        "First Name": "",
+        "Last Name": "",
+    }
+
+
+def _rows_for_key(original_inputs: List[str], matches: Optional[List[List[str]]]) -> List[Dict]:
+    rows = []
+    for original in original_inputs:
+        if matches is None:
+            rows.append(_error_row(original))
+        else:
+            rows.extend(_result_rows(original, matches))
+    return rows
+
+
+def _result_rows(original_input: str, matches: List[List[str]]) -> List[Dict]:
+    # 🔹 CASE 1: No results found
+    if not matches:
+        return [{
+            "Input": original_input,
+            "Row #": "",                      # or 0 if you prefer numeric
+            "DL check account?": "Acc Not Found",
+            "User ID": "",
+            "Login": "",
+            "First Name": "",
+            "Last Name": "",
+        }]
+
+    # 🔹 CASE 2: One or more results
+    status = _match_status(matches)
+
+    return [
+        {
+            "Input": original_input,          # always original input
+            "Row #": idx_row,                 # 1, 2, 3, ...
+            "DL check account?": status,
+            "User ID": texts[0] if len(texts) > 0 else "",
+            "Login": texts[1] if len(texts) > 1 else "",
+            "First Name": texts[2] if len(texts) > 2 else "",
+            "Last Name": texts[3] if len(texts) > 3 else "",
+        }
+        for idx_row, texts in enumerate(matches, start=1)
+    ]
 
-    def ensure_page(retries: int = 3):
-        for attempt in range(retries + 1):
-            try:
-                wait.until(EC.presence_of_element_located((By.XPATH, SEARCH_INPUT_XPATH)))
-                return
-            except TimeoutException:
-                if attempt < retries:
-                    driver.get(lams_url)
-                    time.sleep(1.5)
-                    driver.get(lams_url)
-                    time.sleep(1.5)
-                else:
-                    raise
 
-    results = []
-    total = max(len(search_values), 1)
+def run_user_search(
+    search_values: List[str],
+    log_callback: Callable = lambda x: None,
+    progress_callback: Callable = lambda c, t: None,
+    stop_flag: Callable[[], bool] = lambda: False,
+    cache: Optional[SearchResultCache] = None,
+    force_refresh: bool = False,
+    directory: Optional[UserDirectory] = None,
+    directory_max_age_days: float = 1.0,
+    sink: Optional[CsvResultSink] = None,
+    history: Optional[RunHistory] = None,
+    config: Optional[SeleniumConfig] = None,
+) -> Dict:
+    """
+    Search iLAMS for each pasted name/email and return one block of result
+    rows per input line.
+
+    With a cache, fresh cached results are used without touching the
+    browser; only misses and stale entries are searched live (and then
+    stored). force_refresh searches everything live and refreshes the cache.
 
-    for idx, raw_input in enumerate(search_values, start=1):
+    Inputs are routed by kind (see core.user_query.classify_query). Emails
+    and logins take the exact path: a login lookup in the directory, and
+    live searches narrowed to the exact login. They run before the name
+    searches, so they finish first. A login that is not in the directory
+    is matched as a name instead of being answered "Acc Not Found".
 
-        # STOP checkpoint
-        if stop_flag():
-            log("Stop requested by user. Exiting safely.", "warn")
-            break
+    With a directory snapshot, remaining names are first matched against
+    its fuzzy index: confident matches are answered locally and only
+    borderline ones go to a live search. A local "Acc Not Found" is only
+    trusted while the snapshot is younger than directory_max_age_days.
 
+    With a sink, each input's rows are appended to it as soon as its search
+    is answered, so a stopped or crashed run still leaves a usable file.
+    The returned dataframe is in paste order.
 
-        progress_callback(idx, total)
+    With a history store, every unique search is recorded with the step
+    that answered it (cache, directory, live) and its duration.
 
-        original_input = raw_input.strip()
-        if not original_input:
-            continue
+    config is the caller's SeleniumConfig snapshot (default: get_config()).
+    """
 
-        # If name contains brackets, strip (Private), (TTSH), etc.
-        search_term = re.sub(r"\s*\(.*?\)", "", original_input)
+    logs = []
 
-        try:
-            ensure_page()
-
-            box = wait.until(EC.presence_of_element_located((By.XPATH, SEARCH_INPUT_XPATH)))
-            box.clear()
-            time.sleep(0.1)
-            box.send_keys(search_term)
-            box.send_keys(Keys.RETURN)
-            time.sleep(TIMESLEEP)
-
-            rows = driver.find_elements(By.XPATH, RESULT_ROWS_XPATH)
-
-            # 🔹 CASE 1: No results found
-            if not rows:
-                results.append({
-                    "Input": original_input,
-                    "Row #": "",                      # or 0 if you prefer numeric
-                    "DL check account?": "Acc Not Found",
-                    "User ID": "",
-                    "Login": "",
-                    "First Name": "",
-                    "Last Name": "",
-                })
-
-                log(f"[{idx}/{total}] {original_input} → Acc Not Found")
-                continue   # 🔴 IMPORTANT: skip row parsing below
-
-            # 🔹 CASE 2: One or more results
-            status = "Acc >1" if len(rows) > 1 else "Exist"
-
-            for idx_row, row_el in enumerate(rows, start=1):
-                cols = row_el.find_elements(By.TAG_NAME, "td")
-                texts = [c.text.strip() for c in cols]
-
-                results.append({
-                    "Input": original_input,          # always original input
-                    "Row #": idx_row,                 # 1, 2, 3, ...
-                    "DL check account?": status,
-                    "User ID": texts[0] if len(texts) > 0 else "",
-                    "Login": texts[1] if len(texts) > 1 else "",
-                    "First Name": texts[2] if len(texts) > 2 else "",
-                    "Last Name": texts[3] if len(texts) > 3 else "",
-                })
-
-            log(f"[{idx}/{total}] {original_input} → {status}")
-
-
-        except Exception as e:
-            log(f"[{idx}/{total}] Error processing '{original_input}': {e}", "error")
-            results.append({
-                "Input": original_input,
-                "DL check account?": "ERROR",
-                "User ID": "",
-                "Login": "",
-                "First Name": "",
-                "Last Name": "",
-                "Row": "ERROR",
-            })
-
-        time.sleep(random.uniform(1, 2))
-
-    df = pd.DataFrame(results)
-    log("User search completed successfully.")
-    return {"dataframe": df, "logs": logs}
+    def log(msg: str, level: str = "info", **fields):
+        entry = make_log_entry("iLAMS User Search", msg, level, **fields)
+        logs.append(entry)
+        log_callback(entry)
 
+    config = config or get_config()
+    supervisor = DriverSupervisor(config, driver_factory=get_driver, log=log)
+    limiter = AdaptiveRateLimiter(log=log)
+
+    run = open_run(
+        history,
+        "user_search",
+        {
+            "inputs": len(search_values),
+            "cache": cache is not None,
+            "force_refresh": force_refresh,
+            "directory": directory is not None,
+        },
+        profile=config.debugger_address,
+    )
+
+    with run:
+        # One search per unique normalised key; duplicates share its rows.
+        plan = plan_queries(search_values)
+        log(
+            f"{len(plan.inputs)} input(s) → {len(plan.unique_keys)} unique search(es) "
+            f"({plan.hit_rate:.0%} dedupe hit-rate)."
+        )
+
+        log(
+            f"Routing: {len(plan.exact_keys)} exact email/login lookup(s) first, "
+            f"{len(plan.name_keys)} name search(es)."
+        )
+
+        # key -> parsed result rows, or None if the search errored
+        matches_by_key: Dict[str, Optional[List[List[str]]]] = {}
+        keys = plan.routed_keys
+
+        inputs_by_key: Dict[str, List[str]] = {}
+        for original, key in zip(plan.inputs, plan.keys):
+            inputs_by_key.setdefault(key, []).append(original)
+
+        def answer(key: str, matches: Optional[List[List[str]]], step: str = "") -> None:
+            matches_by_key[key] = matches
+            if step:    # answered without a live search
+                run.record(plan.terms[key], step=step)
+            if sink is not None:
+                sink.write_many(_rows_for_key(inputs_by_key[key], matches))
+
+        if cache is not None and not force_refresh:
+            for key in keys:
+                cached = cache.get(key)
+                if cached is not None:
+                    answer(key, cached, step="cache")
+            keys = [k for k in keys if k not in matches_by_key]
+            log(
+                f"Cache: {len(matches_by_key)} hit(s), {len(keys)} to search live "
+                f"(TTL {cache.ttl_seconds / 86400:g} day(s))."
+            )
+
+        if directory is not None and keys:
+            index = directory.fuzzy_index()
+            trust_not_found = directory.is_fresh(directory_max_age_days * 86400)
+            for key in keys:
+                if plan.is_exact(key):
+                    rows = directory.lookup_login(plan.terms[key])
+                    if rows:
+                        answer(key, rows, step="directory_exact")
+                        continue
+                    if plan.kinds[key] == EMAIL:
+                        if trust_not_found:
+                            answer(key, rows, step="directory_exact")
+                        continue
+                    # A login-shaped word can still be someone's name, so a
+                    # login miss goes on to the name match.
+                decision, rows = resolve_locally(
+                    index, plan.terms[key], trust_not_found=trust_not_found,
+                )
+                if decision == RESOLVED:
+                    answer(key, rows, step="directory_fuzzy")
+            resolved = [k for k in keys if k in matches_by_key]
+            keys = [k for k in keys if k not in matches_by_key]
+            log(
+                f"Directory ({len(index)} users): {len(resolved)} resolved locally, "
+                f"{len(keys)} to confirm live."
+            )
+
+        if keys:
+            try:
+                supervisor.attach()
+                log("Attached to Chrome via remote debugging.")
+            except Exception as e:
+                log(f"Failed to attach to Chrome: {e}", "error")
+                run.status = FAILED
+                return {"dataframe": pd.DataFrame(), "logs": logs}
+
+        total = max(len(keys), 1)
+
+        for idx, key in enumerate(keys, start=1):
+
+            # STOP checkpoint
+            if stop_flag():
+                log("Stop requested by user. Exiting safely.", "warn")
+                run.status = STOPPED
+                break
+
+
+            progress_callback(idx, total)
+
+            search_term = plan.terms[key]
+            exact = plan.is_exact(key)
+            step = "exact_search" if exact else "name_search"
+            n_inputs = plan.counts[key]
+            shared = f" (×{n_inputs} inputs)" if n_inputs > 1 else ""
+
+            try:
+                limiter.wait()
+                with run.item(search_term, step=step), limiter.track():
+                    # A dead browser is re-attached and the search retried on a
+                    # fresh User Search page instead of failing every later item.
+                    matches = supervisor.run_item(
+                        lambda driver, wait: _search_ilams(driver, wait, search_term),
+                        resume=lams_url,
+                    )
+                if exact:
+                    matches = _exact_login_matches(matches, search_term)
+                answer(key, matches)
+                if cache is not None:
+                    cache.put(key, matches)
+
+                log(
+                    f"[{idx}/{total}] {search_term} → {_match_status(matches)}"
+                    f"{shared} · {limiter.describe()}",
+                    item=search_term, step=step, duration=round(limiter.last_latency, 2),
+                )
+
+            except Exception as e:
+                log(f"[{idx}/{total}] Error processing '{search_term}': {e}", "error", item=search_term, step=step)
+                answer(key, None)
+
+        # Fan each search's rows back out to every input that shares its key,
+        # in the original paste order.
+        results = []
+        for original, key in zip(plan.inputs, plan.keys):
+            if key in matches_by_key:
+                results.extend(_rows_for_key([original], matches_by_key[key]))
+
+        df = pd.DataFrame(results, columns=RESULT_COLUMNS) if results else pd.DataFrame()
+        log("User search completed successfully.")
+        return {"dataframe": df, "logs": logs}
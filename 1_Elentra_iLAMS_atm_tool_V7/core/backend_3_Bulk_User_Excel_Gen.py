@@ -1,13 +1,21 @@
+from concurrent.futures import Executor
 from dataclasses import dataclass
 from datetime import datetime
-import xlwt
-from io import BytesIO
 from pathlib import Path
-from typing import List, Callable, Dict, Tuple
-import zipfile
+from typing import List, Callable, Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
-import re
 
+from .run_history import RunHistory, RunRecorder, open_run
+from .package_cache import PackageCache, package_key
+from .package_manifest import (
+    MANIFEST_NAME, ManifestSource, RosterDelta, build_manifest, load_manifest, manifest_bytes,
+)
+from .package_zip import PackageZip, ZipHandle
+from .roster import ERROR as ROSTER_ERROR, validate_roster
+from .run_log import make_log_entry
+from .workbook_pool import OutputPlan, render_into
+from .xls_writer import frame_to_xls
 
 
 # -----------------------------
@@ -25,7 +33,8 @@ ROLES_COLUMNS = [
     "* login", "* organisation", "* roles", "* add_to_lessons",
 ]
 
-EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Roster problems logged one by one; the rest are in GeneratedPackage.roster.
+MAX_ROSTER_LOG_LINES = 50
 
 # -----------------------------
 # Types
@@ -36,31 +45,25 @@ ProgressCallback = Callable[[int, int], None]
 
 @dataclass
 class GeneratedPackage:
-    zip_bytes: bytes
+    zip_file: ZipHandle
     zip_filename: str
     audit_df: pd.DataFrame
     logs: List[Dict]
+    # Input lines that were left out or have warnings (core.roster report rows).
+    roster: Optional[pd.DataFrame] = None
+
+    @property
+    def zip_bytes(self) -> bytes:
+        """The whole ZIP in memory; prefer zip_file.save() / zip_file.read."""
+        return self.zip_file.read()
 
 # -----------------------------
 # Utilities
 # -----------------------------
 
 def dataframe_to_xls(df) -> bytes:
-    wb = xlwt.Workbook()
-    ws = wb.add_sheet("Sheet1")
-
-    # headers
-    for col_idx, col in enumerate(df.columns):
-        ws.write(0, col_idx, col)
-
-    # rows
-    for row_idx, row in enumerate(df.itertuples(index=False), start=1):
-        for col_idx, value in enumerate(row):
-            ws.write(row_idx, col_idx, value)
-
-    bio = BytesIO() 
-    wb.save(bio)
-    return bio.getvalue()
+    """df as a one-sheet .xls: header row, then one row per record."""
+    return frame_to_xls(df)
 
 def _username_from_email(email: str) -> str:
     # strip domain; works for @ntu.edu.sg and @e.ntu.edu.sg
@@ -71,96 +74,195 @@ def _safe_name(s: str) -> str:
     return "".join(c for c in s.strip() if c not in r'\/:*?"<>|')
 
 
-def _log(logs, cb, msg, level="INFO"):
-    entry = {
-        "timestamp": datetime.now().isoformat(timespec="seconds"),
-        "level": level,
-        "message": msg,
-    }
+def _log(logs, cb, msg, level="INFO", **fields):
+    entry = make_log_entry("BulkExcelGen", msg, level, **fields)
     logs.append(entry)
     if cb:
         cb(entry)
 
 
-def _validate_email(email: str, mode: str) -> Tuple[bool, str]:
-    if not email:
-        return False, "Email is empty"
-    if not EMAIL_REGEX.match(email):
-        return False, "Invalid email format"
-    mode = mode.lower()
-    if mode == "staff" and not email.endswith("@ntu.edu.sg"):
-        return False, "Staff email must end with @ntu.edu.sg"
-    if mode == "student" and not email.endswith("@e.ntu.edu.sg"):
-        return False, "Student email must end with @e.ntu.edu.sg"
-    return True, ""
+def _check_roster(emails: List[str], full_names: List[str], mode: str, new_users: bool, logs, cb) -> Tuple[List[str], List[str], pd.DataFrame]:
+    """
+    The valid emails, their names (the names as given unless there is
+    one per email) and the report rows of the lines with problems. Names
+    are only checked when new-users workbooks (the only ones with names)
+    are generated.
+    """
+    report = validate_roster(emails, full_names, mode, check_names=new_users)
+    problems = report.problems
+    for row in problems.head(MAX_ROSTER_LOG_LINES).itertuples():
+        who = row.email or f"line {row.line}"
+        msg = f"Skipped {who}: {row.reason}" if row.status == ROSTER_ERROR else f"{who}: {row.reason}"
+        _log(logs, cb, msg, "WARN")
+    if len(problems) > MAX_ROSTER_LOG_LINES:
+        _log(logs, cb, f"{len(problems) - MAX_ROSTER_LOG_LINES} more roster problems not shown. {report.summary()}", "WARN")
+    names = report.names if report.aligned else list(full_names)
+    return report.emails, names, problems
 
 
 def _parse_lines(raw: str) -> List[str]:
     return [x.strip() for x in raw.splitlines() if x.strip()]
 
 
+# Columns every new user gets the same value in; the rest are blank.
+USER_DEFAULTS = {
+    "* password": "Nanyang!23",
+    "* last_name": ".",
+    "country": "Australia",
+}
+ADD_TO_LESSONS = "yes"
+
+
+# Everything besides the email/course slice that decides a sheet's cells;
+# part of each workbook's cache source.
+SHEET_CONSTANTS = {
+    "users": [USERS_COLUMNS, USER_DEFAULTS],
+    "roles": [ROLES_COLUMNS, ADD_TO_LESSONS],
+}
+
+
+def _source(sheet: str, *inputs) -> List:
+    """A workbook's cache source (see core.workbook_pool.WorkbookJob)."""
+    return [sheet, SHEET_CONSTANTS[sheet], *inputs]
+
+
 def _make_users_df(emails: List[str], full_names: List[str]) -> pd.DataFrame:
+    """USERS_COLUMNS frame, one row per email; constants are broadcast."""
     if len(emails) != len(full_names):
         raise ValueError("Number of names must match number of emails.")
 
-    rows = []
-    for email, name in zip(emails, full_names):
-        rows.append({
-            "login": email,
-            "password": "Nanyang!23",
-            "title": "",
-            "first_name": name,
-            "last_name": ".",
-            "authentication_method_id": "",
-            "email": email,
-            "theme_id": "",
-            "locale_id": "",
-            "address_1": "",
-            "address_2": "",
-            "address_3": "",
-            "city": "",
-            "state": "",
-            "postcode": "",
-            "country": "Australia",
-            "day_phone": "",
-            "evening_phone": "",
-            "mobile_phone": "",
-            "time_zone": "",
-        })
-
-    df = pd.DataFrame(rows)
-
-    df = df.rename(columns={
-        "login": "* login",
-        "password": "* password",
-        "first_name": "* first_name",
-        "last_name": "* last_name",
-        "email": "* email",
-    })
-
-    return df[USERS_COLUMNS]
-
-
-
-def _make_roles_df(rows: List[Dict]) -> pd.DataFrame:
-    df = pd.DataFrame(rows)
-
-    df = df.rename(columns={
-        "login": "* login",
-        "organisation": "* organisation",
-        "roles": "* roles",
-        "add_to_lessons": "* add_to_lessons",
-    })
-
-    return df[ROLES_COLUMNS]
-
-
-def _zip_files(files: Dict[str, bytes]) -> bytes:
-    buf = BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        for name, content in files.items():
-            zf.writestr(name, content)
-    return buf.getvalue()
+    columns = dict.fromkeys(USERS_COLUMNS, "")
+    columns.update(USER_DEFAULTS)
+    columns.update({"* login": emails, "* first_name": full_names, "* email": emails})
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(emails)), columns=USERS_COLUMNS)
+
+
+def _make_roles_df(emails: List[str], course_ids: List, roles: str, by: str = "email") -> pd.DataFrame:
+    """
+    ROLES_COLUMNS frame for every email x course ID pair. by="email" keeps
+    each user's courses together (rows i*len(course_ids) onwards belong to
+    emails[i]); by="course" keeps each course's users together.
+    """
+    logins = np.asarray(emails, dtype=object)
+    orgs = np.asarray(course_ids)
+    if by == "email":
+        logins, orgs = np.repeat(logins, len(orgs)), np.tile(orgs, len(logins))
+    else:
+        logins, orgs = np.tile(logins, len(orgs)), np.repeat(orgs, len(logins))
+
+    return pd.DataFrame({
+        "* login": logins,
+        "* organisation": orgs,
+        "* roles": roles,
+        "* add_to_lessons": ADD_TO_LESSONS,
+    }, index=pd.RangeIndex(len(logins)), columns=ROLES_COLUMNS)
+
+
+def plan_outputs(
+    mode: str,
+    n_users: int,
+    n_courses: int,
+    new_users: bool,
+    course_map: bool,
+    output: OutputPlan = OutputPlan(),
+) -> List[Dict]:
+    """
+    The workbooks a package will hold, predicted from its input sizes
+    before anything is built: one entry per kind of workbook with how many
+    files of it there are, its data rows and the parts each is split into.
+    """
+    if mode == "staff":
+        kinds = []
+        if new_users:
+            kinds += [("NewUsers (per user)", n_users, 1), ("NewUsers_Combi", 1, n_users)]
+        if course_map:
+            kinds += [("CourseMap (per user)", n_users, n_courses), ("CourseMap_Combi", 1, n_users * n_courses)]
+    else:
+        kinds = []
+        if new_users:
+            kinds.append(("NewUsers_Combined", 1, n_users))
+        if course_map:
+            kinds.append(("CourseMap_Combi (per course)", n_courses, n_users))
+
+    return [
+        {"workbook": name, "files": files, "rows": rows, "parts": output.parts(rows)}
+        for name, files, rows in kinds
+    ]
+
+
+def _file_count(plan: List[Dict]) -> int:
+    return sum(p["files"] * p["parts"] for p in plan)
+
+
+def _log_plan(logs, cb, plan: List[Dict], output: OutputPlan) -> None:
+    for planned in plan:
+        if planned["parts"] > 1:
+            _log(logs, cb,
+                 f"{planned['workbook']}: {planned['rows']:,} rows is over the {output.row_limit:,}-row "
+                 f".{output.fmt} limit; writing {planned['parts']} parts.")
+
+
+def _outputs(output: OutputPlan, fname: str, item: str, step: str, df: pd.DataFrame, audit_rows: List[Dict], source=None):
+    """The jobs for one workbook (split per output), with their audit rows."""
+    for job in output.jobs(fname, item, step, df, source):
+        yield job
+        audit_rows.append({"file": job.fname, "rows": job.rows, "part": job.part, "parts": job.parts})
+
+
+def _cached_package(cache, key, package, run, logs, cb, progress_callback=None) -> Optional[GeneratedPackage]:
+    """The package stored under key, if any (the unused spool is dropped)."""
+    hit = cache.get_package(key) if cache is not None else None
+    if hit is None:
+        return None
+    handle, meta = hit
+    package.discard()
+    run.record("package", step="cache_hit")
+    _log(logs, cb, "Same inputs as an earlier package today; reusing it from the cache.")
+    if progress_callback:
+        files = len(meta["audit"])
+        progress_callback(files, files)
+    return GeneratedPackage(
+        zip_file=handle,
+        zip_filename=meta["zip_filename"],
+        audit_df=pd.DataFrame(meta["audit"]),
+        logs=logs,
+    )
+
+
+def _log_delta(logs, cb, delta: RosterDelta) -> None:
+    _log(logs, cb,
+         f"Delta against the package of {delta.base or 'unknown date'}: "
+         f"{len(delta.added_users)} new users, {len(delta.added_courses)} new courses"
+         + ("; roles changed, so every course-map row is included." if delta.roles_changed else "."))
+    if delta.full_outputs:
+        _log(logs, cb,
+             f"The previous package had no {' / '.join(delta.full_outputs)} workbooks; "
+             "they are written in full.")
+    if delta.empty:
+        _log(logs, cb, "Nothing new since the previous package; only the manifest is written.")
+    if delta.removed_users or delta.removed_courses:
+        _log(logs, cb,
+             "No longer in the roster (iLAMS imports do not remove them; do it by hand): "
+             f"users {', '.join(delta.removed_users) or '-'}; courses {', '.join(delta.removed_courses) or '-'}.",
+             "WARN")
+
+
+def _add_manifest(package: PackageZip, parent: str, manifest: Dict, audit_rows: List[Dict]) -> None:
+    fname = f"{parent}/{MANIFEST_NAME}"
+    package.add(fname, manifest_bytes(manifest))
+    audit_rows.append({"file": fname, "rows": len(manifest["users"]), "part": 1, "parts": 1})
+
+
+def _finished_package(package, zip_name, audit_rows, logs, cache, key) -> GeneratedPackage:
+    handle = package.finish()
+    if cache is not None:
+        cache.put_package(key, handle, {"zip_filename": zip_name, "audit": audit_rows})
+    return GeneratedPackage(
+        zip_file=handle,
+        zip_filename=zip_name,
+        audit_df=pd.DataFrame(audit_rows),
+        logs=logs,
+    )
 
 
 # -----------------------------
@@ -175,6 +277,63 @@ def generate_staff_package(
     generate_new_users: bool,
     generate_course_map: bool,
     log_callback: LogCallback = None,
+    history: Optional[RunHistory] = None,
+    workers: Optional[int] = None,
+    output_format: str = "xls",
+    max_rows: Optional[int] = None,
+    cache: Optional[PackageCache] = None,
+    previous: Optional[ManifestSource] = None,
+    executor: Optional[Executor] = None,
+    progress_callback: ProgressCallback = None,
+) -> GeneratedPackage:
+    """
+    workers: processes that render the workbooks (None: one per CPU,
+    1: render serially in this process). The ZIP is the same either way.
+    output_format: "xls", "xlsx" or "csv". A workbook with more than
+    max_rows data rows (default: the format's limit) is written as
+    numbered parts.
+    cache: reuse packages and workbooks generated before with the same
+    (normalised) inputs; see core.package_cache.
+    previous: an earlier package ZIP or its manifest.json; only the rows
+    that are new since then are written (see core.package_manifest).
+    executor: a process pool shared with other packages (see
+    core.workbook_pool.shared_executor); workers should be its size.
+    progress_callback(files_written, files_expected) after every file.
+    """
+    output = OutputPlan(output_format, max_rows)
+    previous = load_manifest(previous) if previous is not None else None
+    params = {
+        "department": department_name,
+        "emails": len(_parse_lines(raw_emails)),
+        "course_ids": len(_parse_lines(raw_course_ids)),
+        "roles": selected_roles,
+        "new_users": generate_new_users,
+        "course_map": generate_course_map,
+    }
+    with open_run(history, "staff_package", params) as run, PackageZip() as package:
+        return _build_staff_package(
+            department_name, full_names, raw_emails, raw_course_ids, selected_roles,
+            generate_new_users, generate_course_map, log_callback, run, package, workers, output, cache, previous, executor, progress_callback,
+        )
+
+
+def _build_staff_package(
+    department_name: str,
+    full_names: List[str],
+    raw_emails: str,
+    raw_course_ids: str,
+    selected_roles: List[str],
+    generate_new_users: bool,
+    generate_course_map: bool,
+    log_callback: LogCallback,
+    run: RunRecorder,
+    package: PackageZip,
+    workers: Optional[int],
+    output: OutputPlan,
+    cache: Optional[PackageCache],
+    previous: Optional[Dict],
+    executor: Optional[Executor],
+    progress_callback: ProgressCallback,
 ) -> GeneratedPackage:
 
     logs = []
@@ -183,118 +342,106 @@ def generate_staff_package(
     emails = _parse_lines(raw_emails)
     course_ids = _parse_lines(raw_course_ids)
 
-    valid_emails = []
-    for e in emails:
-        ok, reason = _validate_email(e, "staff")
-        if ok:
-            valid_emails.append(e)
-        else:
-            _log(logs, log_callback, f"Skipped {e}: {reason}", "WARN")
+    valid_emails, full_names, roster = _check_roster(emails, full_names, "staff", generate_new_users, logs, log_callback)
 
-    files = {}
     ymd = datetime.now().strftime("%Y%m%d")
 
     dept = _safe_name(department_name)
     n_users = len(valid_emails)
     parent = f"StaffCEs_{dept}_{ymd}_{n_users:03d}users"
 
-    if generate_new_users:
-
-        if len(full_names) != len(valid_emails):
-            raise ValueError("Number of names must match number of emails.")
-
-        combined_rows = []
-        # ----- Combined New Users -----
-        df_combined = _make_users_df(valid_emails, full_names)
-
-        for email, name in zip(valid_emails, full_names):
-            # ----- Individual -----
-            df_one = _make_users_df([email], [name])
-            xls_bytes = dataframe_to_xls(df_one)
-
-            username = _username_from_email(email)
-            fname = f"{parent}/2_NewUsersList/NewUsers_{dept}_{username}_{ymd}.xls"
-            files[fname] = xls_bytes
-            audit_rows.append({"file": fname, "rows": len(df_combined)})
-
-            # collect for combined
-            combined_rows.append({
-                "login": email,
-                "password": "Nanyang!23",
-                "title": "",
-                "first_name": name,
-                "last_name": ".",
-                "authentication_method_id": "",
-                "email": email,
-                "theme_id": "",
-                "locale_id": "",
-                "address_1": "",
-                "address_2": "",
-                "address_3": "",
-                "city": "",
-                "state": "",
-                "postcode": "",
-                "country": "Australia",
-                "day_phone": "",
-                "evening_phone": "",
-                "mobile_phone": "",
-                "time_zone": "",
-            })
-
-        xls_bytes = dataframe_to_xls(df_combined)
-        fname = f"{parent}/1_Combined/NewUsers_Combi_{dept}_{ymd}_{n_users:03d}users.xls"
-        files[fname] = xls_bytes
-        audit_rows.append({"file": fname, "rows": len(df_combined)})
-
-
-    # Course map 
-    if generate_course_map:
-
-        roles_str = "|".join(selected_roles)
-        all_role_rows = []
-
-        for email in valid_emails:
-            username = _username_from_email(email)
-            user_rows = []
-
-            for cid in course_ids:
-                row = {
-                    "login": email,
-                    "organisation": cid,
-                    "roles": roles_str,
-                    "add_to_lessons": "yes",
-                }
-                user_rows.append(row)
-                all_role_rows.append(row)
-
-            # ----- Individual per-user Excel -----
-            df_user = _make_roles_df(user_rows)
-            xls_bytes = dataframe_to_xls(df_user)
-
-            fname = f"{parent}/3_CourseMapStaff/CourseMap_{dept}_{username}_{ymd}.xls"
-            files[fname] = xls_bytes
-            audit_rows.append({"file": fname, "rows": len(df_user)})
-        
-            # ----- Combined Excel (after loop) -----
-        df_roles = _make_roles_df(all_role_rows)
-        xls_bytes = dataframe_to_xls(df_roles)
-
-        fname = f"{parent}/1_Combined/CourseMap_Combi_{dept}_{ymd}_{n_users:03d}users.xls"
-        files[fname] = xls_bytes
-        audit_rows.append({"file": fname, "rows": len(df_roles)})
+    if generate_new_users and len(full_names) != len(valid_emails):
+        raise ValueError("Number of names must match number of emails.")
 
+    outputs = {"new_users": generate_new_users, "course_map": generate_course_map}
+    delta = None
+    if previous is not None:
+        delta = RosterDelta.between(previous, "staff", valid_emails, course_ids, selected_roles, outputs)
+        _log_delta(logs, log_callback, delta)
+        parent += "_delta"
+
+    plan = plan_outputs("staff", n_users, len(course_ids), generate_new_users, generate_course_map, output)
+    _log_plan(logs, log_callback, plan, output)
+
+    key = package_key(
+        "staff", dept, valid_emails, full_names if generate_new_users else [], course_ids, selected_roles,
+        {"new_users": generate_new_users, "course_map": generate_course_map,
+         "format": output.fmt, "max_rows": output.max_rows,
+         "delta": delta.to_dict() if delta else None},
+        ymd,
+    )
+    cached = _cached_package(cache, key, package, run, logs, log_callback, progress_callback)
+    if cached is not None:
+        cached.roster = roster
+        return cached
+
+    # The delta decides which rows of a slice are kept.
+    delta_key = delta.to_dict() if delta else None
+
+    def workbooks():
+        if generate_new_users:
+            # ----- Combined New Users -----
+            df_combined = _make_users_df(valid_emails, full_names)
+            if delta is not None:
+                df_combined = df_combined[delta.new_users(valid_emails)].reset_index(drop=True)
+
+            for i, (email, name) in enumerate(zip(df_combined["* email"], df_combined["* first_name"])):
+                # ----- Individual (a one-row slice of the combined frame) -----
+                df_one = df_combined.iloc[i:i + 1]
+
+                username = _username_from_email(email)
+                fname = f"{parent}/2_NewUsersList/NewUsers_{dept}_{username}_{ymd}.xls"
+                yield from _outputs(output, fname, email, "new_users", df_one, audit_rows,
+                                    _source("users", [email], [name]))
+
+            if delta is None or len(df_combined):
+                fname = f"{parent}/1_Combined/NewUsers_Combi_{dept}_{ymd}_{len(df_combined):03d}users.xls"
+                yield from _outputs(output, fname, "combined", "new_users_combined", df_combined, audit_rows,
+                                    _source("users", valid_emails, full_names, delta_key))
+
+
+        # Course map 
+        if generate_course_map:
+
+            # ----- Combined: every user x course, grouped by user -----
+            roles = "|".join(selected_roles)
+            df_roles = _make_roles_df(valid_emails, course_ids, roles, by="email")
+            k = len(course_ids)
+            new = None
+            if delta is not None:
+                new = delta.new_rows(df_roles["* login"], df_roles["* organisation"])
+
+            for i, email in enumerate(valid_emails):
+                username = _username_from_email(email)
+
+                # ----- Individual per-user Excel -----
+                df_user = df_roles.iloc[i * k:(i + 1) * k]
+                if new is not None:
+                    df_user = df_user[new[i * k:(i + 1) * k]]
+                    if df_user.empty:
+                        continue
+
+                fname = f"{parent}/3_CourseMapStaff/CourseMap_{dept}_{username}_{ymd}.xls"
+                yield from _outputs(output, fname, email, "course_map", df_user, audit_rows,
+                                    _source("roles", [email], course_ids, roles, "email", delta_key))
+
+            if new is not None:
+                df_roles = df_roles[new]
+            if delta is None or len(df_roles):
+                fname = f"{parent}/1_Combined/CourseMap_Combi_{dept}_{ymd}_{n_users:03d}users.xls"
+                yield from _outputs(output, fname, "combined", "course_map_combined", df_roles, audit_rows,
+                                    _source("roles", valid_emails, course_ids, roles, "email", delta_key))
+
+    render_into(package, workbooks(), run, workers, cache, executor, progress_callback, _file_count(plan))
+    _add_manifest(package, parent, build_manifest(
+        "staff", dept, ymd, valid_emails, full_names if generate_new_users else [], course_ids, selected_roles, delta, outputs,
+    ), audit_rows)
 
     zip_name = f"{parent}.zip"
-    zip_bytes = _zip_files(files)
-
 
-
-    return GeneratedPackage(
-        zip_bytes=zip_bytes,
-        zip_filename=zip_name,
-        audit_df=pd.DataFrame(audit_rows),
-        logs=logs,
-    )
+    pkg = _finished_package(package, zip_name, audit_rows, logs, cache, key)
+    pkg.roster = roster
+    return pkg
 
 
 # -----------------------------
@@ -308,6 +455,61 @@ def generate_student_package(
     generate_y1_new_users: bool,
     generate_course_map: bool,
     log_callback: LogCallback = None,
+    history: Optional[RunHistory] = None,
+    workers: Optional[int] = None,
+    output_format: str = "xls",
+    max_rows: Optional[int] = None,
+    cache: Optional[PackageCache] = None,
+    previous: Optional[ManifestSource] = None,
+    executor: Optional[Executor] = None,
+    progress_callback: ProgressCallback = None,
+) -> GeneratedPackage:
+    """
+    workers: processes that render the workbooks (None: one per CPU,
+    1: render serially in this process). The ZIP is the same either way.
+    output_format: "xls", "xlsx" or "csv". A workbook with more than
+    max_rows data rows (default: the format's limit) is written as
+    numbered parts.
+    cache: reuse packages and workbooks generated before with the same
+    (normalised) inputs; see core.package_cache.
+    previous: an earlier package ZIP or its manifest.json; only the rows
+    that are new since then are written (see core.package_manifest).
+    executor: a process pool shared with other packages (see
+    core.workbook_pool.shared_executor); workers should be its size.
+    progress_callback(files_written, files_expected) after every file.
+    """
+    output = OutputPlan(output_format, max_rows)
+    previous = load_manifest(previous) if previous is not None else None
+    params = {
+        "cohort": cohort_name,
+        "emails": len(_parse_lines(raw_emails)),
+        "course_ids": len(_parse_lines(raw_course_ids)),
+        "new_users": generate_y1_new_users,
+        "course_map": generate_course_map,
+    }
+    with open_run(history, "student_package", params) as run, PackageZip() as package:
+        return _build_student_package(
+            cohort_name, full_names, raw_emails, raw_course_ids,
+            generate_y1_new_users, generate_course_map, log_callback, run, package, workers, output, cache, previous, executor, progress_callback,
+        )
+
+
+def _build_student_package(
+    cohort_name: str,
+    full_names: List[str],
+    raw_emails: str,
+    raw_course_ids: str,
+    generate_y1_new_users: bool,
+    generate_course_map: bool,
+    log_callback: LogCallback,
+    run: RunRecorder,
+    package: PackageZip,
+    workers: Optional[int],
+    output: OutputPlan,
+    cache: Optional[PackageCache],
+    previous: Optional[Dict],
+    executor: Optional[Executor],
+    progress_callback: ProgressCallback,
 ) -> GeneratedPackage:
 
     logs = []
@@ -330,15 +532,8 @@ def generate_student_package(
         )
 
 
-    valid_emails = []
-    for e in emails:
-        ok, reason = _validate_email(e, "student")
-        if ok:
-            valid_emails.append(e)
-        else:
-            _log(logs, log_callback, f"Skipped {e}: {reason}", "WARN")
+    valid_emails, full_names, roster = _check_roster(emails, full_names, "student", generate_y1_new_users, logs, log_callback)
 
-    files = {}
     ymd = datetime.now().strftime("%Y%m%d")
 
     cohort = _safe_name(cohort_name)
@@ -346,53 +541,78 @@ def generate_student_package(
     n_students = len(valid_emails)
     parent = f"Student_{cohort}_{ymd}_{n_courses}courses"
 
-    if generate_y1_new_users:
-        n_students = len(valid_emails)
-        students_tag = f"{n_students:03d}students"
+    outputs = {"new_users": generate_y1_new_users, "course_map": generate_course_map}
+    delta = None
+    if previous is not None:
+        delta = RosterDelta.between(previous, "student", valid_emails, course_ids, ["learner"], outputs)
+        _log_delta(logs, log_callback, delta)
+        parent += "_delta"
+
+    plan = plan_outputs("student", n_students, n_courses, generate_y1_new_users, generate_course_map, output)
+    _log_plan(logs, log_callback, plan, output)
+
+    key = package_key(
+        "student", cohort, valid_emails, full_names if generate_y1_new_users else [], course_ids, [],
+        {"new_users": generate_y1_new_users, "course_map": generate_course_map,
+         "format": output.fmt, "max_rows": output.max_rows,
+         "delta": delta.to_dict() if delta else None},
+        ymd,
+    )
+    cached = _cached_package(cache if valid_emails else None, key, package, run, logs, log_callback, progress_callback)
+    if cached is not None:
+        cached.roster = roster
+        return cached
+
+    # The delta decides which rows of a slice are kept.
+    delta_key = delta.to_dict() if delta else None
 
-        df_users = _make_users_df(valid_emails, full_names)
-        xls_bytes = dataframe_to_xls(df_users)
+    def workbooks():
+        if generate_y1_new_users:
+            students_tag = f"{n_students:03d}students"
 
-        fname = f"{parent}/2_NewUsersList/NewUsers_Combined_{cohort}_{ymd}_{n_students:03d}students.xls"
-        files[fname] = xls_bytes
-        audit_rows.append({"file": fname, "rows": len(df_users)})
+            df_users = _make_users_df(valid_emails, full_names)
+            if delta is not None:
+                df_users = df_users[delta.new_users(valid_emails)]
 
+            if delta is None or len(df_users):
+                fname = f"{parent}/2_NewUsersList/NewUsers_Combined_{cohort}_{ymd}_{len(df_users):03d}students.xls"
+                yield from _outputs(output, fname, "combined", "new_users_combined", df_users, audit_rows,
+                                    _source("users", valid_emails, full_names, delta_key))
 
-    if generate_course_map:
-        for cid in course_ids:
-            rows = []
-            for email in valid_emails:
-                rows.append({
-                    "login": email,
-                    "organisation": cid,
-                    "roles": "learner",
-                    "add_to_lessons": "yes",
-                })
 
-            df_roles = _make_roles_df(rows)
-            xls_bytes = dataframe_to_xls(df_roles)
+        if generate_course_map:
+            # One course's frame at a time: it becomes one workbook (or its
+            # parts) and is dropped, so memory does not grow with the courses.
+            for cid in course_ids:
+                df_roles = _make_roles_df(valid_emails, [cid], "learner", by="course")
+                if delta is not None:
+                    df_roles = df_roles[delta.new_rows(df_roles["* login"], df_roles["* organisation"])]
+                    if df_roles.empty:
+                        continue
 
-            fname = f"{parent}/3_CourseMapStudents/CourseMap_Combi_{cohort}_CID{cid}_{ymd}_{n_students:03d}students.xls"
-            files[fname] = xls_bytes
-            audit_rows.append({"file": fname, "rows": len(df_roles)})
+                fname = f"{parent}/3_CourseMapStudents/CourseMap_Combi_{cohort}_CID{cid}_{ymd}_{n_students:03d}students.xls"
+                yield from _outputs(output, fname, f"CID{cid}", "course_map", df_roles, audit_rows,
+                                    _source("roles", valid_emails, [cid], "learner", "course", delta_key))
 
+    render_into(package, workbooks(), run, workers, cache, executor, progress_callback, _file_count(plan))
+    _add_manifest(package, parent, build_manifest(
+        "student", cohort, ymd, valid_emails, full_names if generate_y1_new_users else [], course_ids, ["learner"], delta, outputs,
+    ), audit_rows)
 
     zip_name = f"{parent}.zip"
-    zip_bytes = _zip_files(files)
 
     if not valid_emails:
+        package.discard()
         return GeneratedPackage(
-            zip_bytes=_zip_files({}),
+            zip_file=ZipHandle.empty(),
             zip_filename=f"Student_{cohort_name}_{ymd}.zip",
             audit_df=pd.DataFrame(),
             logs=logs,
+            roster=roster,
         )
 
-    return GeneratedPackage(
-        zip_bytes=zip_bytes,
-        zip_filename=zip_name,
-        audit_df=pd.DataFrame(audit_rows),
-        logs=logs,
-    )
+    pkg = _finished_package(package, zip_name, audit_rows, logs, cache, key)
+    pkg.roster = roster
+    return pkg
 
 
@@ -1,6 +1,6 @@
 import time
 import pandas as pd
-from typing import List, Dict, Callable, Optional
+from typing import List, Dict, Callable, Optional, Tuple
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
@@ -18,7 +18,10 @@ from .selenium_utils import (
     default_log_callback,
     default_progress_callback,
 )
-from .config import get_config
+from .config import SeleniumConfig, get_config
+from .session_supervisor import DriverSupervisor
+from .rate_limiter import AdaptiveRateLimiter
+from .run_history import ERROR, FAILED, SKIPPED, STOPPED, SUCCESS, RunHistory, open_run
 
 
 # ===== XPaths (based on your current iLAMS page) =====
@@ -78,6 +81,24 @@ def _get_visible_row_count(driver, log_fn: Callable[[str, str], None]) -> int:
         return 0
 
 
+def _load_course_list(driver, wait, log_fn: Callable[[str, str], None], loads: int = 1) -> int:
+    """
+    (Re)open Org Manage Courses, force 100 rows per page, re-sort and
+    return the number of visible rows.
+    """
+    for _ in range(loads):
+        driver.get(lams_course_mgmt_url)
+    _set_rows_per_page(wait, log_fn, "100")
+    _click_sort_twice(wait, log_fn)
+    return _get_visible_row_count(driver, log_fn)
+
+
+def _read_course_row(wait, i: int) -> Tuple[str, str]:
+    cid = wait.until(EC.presence_of_element_located((By.XPATH, ID_CELL_XPATH.format(i=i)))).text.strip()
+    cname = wait.until(EC.presence_of_element_located((By.XPATH, NAME_LINK_XPATH.format(i=i)))).text.strip()
+    return cid, cname
+
+
 def run_bulk_course_archive(
     excluded_ids: List[str],
     dry_run: bool,
@@ -86,6 +107,8 @@ def run_bulk_course_archive(
     progress_callback=default_progress_callback,
     pause_flag: Callable[[], bool] = lambda: False,
     stop_flag: Callable[[], bool] = lambda: False,
+    history: Optional[RunHistory] = None,
+    config: Optional[SeleniumConfig] = None,
 ) -> Dict:
     """
     Bulk archive iLAMS courses with Pause / Resume / Stop support.
@@ -100,18 +123,32 @@ def run_bulk_course_archive(
     - Actual:
       - archive using the original click flow
       - reload list and re-apply 100 rows each time (DOM changes)
+    - With a history store, each scanned/archived course is recorded
+      with its duration (see core.run_history).
+    - config is the caller's SeleniumConfig snapshot (default: get_config()).
     """
 
     logs: List[Dict] = []
     rows_out: List[Dict] = []
 
-    def log(msg: str, level: str = "info"):
-        entry = make_log_entry("BulkArchive", msg, level)
+    def log(msg: str, level: str = "info", **fields):
+        entry = make_log_entry("BulkArchive", msg, level, **fields)
         logs.append(entry)
         log_callback(entry)
 
-    config = get_config()
-    driver, wait = get_driver(config)
+    config = config or get_config()
+    supervisor = DriverSupervisor(config, driver_factory=get_driver, log=log)
+    supervisor.attach()
+    limiter = AdaptiveRateLimiter(log=log)
+    run = open_run(
+        history,
+        "course_archive",
+        {"dry_run": dry_run, "max_courses": max_courses, "excluded": len(excluded_ids)},
+        profile=config.debugger_address,
+    )
+
+    def reload_list(driver, wait):
+        _load_course_list(driver, wait, log)
 
     # Normalise excluded IDs
     excluded_set = {str(x).strip() for x in excluded_ids if str(x).strip()}
@@ -121,13 +158,10 @@ def run_bulk_course_archive(
 
     try:
         # ========== Load list once initially ==========
-        driver.get(lams_course_mgmt_url)
-        driver.get(lams_course_mgmt_url)
-        _set_rows_per_page(wait, log, "100")
-        _click_sort_twice(wait, log)
-
         # Count visible rows
-        total_rows = _get_visible_row_count(driver, log)
+        total_rows = supervisor.run_item(
+            lambda driver, wait: _load_course_list(driver, wait, log, loads=2)
+        )
         log(f"Detected {total_rows} rows currently visible in table.", "info")
 
         if total_rows == 0:
@@ -159,11 +193,17 @@ def run_bulk_course_archive(
                     break
 
                 try:
-                    cid = wait.until(EC.presence_of_element_located((By.XPATH, ID_CELL_XPATH.format(i=i)))).text.strip()
-                    cname = wait.until(EC.presence_of_element_located((By.XPATH, NAME_LINK_XPATH.format(i=i)))).text.strip()
+                    item_start = time.monotonic()
+                    # A dead browser is re-attached, the list reloaded and
+                    # the same row read again.
+                    cid, cname = supervisor.run_item(
+                        lambda driver, wait: _read_course_row(wait, i),
+                        resume=reload_list,
+                    )
 
                     if cid in excluded_set:
                         log(f"Skipped excluded: {cid} – {cname}", "info")
+                        run.record(cid, SKIPPED, step="dry_run", error="excluded")
                         continue
 
                     scanned += 1
@@ -172,18 +212,19 @@ def run_bulk_course_archive(
 
                     log(f"[DRY-RUN] Would archive {cid} – {cname}", "warn")
                     rows_out.append({"course_id": cid, "course_name": cname, "action": "DRY-RUN"})
+                    run.record(cid, SUCCESS, time.monotonic() - item_start, step="dry_run")
 
                 except StaleElementReferenceException:
                     log("Stale element during DRY-RUN scan. Reloading and continuing.", "warn")
-                    driver.get(lams_course_mgmt_url)
-                    _set_rows_per_page(wait, log, "100")
-                    _click_sort_twice(wait, log)
-                    total_rows = _get_visible_row_count(driver, log)
+                    total_rows = supervisor.run_item(
+                        lambda driver, wait: _load_course_list(driver, wait, log)
+                    )
                     continue
 
                 except TimeoutException:
                     # Skip if a particular row can't be read
                     log(f"Timeout reading row {i}. Skipping.", "warn")
+                    run.record(f"row {i}", ERROR, time.monotonic() - item_start, step="read_row", error="timeout")
                     continue
 
             log("DRY-RUN scan completed.", "info")
@@ -210,11 +251,10 @@ def run_bulk_course_archive(
                         return {"dataframe": pd.DataFrame(rows_out), "logs": logs}
 
             # Always reload list and apply 100-per-page before selecting the next target
-            driver.get(lams_course_mgmt_url)
-            _set_rows_per_page(wait, log, "100")
-            _click_sort_twice(wait, log)
-
-            total_rows = _get_visible_row_count(driver, log)
+            limiter.wait()
+            total_rows = supervisor.run_item(
+                lambda driver, wait: _load_course_list(driver, wait, log)
+            )
             if total_rows == 0:
                 log("No rows detected after reload. Stopping.", "warn")
                 break
@@ -227,8 +267,10 @@ def run_bulk_course_archive(
             # Scan through all visible rows (up to 100)
             for i in range(1, total_rows + 1):
                 try:
-                    cid = wait.until(EC.presence_of_element_located((By.XPATH, ID_CELL_XPATH.format(i=i)))).text.strip()
-                    cname = wait.until(EC.presence_of_element_located((By.XPATH, NAME_LINK_XPATH.format(i=i)))).text.strip()
+                    cid, cname = supervisor.run_item(
+                        lambda driver, wait: _read_course_row(wait, i),
+                        resume=reload_list,
+                    )
 
                     if cid in excluded_set:
                         continue
@@ -252,27 +294,46 @@ def run_bulk_course_archive(
                 break
 
             # ===== Archive flow (unchanged) =====
+            driver, wait = supervisor.driver, supervisor.wait
+            item_start = time.monotonic()
             try:
-                driver.find_element(By.XPATH, NAME_LINK_XPATH.format(i=chosen_i)).click()
+                with limiter.track():
+                    driver.find_element(By.XPATH, NAME_LINK_XPATH.format(i=chosen_i)).click()
 
-                wait.until(EC.element_to_be_clickable((By.XPATH, EDIT_XPATH))).click()
-                wait.until(EC.presence_of_element_located((By.XPATH, STATUS_XPATH)))
+                    wait.until(EC.element_to_be_clickable((By.XPATH, EDIT_XPATH))).click()
+                    wait.until(EC.presence_of_element_located((By.XPATH, STATUS_XPATH)))
 
-                Select(driver.find_element(By.XPATH, STATUS_XPATH)).select_by_visible_text("Archived")
-                wait.until(EC.element_to_be_clickable((By.XPATH, SAVE_XPATH))).click()
+                    Select(driver.find_element(By.XPATH, STATUS_XPATH)).select_by_visible_text("Archived")
+                    wait.until(EC.element_to_be_clickable((By.XPATH, SAVE_XPATH))).click()
 
                 processed += 1
                 progress_callback(processed, max_courses)
 
-                log(f"Archived: {chosen_id} – {chosen_name}", "info")
+                log(
+                    f"Archived: {chosen_id} – {chosen_name} · {limiter.describe()}", "info",
+                    item=chosen_id, step="archive", duration=round(time.monotonic() - item_start, 2),
+                )
                 rows_out.append({"course_id": chosen_id, "course_name": chosen_name, "action": "ARCHIVED"})
+                run.record(chosen_id, SUCCESS, time.monotonic() - item_start, step="archive")
 
             except StaleElementReferenceException:
                 log(f"Stale element while archiving {chosen_id}. Reloading list and retrying next.", "warn")
+                run.record(chosen_id, ERROR, time.monotonic() - item_start, step="archive", error="stale element")
                 continue
 
             except Exception as e:
-                log(f"Failed to archive {chosen_id} – {chosen_name}: {e}", "error")
+                # Never replay the archive clicks blindly after a crash: the
+                # save may already have gone through. Recover, then let the
+                # next pass reload the list and pick the course again only if
+                # it is still there. The error is only recorded if there is
+                # no recovery, so a course archived on the next pass has a
+                # single (success) outcome.
+                if supervisor.try_recover(e):
+                    log(f"Browser recovered — re-checking {chosen_id} on the reloaded list.", "warn")
+                    continue
+
+                run.record(chosen_id, ERROR, time.monotonic() - item_start, step="archive", error=str(e))
+                log(f"Failed to archive {chosen_id} – {chosen_name}: {e}", "error", item=chosen_id, step="archive")
                 rows_out.append({"course_id": chosen_id, "course_name": chosen_name, "action": f"ERROR: {e}"})
                 # Continue to next item rather than killing the run
                 continue
@@ -282,17 +343,23 @@ def run_bulk_course_archive(
 
     except WebDriverException as e:
         log(f"WebDriver error: {e}", "error")
+        run.status = FAILED
         return {"dataframe": pd.DataFrame(rows_out), "logs": logs}
 
     except Exception as e:
         log(f"Fatal error: {e}", "error")
+        run.status = FAILED
         return {"dataframe": pd.DataFrame(rows_out), "logs": logs}
 
     finally:
+        if stop_flag() and run.status != FAILED:
+            run.status = STOPPED
+        run.finish()
+
         # Only quit browser if STOP or fully finished
         if stop_flag() or processed >= max_courses:
             try:
-                driver.quit()
+                supervisor.quit()
                 log("Closed Selenium driver.", "info")
             except Exception:
                 pass
@@ -0,0 +1,407 @@
+# core/cli.py
+"""
+Headless entry points for the bulk tools, e.g. for overnight cron jobs.
+
+    python -m core.cli search names.txt --output results.csv
+    python -m core.cli upload lessons.csv --student --monitor
+    python -m core.cli package staff --name DL --emails emails.txt --names names.txt \\
+        --course-ids courses.txt --roles monitor --new-users --course-map
+    python -m core.cli batch packages.csv --new-users --course-map --output out/
+    python -m core.cli archive --exclude keep.txt --max-courses 50        # dry-run
+    python -m core.cli archive --exclude keep.txt --max-courses 50 --execute
+    python -m core.cli --profile chrome-b search names.txt    # a saved Home-page profile
+
+Run from the folder that holds Home.py. Progress is streamed to stdout as
+JSON lines: {"event": "log" | "progress" | "result", ...}. The first
+Ctrl-C / SIGTERM asks the run to stop at its next checkpoint.
+
+Backends are imported per subcommand and none of this imports Streamlit.
+"""
+
+import argparse
+import csv
+import json
+import signal
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+from .run_log import level_value
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_STOPPED = 130
+
+
+class JsonLinesEmitter:
+    """Writes one JSON object per line and flushes, so a pipe sees each event live."""
+
+    def __init__(self, stream: TextIO = sys.stdout, min_level: str = "INFO"):
+        self.stream = stream
+        self.min_level = min_level
+        self.errors = 0
+
+    def emit(self, event: str, **data) -> None:
+        self.stream.write(json.dumps({"event": event, **data}, ensure_ascii=False, default=str) + "\n")
+        self.stream.flush()
+
+    def log(self, entry) -> None:
+        if not isinstance(entry, dict):
+            entry = {"level": "INFO", "message": str(entry)}
+        if str(entry.get("level", "")).upper() == "ERROR":
+            self.errors += 1
+        if level_value(entry.get("level", "INFO")) >= level_value(self.min_level):
+            self.emit("log", **entry)
+
+    def progress(self, current: int, total: int) -> None:
+        self.emit("progress", current=current, total=total)
+
+
+class StopSignal:
+    """stop_flag for the backends, raised by SIGINT / SIGTERM."""
+
+    SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+    def __init__(self):
+        self.requested = False
+        self._previous = {}
+
+    def install(self) -> None:
+        for sig in self.SIGNALS:
+            self._previous[sig] = signal.signal(sig, self._handle)
+
+    def uninstall(self) -> None:
+        for sig, handler in self._previous.items():
+            signal.signal(sig, handler)
+        self._previous = {}
+
+    def _handle(self, signum, frame) -> None:
+        if self.requested:
+            raise KeyboardInterrupt
+        self.requested = True
+
+    def __call__(self) -> bool:
+        return self.requested
+
+
+# -----------------------------
+# Input files
+# -----------------------------
+
+def read_lines(path: str) -> List[str]:
+    """Non-empty stripped lines of a text file ("-" reads stdin)."""
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        text = Path(path).read_text(encoding="utf-8-sig")
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def read_lessons_csv(path: str) -> Dict[str, List[str]]:
+    """lesson_title, lams_lesson_id, elentra_event_id columns → one list per column."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    columns = ("lesson_title", "lams_lesson_id", "elentra_event_id")
+    missing = [c for c in columns if rows and c not in rows[0]]
+    if not rows or missing:
+        raise ValueError(f"{path}: expected CSV columns {', '.join(columns)}")
+    return {c: [(r[c] or "").strip() for r in rows] for c in columns}
+
+
+def _config(args):
+    """The named profile's config snapshot, or the process default."""
+    from .config import get_config, load_profile
+    return load_profile(args.profile) if args.profile else get_config()
+
+
+def _history(args):
+    if args.no_history:
+        return None
+    from .run_history import RunHistory
+    return RunHistory()
+
+
+# -----------------------------
+# Subcommands
+# -----------------------------
+
+def cmd_upload(args, out: JsonLinesEmitter, stop: StopSignal) -> int:
+    from .backend_1_Lesson_Link_Upload import run_elentra_link_upload
+
+    lessons = read_lessons_csv(args.lessons)
+    result = run_elentra_link_upload(
+        lams_lesson_titles_raw="\n".join(lessons["lesson_title"]),
+        lams_lesson_ids_raw="\n".join(lessons["lams_lesson_id"]),
+        elentra_event_ids_raw="\n".join(lessons["elentra_event_id"]),
+        upload_student=args.student,
+        upload_monitor=args.monitor,
+        log_callback=out.log,
+        progress_callback=out.progress,
+        workers=args.workers,
+        debugger_addresses=args.debugger_address or None,
+        history=_history(args),
+        stop_flag=stop,
+        config=_config(args),
+    )
+
+    if not result["completed"]:            # stopped or not configured
+        out.emit("result", completed=False, lessons=len(lessons["lesson_title"]))
+        return EXIT_STOPPED if result["stopped"] else EXIT_FAILED
+
+    failed = [r for r in result["results"] if r.get("status") != "success"]
+    out.emit("result", completed=True, lessons=len(result["results"]), failed=len(failed))
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_search(args, out: JsonLinesEmitter, stop: StopSignal) -> int:
+    from .backend_2_Bulk_Search_Users import RESULT_COLUMNS, run_user_search
+    from .result_sink import CsvResultSink, new_result_path
+
+    search_values = read_lines(args.input)
+
+    cache = None
+    if not args.no_cache:
+        from .search_cache import SearchResultCache
+        cache = SearchResultCache(ttl_seconds=args.cache_ttl_days * 86400)
+
+    directory = None
+    if args.directory:
+        from .user_directory import UserDirectory
+        directory = UserDirectory()
+
+    output = Path(args.output) if args.output else new_result_path("user_search")
+    with CsvResultSink(output, RESULT_COLUMNS) as sink:
+        result = run_user_search(
+            search_values=search_values,
+            log_callback=out.log,
+            progress_callback=out.progress,
+            stop_flag=stop,
+            cache=cache,
+            force_refresh=args.force_refresh,
+            directory=directory,
+            directory_max_age_days=args.directory_max_age_days,
+            sink=sink,
+            history=_history(args),
+            config=_config(args),
+        )
+
+    df = result["dataframe"]
+    statuses = df["DL check account?"].value_counts().to_dict() if not df.empty else {}
+    out.emit("result", output=str(output), inputs=len(search_values), rows=len(df), statuses=statuses)
+
+    if stop():
+        return EXIT_STOPPED
+    return EXIT_FAILED if df.empty and search_values else EXIT_OK
+
+
+def cmd_package(args, out: JsonLinesEmitter, stop: StopSignal) -> int:
+    from .backend_3_Bulk_User_Excel_Gen import generate_staff_package, generate_student_package
+    from .package_cache import get_package_cache
+
+    common = dict(
+        full_names=read_lines(args.names) if args.names else [],
+        raw_emails="\n".join(read_lines(args.emails)),
+        raw_course_ids="\n".join(read_lines(args.course_ids)) if args.course_ids else "",
+        generate_course_map=args.course_map,
+        log_callback=out.log,
+        history=_history(args),
+        workers=args.workers,
+        output_format=args.output_format,
+        max_rows=args.max_rows,
+        cache=None if args.no_cache else get_package_cache(),
+        previous=args.previous,
+        progress_callback=out.progress,
+    )
+    if args.mode == "staff":
+        pkg = generate_staff_package(
+            department_name=args.name,
+            selected_roles=args.roles or ["monitor"],
+            generate_new_users=args.new_users,
+            **common,
+        )
+    else:
+        pkg = generate_student_package(
+            cohort_name=args.name,
+            generate_y1_new_users=args.new_users,
+            **common,
+        )
+
+    output = Path(args.output) if args.output else Path(pkg.zip_filename)
+    if output.is_dir():
+        output = output / pkg.zip_filename
+    pkg.zip_file.save(output)
+    pkg.zip_file.close()
+
+    out.emit(
+        "result",
+        output=str(output),
+        files=pkg.audit_df.to_dict(orient="records") if not pkg.audit_df.empty else [],
+    )
+    return EXIT_OK
+
+
+def cmd_batch(args, out: JsonLinesEmitter, stop: StopSignal) -> int:
+    from .package_batch import generate_batch
+    from .package_cache import get_package_cache
+
+    batch = generate_batch(
+        args.manifest,
+        generate_new_users=args.new_users,
+        generate_course_map=args.course_map,
+        log_callback=out.log,
+        history=_history(args),
+        workers=args.workers,
+        output_format=args.output_format,
+        max_rows=args.max_rows,
+        cache=None if args.no_cache else get_package_cache(),
+    )
+
+    output = Path(args.output) if args.output else Path(batch.zip_filename)
+    if output.is_dir():
+        output = output / batch.zip_filename
+    batch.zip_file.save(output)
+    batch.zip_file.close()
+
+    out.emit(
+        "result",
+        output=str(output),
+        packages=batch.packages,
+        failed=batch.failed,
+        files=batch.audit_df.to_dict(orient="records"),
+    )
+    return EXIT_FAILED if batch.failed else EXIT_OK
+
+
+def cmd_archive(args, out: JsonLinesEmitter, stop: StopSignal) -> int:
+    from .backend_4_Bulk_Courses_Archive import run_bulk_course_archive
+
+    excluded = []
+    if args.exclude:
+        for line in read_lines(args.exclude):
+            excluded.extend(x.strip() for x in line.split(",") if x.strip())
+
+    result = run_bulk_course_archive(
+        excluded_ids=excluded,
+        dry_run=not args.execute,
+        max_courses=args.max_courses,
+        log_callback=out.log,
+        progress_callback=out.progress,
+        stop_flag=stop,
+        history=_history(args),
+        config=_config(args),
+    )
+
+    df = result["dataframe"]
+    if args.output and not df.empty:
+        df.to_csv(args.output, index=False)
+    out.emit(
+        "result",
+        dry_run=not args.execute,
+        courses=len(df),
+        output=args.output,
+        errors=out.errors,
+    )
+    if stop():
+        return EXIT_STOPPED
+    return EXIT_FAILED if out.errors else EXIT_OK
+
+
+# -----------------------------
+# Parser
+# -----------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cli",
+        description="Run the iLAMS / Elentra bulk tools without the Streamlit UI.",
+    )
+    parser.add_argument("--min-level", default="INFO", choices=["DEBUG", "INFO", "WARN", "ERROR"],
+                        help="Lowest log level written to stdout (default: INFO).")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not record this run in the local run history.")
+    parser.add_argument("--profile", help="Saved config profile to use (default: the 'default' profile).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("upload", help="Upload iLAMS lesson links to Elentra events.")
+    p.add_argument("lessons", help="CSV with lesson_title, lams_lesson_id, elentra_event_id columns.")
+    p.add_argument("--student", action="store_true", help="Upload the student (learner) link.")
+    p.add_argument("--monitor", action="store_true", help="Upload the monitor link.")
+    p.add_argument("--workers", type=int, default=1, help="Parallel Chrome tabs (default: 1).")
+    p.add_argument("--debugger-address", action="append",
+                   help="Chrome debugger address to spread tabs over (repeatable).")
+    p.set_defaults(func=cmd_upload)
+
+    p = sub.add_parser("search", help="Bulk search iLAMS users by name or email.")
+    p.add_argument("input", help="Text file with one name/email per line ('-' for stdin).")
+    p.add_argument("--output", help="Result CSV, written row by row (default: data/results/...).")
+    p.add_argument("--no-cache", action="store_true", help="Do not use the local result cache.")
+    p.add_argument("--cache-ttl-days", type=float, default=7, help="Reuse cached results younger than this.")
+    p.add_argument("--force-refresh", action="store_true", help="Search everything live and refresh the cache.")
+    p.add_argument("--directory", action="store_true", help="Resolve from the local user directory first.")
+    p.add_argument("--directory-max-age-days", type=float, default=1.0,
+                   help="Trust 'not found' from a directory snapshot younger than this.")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("package", help="Generate a staff or student iLAMS upload package (ZIP).")
+    p.add_argument("mode", choices=["staff", "student"])
+    p.add_argument("--name", required=True, help="Department (staff) or cohort (student) name.")
+    p.add_argument("--emails", required=True, help="Text file, one email per line.")
+    p.add_argument("--names", help="Text file, one full name per line (same order as emails).")
+    p.add_argument("--course-ids", help="Text file, one course ID per line.")
+    p.add_argument("--roles", type=lambda s: [r.strip() for r in s.split(",") if r.strip()],
+                   help="Comma-separated staff roles (default: monitor).")
+    p.add_argument("--new-users", action="store_true", help="Generate the new-users workbooks.")
+    p.add_argument("--course-map", action="store_true", help="Generate the course-map workbooks.")
+    p.add_argument("--output", help="ZIP path or folder (default: package name in the current folder).")
+    p.add_argument("--workers", type=int, help="Processes rendering workbooks (default: one per CPU; 1 = serial).")
+    p.add_argument("--format", dest="output_format", choices=["xls", "xlsx", "csv"], default="xls",
+                   help="File format of the workbooks (default: xls).")
+    p.add_argument("--max-rows", type=int,
+                   help="Split files with more data rows than this (default: the format's limit, 65,535 for xls).")
+    p.add_argument("--no-cache", action="store_true", help="Do not reuse or store packages in the local package cache.")
+    p.add_argument("--previous", help="Previous package ZIP or its manifest.json; only write what is new since then.")
+    p.set_defaults(func=cmd_package)
+
+    p = sub.add_parser("batch", help="Generate many packages from one CSV manifest into one ZIP.")
+    p.add_argument("manifest", help="CSV with columns package,mode,email,name,course_ids,roles (one row per user).")
+    p.add_argument("--new-users", action="store_true", help="Generate the new-users workbooks.")
+    p.add_argument("--course-map", action="store_true", help="Generate the course-map workbooks.")
+    p.add_argument("--output", help="ZIP path or folder (default: batch name in the current folder).")
+    p.add_argument("--workers", type=int, help="Processes rendering workbooks (default: one per CPU; 1 = serial).")
+    p.add_argument("--format", dest="output_format", choices=["xls", "xlsx", "csv"], default="xls",
+                   help="File format of the workbooks (default: xls).")
+    p.add_argument("--max-rows", type=int,
+                   help="Split files with more data rows than this (default: the format's limit, 65,535 for xls).")
+    p.add_argument("--no-cache", action="store_true", help="Do not reuse or store packages in the local package cache.")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("archive", help="Bulk archive iLAMS courses (dry-run unless --execute).")
+    p.add_argument("--exclude", help="Text file of course IDs to keep (comma or newline separated).")
+    p.add_argument("--max-courses", type=int, default=50, help="Safety cap (default: 50).")
+    p.add_argument("--execute", action="store_true", help="Actually archive; without it this is a dry-run.")
+    p.add_argument("--output", help="Audit CSV path.")
+    p.set_defaults(func=cmd_archive)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, stream: TextIO = sys.stdout) -> int:
+    args = build_parser().parse_args(argv)
+    out = JsonLinesEmitter(stream, min_level=args.min_level)
+    stop = StopSignal()
+    stop.install()
+
+    try:
+        return args.func(args, out, stop)
+    except (ValueError, OSError) as e:
+        out.emit("error", message=str(e))
+        return EXIT_FAILED
+    except KeyboardInterrupt:
+        out.emit("error", message="Interrupted.")
+        return EXIT_STOPPED
+    finally:
+        stop.uninstall()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,12 @@
 # core/config.py
 
-import os 
+import dataclasses
+import json
+import os
+import threading
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Union
 from pathlib import Path
-import os
 
 # def default_driver_path() -> str:
 #     if os.name == "nt":  # Windows
@@ -30,17 +32,142 @@ def default_driver_path() -> str:
     return str(driver_path)
 
 
-@dataclass
+def default_data_dir() -> Path:
+    """Local folder for caches and run data (next to Home.py, created on first use)."""
+    return Path(__file__).resolve().parent.parent / "data"
+
+
+@dataclass(frozen=True)
 class SeleniumConfig:
+    """
+    One immutable config snapshot. A page or job keeps the snapshot it
+    started with; "changing" the config builds a new one (see replace),
+    so a running job never sees another operator's edits.
+    """
     driver_path: str = default_driver_path()
     debugger_address: str = "127.0.0.1:9222"
     lams_base_url: Optional[str] = "https://ilams.lamsinternational.com/lams/index.do"
     elentra_base_url: Optional[str] = "https://ntu.elentra.cloud/"
+    chrome_profile_dir: Optional[str] = None     # --user-data-dir when (re)launching Chrome
+
+    def replace(self, **changes) -> "SeleniumConfig":
+        """A copy with the given fields changed; None values are ignored."""
+        return dataclasses.replace(self, **{k: v for k, v in changes.items() if v is not None})
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SeleniumConfig":
+        fields = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in fields})
+
+
+def debugger_port(address: str) -> int:
+    """The port of a host:port debugger address; ValueError if it has none."""
+    _, sep, port = address.strip().rpartition(":")
+    if not sep or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"Debugger address must be host:port (e.g. 127.0.0.1:9222), got '{address}'.")
+    return int(port)
+
+
+# -----------------------------
+# Named profiles
+# -----------------------------
+
+DEFAULT_PROFILE = "default"
+
+
+def default_profiles_path() -> Path:
+    return default_data_dir() / "config_profiles.json"
+
+
+class ConfigProfiles:
+    """
+    Named SeleniumConfig snapshots (e.g. one per Chrome instance),
+    persisted to a local JSON file.
+
+    The file is read once, on first access, and every read or write
+    holds a lock, so threads and Streamlit sessions can share one
+    instance. Saves rewrite the file atomically.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else default_profiles_path()
+        self._lock = threading.Lock()
+        self._profiles: Optional[Dict[str, SeleniumConfig]] = None
+
+    def _loaded(self) -> Dict[str, SeleniumConfig]:
+        # Caller holds the lock.
+        if self._profiles is None:
+            raw = {}
+            if self.path.exists():
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+            self._profiles = {name: SeleniumConfig.from_dict(data) for name, data in raw.items()}
+        return self._profiles
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        data = {name: cfg.to_dict() for name, cfg in sorted(self._profiles.items())}
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._loaded())
+
+    def get(self, name: str) -> Optional[SeleniumConfig]:
+        with self._lock:
+            return self._loaded().get(name)
+
+    def save(self, name: str, config: SeleniumConfig) -> None:
+        name = name.strip()
+        if not name:
+            raise ValueError("Profile name is required.")
+        debugger_port(config.debugger_address)
+        with self._lock:
+            self._loaded()[name] = config
+            self._write()
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            if self._loaded().pop(name, None) is not None:
+                self._write()
+
+
+_profiles: Optional[ConfigProfiles] = None
+_override: Optional[SeleniumConfig] = None
+_lock = threading.Lock()
+
+
+def get_profiles() -> ConfigProfiles:
+    """The process-wide profile store (data/config_profiles.json)."""
+    global _profiles
+    with _lock:
+        if _profiles is None:
+            _profiles = ConfigProfiles()
+        return _profiles
+
+
+def load_profile(name: str) -> SeleniumConfig:
+    config = get_profiles().get(name)
+    if config is None:
+        raise ValueError(f"Unknown config profile: {name}")
+    return config
 
-_config: SeleniumConfig = SeleniumConfig()
 
 def get_config() -> SeleniumConfig:
-    return _config
+    """
+    The process default snapshot: whatever set_config last stored, else
+    the saved "default" profile, else the built-in defaults. Streamlit
+    pages use their session's snapshot instead (core.session_config) and
+    pass it to the backends.
+    """
+    with _lock:
+        override = _override
+    return override or get_profiles().get(DEFAULT_PROFILE) or SeleniumConfig()
+
 
 def set_config(
     driver_path: Optional[str] = None,
@@ -48,14 +175,17 @@ def set_config(
     lams_base_url: Optional[str] = None,
     elentra_base_url: Optional[str] = None,
 ) -> SeleniumConfig:
-    global _config
-    if driver_path is not None:
-        _config.driver_path = driver_path
-    if debugger_address is not None:
-        _config.debugger_address = debugger_address
-    if lams_base_url is not None:
-        _config.lams_base_url = lams_base_url
-    if elentra_base_url is not None:
-        _config.elentra_base_url = elentra_base_url
-        
-    return _config
+    """
+    Replace the process default with an updated snapshot and return it.
+    Snapshots already handed out are not touched.
+    """
+    global _override
+    updated = get_config().replace(
+        driver_path=driver_path,
+        debugger_address=debugger_address,
+        lams_base_url=lams_base_url,
+        elentra_base_url=elentra_base_url,
+    )
+    with _lock:
+        _override = updated
+    return updated
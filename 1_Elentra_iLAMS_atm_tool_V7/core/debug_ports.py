@@ -0,0 +1,228 @@
+# core/debug_ports.py
+
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from .config import SeleniumConfig, default_data_dir
+
+# 9222 stays free for the single-operator setup (SeleniumConfig's default).
+DEFAULT_PORTS = range(9223, 9231)
+DEBUG_HOST = "127.0.0.1"
+
+
+class PortLeaseTimeout(TimeoutError):
+    """No port was leased: the wait timed out or the job was stopped while queued."""
+
+
+def default_profile_root() -> Path:
+    return default_data_dir() / "chrome_profiles"
+
+
+@dataclass(frozen=True)
+class PortLease:
+    """One job's claim on a Chrome debugger port and its profile folder."""
+    port: int
+    profile_dir: str
+    job: str
+    acquired_at: float
+    owner: threading.Thread
+
+    @property
+    def debugger_address(self) -> str:
+        return f"{DEBUG_HOST}:{self.port}"
+
+    def config(self, base: SeleniumConfig) -> SeleniumConfig:
+        """base, pointed at this lease's Chrome."""
+        return base.replace(debugger_address=self.debugger_address, chrome_profile_dir=self.profile_dir)
+
+
+class DebugPortPool:
+    """
+    Hands out Chrome debugger ports to jobs, one job per port, so two
+    operators' runs never drive the same browser.
+
+    - Each port has its own Chrome profile folder under profile_root,
+      kept between runs so the SSO login in it survives.
+    - acquire() blocks while every port is leased. Waiting jobs are served
+      first come, first served.
+    - A lease is released by release() or by leaving lease(), including
+      when the job raises. A lease whose owning thread has died (e.g. a
+      Streamlit script thread that was killed) is reclaimed the next time
+      a job asks for a port.
+
+    Leases only coordinate threads of one process (the Streamlit server);
+    separate CLI processes should be given distinct --profile configs.
+    """
+
+    def __init__(
+        self,
+        ports: Iterable[int] = DEFAULT_PORTS,
+        profile_root: Optional[Union[str, Path]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ports = list(ports)
+        if not self.ports:
+            raise ValueError("DebugPortPool needs at least one port.")
+        self.profile_root = Path(profile_root) if profile_root else default_profile_root()
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._leases: Dict[int, PortLease] = {}
+        self._queue: deque = deque()
+        self._tickets = itertools.count()
+
+    def profile_dir(self, port: int) -> str:
+        return str(self.profile_root / f"port_{port}")
+
+    # ----- leasing -----
+
+    def acquire(
+        self,
+        job: str,
+        timeout: Optional[float] = None,
+        on_wait: Callable[[int], None] = lambda position: None,
+        should_stop: Callable[[], bool] = lambda: False,
+    ) -> PortLease:
+        """
+        Lease a free port for job. If none is free, on_wait(position) is
+        called once and the call blocks until a port frees up.
+        should_stop() is polled about once a second while queued (under the
+        pool's lock, so keep it quick). PortLeaseTimeout after timeout
+        seconds, or as soon as should_stop() returns True.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = next(self._tickets)
+
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                waited = False
+                while True:
+                    if self._queue[0] == ticket:
+                        port = self._free_port()
+                        if port is not None:
+                            return self._grant(port, job)
+                    if not waited:
+                        on_wait(self._queue.index(ticket) + 1)
+                        waited = True
+
+                    if should_stop():
+                        raise PortLeaseTimeout(f"Stopped while {job!r} was queued for a Chrome debugger port.")
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PortLeaseTimeout(f"No Chrome debugger port free for {job!r} after {timeout}s.")
+                    # Wake up now and then to reclaim leases of dead threads.
+                    self._cond.wait(timeout=1.0 if remaining is None else min(remaining, 1.0))
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self, lease: PortLease) -> None:
+        with self._cond:
+            if self._leases.get(lease.port) is lease:
+                del self._leases[lease.port]
+                self._cond.notify_all()
+
+    @contextmanager
+    def lease(
+        self,
+        job: str,
+        timeout: Optional[float] = None,
+        on_wait=lambda position: None,
+        should_stop=lambda: False,
+    ) -> Iterator[PortLease]:
+        held = self.acquire(job, timeout=timeout, on_wait=on_wait, should_stop=should_stop)
+        try:
+            yield held
+        finally:
+            self.release(held)
+
+    def _reap(self) -> None:
+        # Caller holds the lock.
+        for port, held in list(self._leases.items()):
+            if not held.owner.is_alive():
+                del self._leases[port]
+
+    def _free_port(self) -> Optional[int]:
+        # Caller holds the lock.
+        self._reap()
+        for port in self.ports:
+            if port not in self._leases:
+                return port
+        return None
+
+    def _grant(self, port: int, job: str) -> PortLease:
+        # Caller holds the lock.
+        lease = PortLease(
+            port=port,
+            profile_dir=self.profile_dir(port),
+            job=job,
+            acquired_at=self._clock(),
+            owner=threading.current_thread(),
+        )
+        self._leases[port] = lease
+        return lease
+
+    # ----- status -----
+
+    def status(self) -> List[Dict]:
+        """One row per leased port, for display."""
+        now = self._clock()
+        with self._cond:
+            self._reap()
+            return [
+                {"port": lease.port, "job": lease.job, "held_s": round(now - lease.acquired_at, 1)}
+                for lease in sorted(self._leases.values(), key=lambda l: l.port)
+            ]
+
+    @property
+    def waiting(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+
+_pool: Optional[DebugPortPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_port_pool() -> DebugPortPool:
+    """The process-wide pool shared by every Streamlit session."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DebugPortPool()
+        return _pool
+
+
+@contextmanager
+def leased_chrome(
+    job: str,
+    base: SeleniumConfig,
+    pool: Optional[DebugPortPool] = None,
+    timeout: Optional[float] = None,
+    on_wait: Callable[[int], None] = lambda position: None,
+    should_stop: Callable[[], bool] = lambda: False,
+    launch: Optional[Callable[..., bool]] = None,
+) -> Iterator[SeleniumConfig]:
+    """
+    Lease a port for job, make sure its Chrome is running (launching it on
+    the lease's own profile if needed) and yield base pointed at it. The
+    lease is released when the block exits, however it exits.
+    """
+    from .session_supervisor import debugger_port_open
+
+    if launch is None:
+        from .selenium_utils import launch_chrome_with_debug as launch
+
+    pool = pool or get_port_pool()
+    with pool.lease(job, timeout=timeout, on_wait=on_wait, should_stop=should_stop) as held:
+        if not debugger_port_open(held.debugger_address):
+            Path(held.profile_dir).mkdir(parents=True, exist_ok=True)
+            if not launch(port=held.port, profile_dir=held.profile_dir):
+                raise RuntimeError(f"Could not launch Chrome on debugger port {held.port}.")
+        yield held.config(base)
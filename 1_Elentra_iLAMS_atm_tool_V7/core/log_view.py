@@ -0,0 +1,71 @@
+# core/log_view.py
+
+import time
+from typing import Dict, Optional
+
+import streamlit as st
+
+from .run_log import RunLog, make_log_entry, new_log_path
+
+LOG_WINDOW = 200            # rows shown in the log table
+LIVE_WINDOW = 20            # rows shown while a run is in progress
+LEVEL_CHOICES = ["DEBUG", "INFO", "WARN", "ERROR"]
+
+
+def page_log(key: str, feature: str, capacity: int = 1000) -> RunLog:
+    """
+    The page's RunLog, kept in session_state. A page keeps one log
+    across reruns, spilling to data/logs/<key>_<timestamp>.jsonl.
+    """
+    if not isinstance(st.session_state.get(key), RunLog):
+        st.session_state[key] = RunLog(
+            feature,
+            capacity=capacity,
+            min_level="DEBUG",
+            spill_path=new_log_path(key),
+        )
+    return st.session_state[key]
+
+
+class LiveLogView:
+    """
+    log_callback for a running backend: adds each entry to the page's
+    RunLog and redraws only the latest few rows, at most every `interval`
+    seconds, so long runs don't slow the page down.
+    """
+
+    def __init__(self, run_log: RunLog, window: int = LIVE_WINDOW, interval: float = 0.5):
+        self.run_log = run_log
+        self.window = window
+        self.interval = interval
+        self._placeholder = st.empty()
+        self._last_draw = 0.0
+
+    def __call__(self, entry) -> None:
+        if not isinstance(entry, dict):
+            entry = make_log_entry(self.run_log.feature, str(entry))
+        self.run_log.add(entry)
+
+        now = time.monotonic()
+        if now - self._last_draw >= self.interval:
+            self._last_draw = now
+            self._placeholder.dataframe(self.run_log.frame(last=self.window), width="stretch")
+
+    def clear(self) -> None:
+        self._placeholder.empty()
+
+
+def render_log_panel(run_log: RunLog, key: str, title: str = "Logs", window: int = LOG_WINDOW) -> None:
+    """Level filter plus the latest `window` entries of the page's log."""
+    if not run_log:
+        return
+
+    st.subheader(title)
+    min_level = st.selectbox("Minimum level", LEVEL_CHOICES, index=1, key=f"{key}_min_level")
+    df = run_log.frame(last=window, min_level=min_level)
+
+    shown = f"Showing the latest {len(df)} of {run_log.total} entries"
+    if run_log.spill_path is not None:
+        shown += f" · full log: {run_log.spill_path}"
+    st.caption(shown)
+    st.dataframe(df, width="stretch")
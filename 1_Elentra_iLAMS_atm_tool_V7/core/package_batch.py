@@ -0,0 +1,276 @@
+# core/package_batch.py
+"""
+Batch mode: many department / cohort packages from one CSV manifest.
+
+    package,mode,email,name,course_ids,roles
+    DL,staff,alice.tan@ntu.edu.sg,Alice Tan,104;650,monitor;author
+    DL,staff,bob.lim@ntu.edu.sg,Bob Lim,,
+    Cohort2026Y1,student,c001@e.ntu.edu.sg,Chan Wei,104;650,
+
+One row per user. Rows with the same package and mode make one package;
+its course IDs and roles are the union of its rows' (";"-separated, in
+order of first appearance), so they can be given on the first row only.
+Student packages always map "learner"; staff packages default to
+"monitor". name is needed for the new-users workbooks only.
+
+Packages are generated side by side in threads that share one workbook
+process pool (and the package cache, if given), and each finished
+package ZIP is copied into one outer archive together with
+batch_audit.csv, the audit rows of every package with a package column.
+A package that fails is logged and left out; the rest still ship.
+Package names that would collapse to the same file name ("DL/1" and
+"DL1", or "dl" and "DL") are rejected with the manifest lines involved.
+"""
+
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .backend_3_Bulk_User_Excel_Gen import (
+    GeneratedPackage, LogCallback, _log, _safe_name, generate_staff_package, generate_student_package,
+)
+from .package_cache import PackageCache
+from .package_manifest import MANIFEST_NAME
+from .package_zip import PackageZip
+from .run_history import ERROR, FAILED, RunHistory, open_run
+from .workbook_pool import OutputPlan, default_workers, shared_executor
+
+BATCH_COLUMNS = ["package", "mode", "email", "name", "course_ids", "roles"]
+REQUIRED_COLUMNS = ["package", "mode", "email"]
+MODES = ("staff", "student")
+AUDIT_NAME = "batch_audit.csv"
+AUDIT_COLUMNS = ["package", "mode", "zip", "file", "rows", "part", "parts"]
+# Packages generated at once; their workbooks still go through one pool.
+MAX_CONCURRENT_PACKAGES = 4
+
+BatchSource = Union[str, Path, bytes, pd.DataFrame]
+
+
+@dataclass
+class BatchEntry:
+    """One package of a batch manifest."""
+    mode: str
+    name: str
+    emails: List[str] = field(default_factory=list)
+    full_names: List[str] = field(default_factory=list)
+    course_ids: List[str] = field(default_factory=list)
+    roles: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchPackage(GeneratedPackage):
+    """The outer archive; audit_df covers every package that was generated."""
+    packages: int = 0
+    failed: List[str] = field(default_factory=list)
+
+
+def _split(value: str) -> List[str]:
+    return [v.strip() for v in value.split(";") if v.strip()]
+
+
+def _check_file_names(packages: List[Tuple[str, str, str]]) -> None:
+    """
+    packages: (mode, name, where) per manifest line or entry. Raises
+    ValueError if two different names would get the same file name in the
+    archive, i.e. they differ only in case or in characters a file name
+    cannot hold ("DL/1" and "DL1").
+    """
+    seen: Dict[tuple, Tuple[str, str]] = {}
+    clashes = []
+    for mode, name, where in packages:
+        first_name, first_where = seen.setdefault((mode, _safe_name(name).casefold()), (name, where))
+        if first_name != name:
+            clashes.append(f"{where} '{name}' has the same file name as {first_where} '{first_name}'")
+    if clashes:
+        raise ValueError(f"Batch package names clash: {'; '.join(clashes[:20])}. Rename them so they differ.")
+
+
+def _workbook_rows(audit_df: pd.DataFrame) -> int:
+    """Data rows a package's workbooks hold (its manifest.json not counted)."""
+    if audit_df.empty:
+        return 0
+    return int(audit_df.loc[~audit_df["file"].str.endswith(MANIFEST_NAME), "rows"].sum())
+
+
+def read_batch_manifest(source: BatchSource) -> List[BatchEntry]:
+    """
+    Parse a batch CSV (a path, its raw bytes or an already read frame)
+    into one BatchEntry per package, in order of first appearance.
+    Raises ValueError naming the offending CSV lines.
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source.fillna("").astype(str)
+    else:
+        raw = io.BytesIO(source) if isinstance(source, bytes) else source
+        try:
+            df = pd.read_csv(raw, dtype=str, keep_default_na=False, skipinitialspace=True)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            raise ValueError(f"Not a batch CSV: {e}") from None
+
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(
+            f"Batch CSV is missing column(s) {', '.join(missing)}; expected {', '.join(BATCH_COLUMNS)}."
+        )
+    df = df.reindex(columns=BATCH_COLUMNS, fill_value="")
+    df = df.apply(lambda col: col.str.strip())
+    df["mode"] = df["mode"].str.lower()
+
+    bad = df.index[~df["mode"].isin(MODES) | df["package"].eq("") | df["email"].eq("")]
+    if len(bad):
+        # +2: the header is line 1 and the index starts at 0.
+        lines = ", ".join(str(i + 2) for i in bad[:20])
+        raise ValueError(f"Batch CSV lines {lines}: package, email and mode (staff or student) are required.")
+    _check_file_names([(m, p, f"line {i + 2}") for i, (m, p) in enumerate(zip(df["mode"], df["package"]))])
+
+    # Packages that share a course list share the parsed list.
+    course_lists: Dict[str, List[str]] = {}
+    entries: Dict[tuple, BatchEntry] = {}
+    for row in df.itertuples(index=False):
+        entry = entries.get((row.mode, row.package))
+        if entry is None:
+            entry = entries[(row.mode, row.package)] = BatchEntry(row.mode, row.package)
+        entry.emails.append(row.email)
+        entry.full_names.append(row.name)
+        if row.course_ids not in course_lists:
+            course_lists[row.course_ids] = _split(row.course_ids)
+        entry.course_ids.extend(c for c in course_lists[row.course_ids] if c not in entry.course_ids)
+        entry.roles.extend(r for r in _split(row.roles) if r not in entry.roles)
+
+    for entry in entries.values():
+        if not all(entry.full_names):
+            entry.full_names = []
+    return list(entries.values())
+
+
+def generate_batch(
+    source: Union[BatchSource, List[BatchEntry]],
+    generate_new_users: bool,
+    generate_course_map: bool,
+    log_callback: LogCallback = None,
+    history: Optional[RunHistory] = None,
+    workers: Optional[int] = None,
+    output_format: str = "xls",
+    max_rows: Optional[int] = None,
+    cache: Optional[PackageCache] = None,
+) -> BatchPackage:
+    """
+    Generate every package of a batch manifest (see read_batch_manifest)
+    into one outer ZIP. workers: processes in the pool shared by all the
+    packages (None: one per CPU, 1: render serially). Each package's log
+    entries reach log_callback, tagged with the package, once it is done.
+    """
+    if isinstance(source, list):
+        entries = source
+        _check_file_names([(e.mode, e.name, f"package {n}") for n, e in enumerate(entries, start=1)])
+    else:
+        entries = read_batch_manifest(source)
+    OutputPlan(output_format, max_rows)     # fail before any thread starts
+    if workers is None:
+        workers = default_workers()
+
+    logs: List[Dict] = []
+    ymd = datetime.now().strftime("%Y%m%d")
+    zip_name = f"Batch_{ymd}_{len(entries):03d}packages.zip"
+    params = {
+        "packages": len(entries),
+        "users": sum(len(e.emails) for e in entries),
+        "new_users": generate_new_users,
+        "course_map": generate_course_map,
+    }
+
+    def generate(entry: BatchEntry) -> Tuple[GeneratedPackage, float]:
+        start = time.monotonic()
+        common = dict(
+            full_names=entry.full_names,
+            raw_emails="\n".join(entry.emails),
+            raw_course_ids="\n".join(entry.course_ids),
+            generate_course_map=generate_course_map,
+            history=history,
+            workers=workers,
+            output_format=output_format,
+            max_rows=max_rows,
+            cache=cache,
+            executor=executor,
+        )
+        if entry.mode == "staff":
+            pkg = generate_staff_package(
+                department_name=entry.name,
+                selected_roles=entry.roles or ["monitor"],
+                generate_new_users=generate_new_users,
+                **common,
+            )
+        else:
+            pkg = generate_student_package(
+                cohort_name=entry.name,
+                generate_y1_new_users=generate_new_users,
+                **common,
+            )
+        return pkg, time.monotonic() - start
+
+    audits: List[pd.DataFrame] = []
+    rosters: List[pd.DataFrame] = []
+    failed: List[str] = []
+    threads = max(1, min(len(entries), workers, MAX_CONCURRENT_PACKAGES))
+
+    with open_run(history, "batch_package", params) as run, PackageZip() as outer, \
+            shared_executor(workers) as executor, ThreadPoolExecutor(threads) as pool:
+        futures = [pool.submit(generate, entry) for entry in entries]
+
+        # Collected in manifest order, so the archive is the same every time.
+        for entry, future in zip(entries, futures):
+            label = f"{entry.mode} {entry.name}"
+            try:
+                pkg, seconds = future.result()
+            except Exception as e:
+                failed.append(entry.name)
+                run.record(entry.name, ERROR, 0.0, entry.mode, f"{type(e).__name__}: {e}")
+                _log(logs, log_callback, f"{label}: not generated: {e}", "ERROR", item=entry.name)
+                continue
+
+            for e in pkg.logs:
+                e = dict(e, message=f"{label}: {e['message']}", item=entry.name)
+                logs.append(e)
+                if log_callback:
+                    log_callback(e)
+            if pkg.roster is not None and not pkg.roster.empty:
+                rosters.append(pkg.roster.assign(package=entry.name))
+
+            if not _workbook_rows(pkg.audit_df):
+                _log(logs, log_callback, f"{label}: no valid emails; left out.", "WARN", item=entry.name)
+                pkg.zip_file.close()
+                continue
+
+            outer.add_zip(pkg.zip_filename, pkg.zip_file)
+            pkg.zip_file.close()
+            audits.append(pkg.audit_df.assign(package=entry.name, mode=entry.mode, zip=pkg.zip_filename))
+            run.record(entry.name, duration=seconds, step=entry.mode)
+
+        audit_df = pd.concat(audits, ignore_index=True) if audits else pd.DataFrame(columns=AUDIT_COLUMNS)
+        audit_df = audit_df[AUDIT_COLUMNS]
+        outer.add(AUDIT_NAME, audit_df.to_csv(index=False).encode("utf-8"))
+
+        generated = len(entries) - len(failed)
+        _log(logs, log_callback,
+             f"Batch done: {generated} of {len(entries)} packages"
+             + (f"; failed: {', '.join(failed)}." if failed else "."),
+             "WARN" if failed else "INFO")
+        if failed and not generated:
+            run.status = FAILED
+
+        return BatchPackage(
+            zip_file=outer.finish(),
+            zip_filename=zip_name,
+            audit_df=audit_df,
+            logs=logs,
+            roster=pd.concat(rosters, ignore_index=True) if rosters else None,
+            packages=len(audits),
+            failed=failed,
+        )
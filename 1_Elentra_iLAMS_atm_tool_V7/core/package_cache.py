@@ -0,0 +1,232 @@
+# core/package_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from .config import default_data_dir
+from .package_zip import ZipHandle
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_WORKBOOK_MAX_BYTES = 64 * 1024 * 1024
+# Part of every workbook key; bump it when the same inputs start to render
+# to different bytes (writer or sheet layout changes).
+WORKBOOK_FORMAT_VERSION = 1
+
+
+def default_cache_dir() -> Path:
+    return default_data_dir() / "package_cache"
+
+
+def package_key(
+    mode: str,
+    name: str,
+    emails: Sequence[str],
+    full_names: Sequence[str],
+    course_ids: Sequence[Any],
+    roles: Iterable[str],
+    flags: Dict[str, Any],
+    ymd: str,
+) -> str:
+    """
+    Hash of a package request's normalised inputs: the validated emails
+    (paired with their names when names end up in a workbook and in
+    manifest.json; pass no names otherwise), course IDs and roles, each sorted so re-ordered
+    input lines give the same key. The date is part of it because it is
+    part of every file name. Role order does not matter to iLAMS.
+    """
+    users = sorted(zip(emails, full_names)) if full_names else sorted(emails)
+    normalised = {
+        "mode": mode,
+        "name": name.strip(),
+        "users": users,
+        "course_ids": sorted(str(c) for c in course_ids),
+        "roles": sorted(roles),
+        "flags": flags,
+        "date": ymd,
+    }
+    return _sha256(normalised)
+
+
+def workbook_key(fmt: str, source: Any) -> str:
+    """
+    Hash of what one workbook is built from (its WorkbookJob.source: the
+    sheet constants and the email/course slice behind its rows), so equal
+    workbooks share an entry without hashing every rendered cell.
+    """
+    return _sha256([WORKBOOK_FORMAT_VERSION, fmt, source])
+
+
+def _sha256(value) -> str:
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PackageCache:
+    """
+    Content-addressed cache of generated packages, least recently used
+    first out.
+
+    - Packages: the finished ZIP plus its file name, audit rows and logs,
+      stored under path as <key>.zip / <key>.json, up to max_bytes of ZIPs.
+      A re-submit with the same normalised inputs is answered from here.
+    - Workbooks: rendered file bytes keyed by their inputs, kept in memory
+      up to workbook_max_bytes. Requests that share users or courses (or
+      only toggle one of the outputs) reuse each other's workbooks.
+
+    One object is shared by every Streamlit session (see get_package_cache);
+    all access goes through one lock.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        workbook_max_bytes: int = DEFAULT_WORKBOOK_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path) if path else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.workbook_max_bytes = workbook_max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.workbook_hits = 0
+        self.workbook_misses = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        # key -> ZIP size, least recently used first.
+        self._packages: "OrderedDict[str, int]" = OrderedDict()
+        zips = sorted(self.path.glob("*.zip"), key=lambda p: p.stat().st_mtime)
+        for zip_path in zips:
+            if zip_path.with_suffix(".json").exists():
+                self._packages[zip_path.stem] = zip_path.stat().st_size
+        self._workbooks: "OrderedDict[str, bytes]" = OrderedDict()
+        self._workbook_bytes = 0
+
+    # ----- packages -----
+
+    def get_package(self, key: str) -> Optional[Tuple[ZipHandle, Dict]]:
+        """(handle on the cached ZIP, its metadata), or None."""
+        with self._lock:
+            if key not in self._packages:
+                self.misses += 1
+                return None
+            zip_path, meta_path = self._paths(key)
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                handle = ZipHandle(open(zip_path, "rb"))
+            except (OSError, ValueError):
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._packages.move_to_end(key)
+            now = self._clock()
+            os.utime(zip_path, (now, now))
+            self.hits += 1
+            return handle, meta
+
+    def put_package(self, key: str, handle: ZipHandle, meta: Dict) -> None:
+        zip_path, meta_path = self._paths(key)
+        # The copy runs outside the lock so other sessions are not held up
+        # by it; the temp names are unique, so two writers never collide.
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        zip_tmp = zip_path.with_name(zip_path.name + suffix)
+        meta_tmp = meta_path.with_name(meta_path.name + suffix)
+        handle.save(zip_tmp)
+        meta_tmp.write_text(json.dumps(meta, default=str), encoding="utf-8")
+        size = zip_tmp.stat().st_size
+        with self._lock:
+            os.replace(zip_tmp, zip_path)
+            os.replace(meta_tmp, meta_path)
+            self._packages[key] = size
+            self._packages.move_to_end(key)
+            self._evict_packages(keep=key)
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.path / f"{key}.zip", self.path / f"{key}.json"
+
+    def _drop(self, key: str) -> None:
+        # Caller holds the lock.
+        self._packages.pop(key, None)
+        for p in self._paths(key):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:     # still open for a download (Windows)
+                pass
+
+    def _evict_packages(self, keep: str) -> None:
+        # Caller holds the lock.
+        while sum(self._packages.values()) > self.max_bytes:
+            oldest = next(iter(self._packages))
+            if oldest == keep:
+                break
+            self._drop(oldest)
+
+    # ----- workbooks -----
+
+    def get_workbook(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._workbooks.get(key)
+            if data is None:
+                self.workbook_misses += 1
+                return None
+            self._workbooks.move_to_end(key)
+            self.workbook_hits += 1
+            return data
+
+    def put_workbook(self, key: str, data: bytes) -> None:
+        if len(data) > self.workbook_max_bytes:
+            return
+        with self._lock:
+            old = self._workbooks.pop(key, None)
+            if old is not None:
+                self._workbook_bytes -= len(old)
+            self._workbooks[key] = data
+            self._workbook_bytes += len(data)
+            while self._workbook_bytes > self.workbook_max_bytes:
+                _, evicted = self._workbooks.popitem(last=False)
+                self._workbook_bytes -= len(evicted)
+
+    # ----- housekeeping -----
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._packages):
+                self._drop(key)
+            self._workbooks.clear()
+            self._workbook_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "packages": len(self._packages),
+                "package_bytes": sum(self._packages.values()),
+                "workbooks": len(self._workbooks),
+                "workbook_bytes": self._workbook_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "workbook_hits": self.workbook_hits,
+                "workbook_misses": self.workbook_misses,
+            }
+
+
+_cache: Optional[PackageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_package_cache() -> PackageCache:
+    """The process-wide cache shared by every Streamlit session."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PackageCache()
+        return _cache
@@ -0,0 +1,167 @@
+# core/package_manifest.py
+"""
+manifest.json: the roster a package was generated from, stored inside the
+package ZIP, so the next package can be generated as a delta against it.
+
+A delta package holds only the workbook rows that are new since the
+previous package: new users (all their courses) and new courses (all
+their users). The delta is taken per output: an output the previous
+package did not have (e.g. new-users workbooks switched on since) is
+written in full. iLAMS imports cannot take users or courses away, so
+removals are reported in the log and the manifest and left to the
+operator. The delta's own manifest holds the full current roster, so
+deltas can be chained term after term.
+"""
+
+import io
+import json
+import zipfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+OUTPUTS = ("new_users", "course_map")
+
+ManifestSource = Union[str, Path, bytes, Dict]
+
+
+def build_manifest(
+    mode: str,
+    name: str,
+    ymd: str,
+    emails: Sequence[str],
+    full_names: Sequence[str],
+    course_ids: Sequence[Any],
+    roles: Sequence[str],
+    delta: "RosterDelta" = None,
+    outputs: Optional[Dict[str, bool]] = None,
+) -> Dict:
+    """outputs: which workbooks the package holds, by OUTPUTS name."""
+    names = list(full_names) if len(full_names) == len(emails) else [""] * len(emails)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "mode": mode,
+        "name": name,
+        "generated": ymd,
+        "outputs": _outputs(outputs),
+        "users": [{"email": e, "name": n} for e, n in zip(emails, names)],
+        "course_ids": [str(c) for c in course_ids],
+        "roles": list(roles),
+    }
+    if delta is not None:
+        manifest["delta"] = delta.to_dict()
+    return manifest
+
+
+def _outputs(outputs: Optional[Dict[str, bool]]) -> Dict[str, bool]:
+    # Version 1 manifests do not say; their packages held every output.
+    if outputs is None:
+        return dict.fromkeys(OUTPUTS, True)
+    return {o: bool(outputs.get(o, False)) for o in OUTPUTS}
+
+
+def manifest_bytes(manifest: Dict) -> bytes:
+    return json.dumps(manifest, indent=2).encode("utf-8")
+
+
+def load_manifest(source: ManifestSource) -> Dict:
+    """
+    The manifest of a previous package, given the package ZIP or the
+    manifest itself (as a path, raw bytes or an already parsed dict).
+    """
+    if isinstance(source, dict):
+        manifest = source
+    else:
+        raw = Path(source).read_bytes() if isinstance(source, (str, Path)) else bytes(source)
+        if raw[:2] == b"PK":
+            with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+                names = [n for n in zf.namelist() if n.rsplit("/", 1)[-1] == MANIFEST_NAME]
+                if not names:
+                    raise ValueError(f"The previous package has no {MANIFEST_NAME}; it predates delta support.")
+                raw = zf.read(names[0])
+        try:
+            manifest = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Not a package ZIP or {MANIFEST_NAME}: {e}") from None
+
+    if not isinstance(manifest, dict) or "users" not in manifest or "course_ids" not in manifest:
+        raise ValueError(f"Not a package {MANIFEST_NAME}.")
+    if manifest.get("version", 0) > MANIFEST_VERSION:
+        raise ValueError(f"{MANIFEST_NAME} version {manifest['version']} is newer than this tool.")
+    return manifest
+
+
+@dataclass
+class RosterDelta:
+    """What changed between a previous package's roster and this one."""
+    base: str
+    added_users: List[str] = field(default_factory=list)
+    removed_users: List[str] = field(default_factory=list)
+    added_courses: List[str] = field(default_factory=list)
+    removed_courses: List[str] = field(default_factory=list)
+    roles_changed: bool = False
+    # Outputs this package writes that the previous one did not have;
+    # every row of them is new.
+    full_outputs: List[str] = field(default_factory=list)
+
+    @classmethod
+    def between(
+        cls,
+        previous: Dict,
+        mode: str,
+        emails: Sequence[str],
+        course_ids: Sequence[Any],
+        roles: Sequence[str],
+        outputs: Optional[Dict[str, bool]] = None,
+    ) -> "RosterDelta":
+        if previous.get("mode", mode) != mode:
+            raise ValueError(f"The previous package is a {previous['mode']} package, not {mode}.")
+        before_outputs = _outputs(previous.get("outputs"))
+        before_users = {u["email"] for u in previous["users"]}
+        before_courses = {str(c) for c in previous["course_ids"]}
+        now_users = set(emails)
+        now_courses = {str(c) for c in course_ids}
+        return cls(
+            base=previous.get("generated", ""),
+            # Keep input order for what is added, sort what is gone.
+            added_users=[e for e in dict.fromkeys(emails) if e not in before_users],
+            removed_users=sorted(before_users - now_users),
+            added_courses=[c for c in dict.fromkeys(map(str, course_ids)) if c not in before_courses],
+            removed_courses=sorted(before_courses - now_courses),
+            roles_changed=sorted(previous.get("roles", [])) != sorted(roles),
+            full_outputs=[o for o, on in _outputs(outputs).items() if on and not before_outputs[o]],
+        )
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added_users or self.added_courses or self.roles_changed or self.full_outputs)
+
+    def _added(self, logins) -> np.ndarray:
+        return np.isin(np.asarray(logins, dtype=object), self.added_users)
+
+    def new_users(self, logins) -> np.ndarray:
+        """
+        Mask of new-users rows (by login) that were not in the previous
+        package: a new user, or every row when it had no new-users output.
+        """
+        if "new_users" in self.full_outputs:
+            return np.ones(len(logins), dtype=bool)
+        return self._added(logins)
+
+    def new_rows(self, logins, course_ids) -> np.ndarray:
+        """
+        Mask of (login, course) rows that were not in the previous package:
+        a new user or a new course, or every row when the roles changed or
+        it had no course-map output.
+        """
+        if self.roles_changed or "course_map" in self.full_outputs:
+            return np.ones(len(logins), dtype=bool)
+        courses = np.asarray([str(c) for c in course_ids], dtype=object)
+        return self._added(logins) | np.isin(courses, self.added_courses)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
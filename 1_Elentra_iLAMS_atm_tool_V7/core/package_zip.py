@@ -0,0 +1,118 @@
+# core/package_zip.py
+"""
+ZIP packages written to a spooled temporary file, one entry at a time.
+
+Each workbook is deflated into the archive as soon as it is produced and
+its bytes can be dropped, so a package never sits in memory as a dict of
+files plus a BytesIO copy plus a getvalue() copy. Small packages stay in
+RAM; past SPOOL_MAX_BYTES the archive rolls over to a file on disk.
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+COPY_CHUNK = 1024 * 1024
+
+
+class PackageZip:
+    """
+    Builds a ZIP entry by entry.
+
+        with PackageZip() as package:
+            package.add("a/b.xls", xls_bytes)
+            ...
+            handle = package.finish()
+
+    Leaving the block with an exception discards the spool; otherwise the
+    finished file belongs to the caller.
+    """
+
+    def __init__(self, spool_max: int = SPOOL_MAX_BYTES):
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_max, suffix=".zip")
+        self._zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+        self.names: List[str] = []
+
+    def add(self, name: str, data: bytes) -> None:
+        if self._zip is None:
+            raise ValueError("Package is already finished.")
+        self._zip.writestr(name, data)
+        self.names.append(name)
+
+    def add_zip(self, name: str, handle: "ZipHandle") -> None:
+        """Copy a finished package in as a stored entry (it is deflated already)."""
+        if self._zip is None:
+            raise ValueError("Package is already finished.")
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        with self._zip.open(info, "w", force_zip64=handle.size > zipfile.ZIP64_LIMIT) as out:
+            handle.copy_to(out)
+        self.names.append(name)
+
+    def finish(self) -> "ZipHandle":
+        """Write the central directory and hand the file over."""
+        if self._zip is None:
+            raise ValueError("Package is already finished.")
+        self._zip.close()
+        self._zip = None
+        return ZipHandle(self._file)
+
+    def discard(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        self._file.close()
+
+    def __enter__(self) -> "PackageZip":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.discard()
+
+
+class ZipHandle:
+    """
+    A finished package file. Readers share one handle, so reads are
+    serialised and always start from the top.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            self._file.seek(0, 2)
+            return self._file.tell()
+
+    def read(self) -> bytes:
+        with self._lock:
+            self._file.seek(0)
+            return self._file.read()
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Copy the package to path in chunks."""
+        path = Path(path)
+        with open(path, "wb") as out:
+            self.copy_to(out)
+        return path
+
+    def copy_to(self, out: BinaryIO) -> None:
+        with self._lock:
+            self._file.seek(0)
+            shutil.copyfileobj(self._file, out, COPY_CHUNK)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    @classmethod
+    def empty(cls) -> "ZipHandle":
+        return PackageZip().finish()
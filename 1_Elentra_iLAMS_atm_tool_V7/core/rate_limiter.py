@@ -0,0 +1,116 @@
+# core/rate_limiter.py
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+def is_trouble_signal(exc: BaseException) -> bool:
+    """Errors that suggest the site is struggling (timeouts, stale pages, dropped sessions)."""
+    return isinstance(exc, (WebDriverException, ConnectionError, TimeoutError))
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD throttle shared by the Selenium backends, in place of fixed
+    time.sleep() pauses between items.
+
+    - wait() spaces out the start of each request at the current rate
+      (requests per minute). It is thread-safe, so one limiter can pace
+      several tabs.
+    - A request that finishes within slow_latency adds increase_step to
+      the rate (additive increase).
+    - A slow request or a trouble signal (timeout, stale page, dead
+      session) multiplies the rate by backoff_factor (multiplicative
+      decrease).
+
+    Wrap each request in track() to feed it both signals automatically.
+    A back-off is reported through log, or through the log passed to
+    track() so that a tab worker can send it via its own (queued) log
+    rather than calling the page's callback from its thread.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 20.0,
+        min_rate: float = 4.0,
+        max_rate: float = 60.0,
+        increase_step: float = 2.0,
+        backoff_factor: float = 0.5,
+        slow_latency: float = 8.0,
+        jitter: float = 0.1,
+        log: Callable[..., None] = lambda msg, level="info": None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.backoff_factor = backoff_factor
+        self.slow_latency = slow_latency
+        self.jitter = jitter
+        self.log = log
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.last_latency = 0.0
+        self.successes = 0
+        self.errors = 0
+
+    @property
+    def interval(self) -> float:
+        """Seconds between request starts at the current rate."""
+        return 60.0 / self.rate
+
+    def describe(self) -> str:
+        return f"{self.rate:.1f} req/min (latency {self.last_latency:.1f}s)"
+
+    def wait(self) -> None:
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_slot)
+            spread = 1 + random.uniform(-self.jitter, self.jitter)
+            self._next_slot = start + self.interval * spread
+        if start > now:
+            self._sleep(start - now)
+
+    def record_success(self, latency: float, log: Optional[Callable[..., None]] = None) -> None:
+        with self._lock:
+            self.last_latency = latency
+            if latency > self.slow_latency:
+                reason = f"slow response {latency:.1f}s"
+            else:
+                self.successes += 1
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                return
+        self._back_off(reason, log)
+
+    def record_error(self, exc: BaseException, log: Optional[Callable[..., None]] = None) -> None:
+        with self._lock:
+            self.errors += 1
+        self._back_off(type(exc).__name__, log)
+
+    def _back_off(self, reason: str, log: Optional[Callable[..., None]] = None) -> None:
+        with self._lock:
+            old = self.rate
+            self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+            # Let the slower pace apply from the very next request
+            self._next_slot = max(self._next_slot, self._clock() + self.interval)
+        (log or self.log)(f"🐢 Throttling down {old:.1f} → {self.rate:.1f} req/min ({reason}).", "warn")
+
+    @contextmanager
+    def track(self, log: Optional[Callable[..., None]] = None):
+        start = self._clock()
+        try:
+            yield
+        except Exception as e:
+            if is_trouble_signal(e):
+                self.record_error(e, log)
+            raise
+        self.record_success(self._clock() - start, log)
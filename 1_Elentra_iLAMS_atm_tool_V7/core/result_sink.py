@@ -0,0 +1,94 @@
+# core/result_sink.py
+
+from __future__ import annotations
+
+import csv
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, List, Optional, Union
+
+from .config import default_data_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def default_results_dir() -> Path:
+    return default_data_dir() / "results"
+
+
+def new_result_path(prefix: str, suffix: str = ".csv") -> Path:
+    """Timestamped file under data/results, e.g. user_search_20250101_093000.csv."""
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return default_results_dir() / f"{prefix}_{stamp}{suffix}"
+
+
+class CsvResultSink:
+    """
+    Append-only CSV file that a backend writes each result row into as
+    soon as it is produced.
+
+    The header is written when the sink is created, and every write is
+    flushed. So the file is always a valid, downloadable partial result,
+    even if the run is stopped or crashes. Rows are written in completion
+    order. Keys missing from a row are left blank and unknown keys are
+    ignored.
+
+    With keep_recent, the last keep_recent rows are also kept in memory
+    (recent_frame()), so a live view need not re-read the growing file.
+    """
+
+    def __init__(self, path: Union[str, Path], columns: List[str], keep_recent: int = 0):
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.rows_written = 0
+        self.recent: Deque[Dict] = deque(maxlen=keep_recent)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(
+            self._file, fieldnames=self.columns, restval="", extrasaction="ignore",
+        )
+        self._writer.writeheader()
+        self._file.flush()
+
+    def write(self, row: Dict) -> None:
+        self.write_many([row])
+
+    def write_many(self, rows: Iterable[Dict]) -> None:
+        n = 0
+        for row in rows:
+            self._writer.writerow(row)
+            self.recent.append(row)
+            n += 1
+        if n:
+            self._file.flush()
+            self.rows_written += n
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "CsvResultSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def read_frame(self, tail: Optional[int] = None) -> pd.DataFrame:
+        return read_result_file(self.path, tail=tail)
+
+    def recent_frame(self) -> pd.DataFrame:
+        """The last keep_recent rows written, from memory."""
+        import pandas as pd
+
+        return pd.DataFrame(list(self.recent), columns=self.columns)
+
+
+def read_result_file(path: Union[str, Path], tail: Optional[int] = None) -> pd.DataFrame:
+    """Load a (possibly still growing) result file, optionally only its last rows."""
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return df.tail(tail) if tail else df
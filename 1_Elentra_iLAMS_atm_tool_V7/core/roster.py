@@ -0,0 +1,192 @@
+# core/roster.py
+"""
+Roster ingestion: emails (and optionally full names) as pasted lines or
+an uploaded CSV / XLSX, checked as whole columns rather than one email
+at a time.
+
+validate_roster() gives one report row per input line:
+
+- error (the line is left out): empty, bad format, wrong domain for the
+  mode, or a duplicate of an earlier line (case-insensitively);
+- warn (kept): looks like an earlier line apart from dots, dashes or a
+  +tag; a missing name; a name that shares no word with a
+  firstname.lastname style email (usually names pasted one line off).
+  The name checks are skipped when the names will not be used.
+
+Names travel with their emails, so dropping a line drops its name too.
+"""
+
+import io
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+WORD_REGEX = re.compile(r"[a-z]{2,}")
+# Ignored when looking for near duplicates (besides a +tag).
+NEAR_IGNORED = str.maketrans("", "", "._-")
+DOMAINS = {
+    "staff": "@ntu.edu.sg",
+    "student": "@e.ntu.edu.sg",
+}
+
+OK = "ok"
+WARN = "warn"
+ERROR = "error"
+
+REPORT_COLUMNS = ["line", "email", "name", "status", "reason"]
+EMAIL_HEADERS = ("email", "* email", "e-mail", "login", "* login")
+NAME_HEADERS = ("name", "full name", "full_name", "fullname", "* first_name")
+
+RosterSource = Union[str, Path, bytes]
+
+
+@dataclass
+class RosterReport:
+    """validate_roster's result: rows has one row per input line."""
+    rows: pd.DataFrame
+    names_given: bool
+    aligned: bool
+
+    @property
+    def valid(self) -> np.ndarray:
+        return (self.rows["status"] != ERROR).to_numpy()
+
+    @property
+    def emails(self) -> List[str]:
+        return self.rows.loc[self.valid, "email"].tolist()
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the valid emails; empty unless there was one name per email."""
+        if not self.aligned:
+            return []
+        return self.rows.loc[self.valid, "name"].tolist()
+
+    @property
+    def problems(self) -> pd.DataFrame:
+        return self.rows[self.rows["status"] != OK].reset_index(drop=True)
+
+    def summary(self) -> str:
+        counts = self.rows["status"].value_counts()
+        return (
+            f"{len(self.rows)} lines: {counts.get(OK, 0)} ok, "
+            f"{counts.get(WARN, 0)} with warnings, {counts.get(ERROR, 0)} left out."
+        )
+
+
+def _flag(status: pd.Series, reason: pd.Series, mask, level: str, text) -> None:
+    # The first problem found on a line is the one reported.
+    mask = pd.Series(mask, index=status.index) & reason.eq("")
+    status[mask] = level
+    reason[mask] = text[mask] if isinstance(text, pd.Series) else text
+
+
+def _first_line(keys: pd.Series, ok: pd.Series, line: pd.Series) -> pd.Series:
+    """For each ok line, the first ok line with the same key (NaN elsewhere)."""
+    firsts = pd.Series(line[ok].to_numpy(), index=keys[ok].to_numpy())
+    firsts = firsts[~firsts.index.duplicated()]
+    return keys.map(firsts).where(ok)
+
+
+def validate_roster(
+    emails: Sequence[str],
+    names: Optional[Sequence[str]] = None,
+    mode: str = "staff",
+    check_names: bool = True,
+) -> RosterReport:
+    """
+    Check a roster's emails (and names, given line for line) for mode.
+    check_names=False: the names are only carried along (lines past the
+    last email are dropped) and never warned about.
+    """
+    mode = mode.lower()
+    names = list(names or [])
+    if not check_names:
+        names = names[:len(emails)]
+    n = max(len(emails), len(names))
+    email = pd.Series(list(emails) + [""] * (n - len(emails)), dtype=object).fillna("").astype(str).str.strip()
+    name = pd.Series(names + [""] * (n - len(names)), dtype=object).fillna("").astype(str).str.strip()
+    line = pd.Series(np.arange(1, n + 1), index=email.index)
+
+    status = pd.Series(OK, index=email.index, dtype=object)
+    reason = pd.Series("", index=email.index, dtype=object)
+    lower = email.str.lower()
+
+    _flag(status, reason, email.eq("") & name.ne(""), ERROR, "Name without an email")
+    _flag(status, reason, email.eq(""), ERROR, "Email is empty")
+    _flag(status, reason, ~email.str.fullmatch(EMAIL_REGEX.pattern[1:-1]), ERROR, "Invalid email format")
+    domain = DOMAINS.get(mode)
+    if domain:
+        _flag(status, reason, ~lower.str.endswith(domain), ERROR, f"{mode.title()} email must end with {domain}")
+
+    # Duplicates of an earlier good line, exact or in another case.
+    ok = status.eq(OK)
+    first = _first_line(lower, ok, line)
+    dup = ok & first.ne(line)
+    if dup.any():
+        same = email.eq(first.map(dict(zip(line, email))))
+        first_line = first.fillna(0).astype(int).astype(str)
+        _flag(status, reason, dup & same, ERROR, "Duplicate of line " + first_line)
+        _flag(status, reason, dup & ~same, ERROR, "Same email as line " + first_line + " in another case")
+
+    # Near duplicates: the same address once dots, dashes and +tags are ignored.
+    parts = [e.partition("@") for e in lower.tolist()]
+    local = pd.Series([p[0] for p in parts], index=email.index)
+    near_key = pd.Series(
+        [p[0].split("+", 1)[0].translate(NEAR_IGNORED) + "@" + p[2] for p in parts], index=email.index,
+    )
+    ok = status.eq(OK)
+    near_first = _first_line(near_key, ok, line)
+    near = ok & near_first.ne(line)
+    if near.any():
+        near_line = near_first.fillna(0).astype(int)
+        _flag(status, reason, near, WARN, "Looks like line " + near_line.astype(str) + " ("
+              + near_line.map(dict(zip(line, email))).fillna("") + ")")
+
+    if names and check_names:
+        _flag(status, reason, status.ne(ERROR) & name.eq(""), WARN, "No name on this line")
+        # firstname.lastname emails should share a word with the name.
+        keep = status.eq(OK) & local.str.contains(".", regex=False)
+        if keep.any():
+            # One pass over plain lists; per-row word sets do not vectorise.
+            mismatch = []
+            for n_, l_ in zip(name[keep].str.lower().tolist(), local[keep].tolist()):
+                words = set(WORD_REGEX.findall(n_))
+                mismatch.append(bool(words) and words.isdisjoint(WORD_REGEX.findall(l_)))
+            mismatch = pd.Series(mismatch, index=keep.index[keep]).reindex(email.index, fill_value=False)
+            _flag(status, reason, mismatch, WARN, "Name does not match the email")
+
+    rows = pd.DataFrame({"line": line, "email": email, "name": name, "status": status, "reason": reason})
+    return RosterReport(rows[REPORT_COLUMNS], names_given=bool(names), aligned=bool(names) and len(names) == len(emails))
+
+
+def read_roster(source: RosterSource, filename: str = "") -> pd.DataFrame:
+    """
+    An uploaded roster (CSV or XLSX; a path or raw bytes) as a frame with
+    email and name columns. Headers are matched loosely ("Email",
+    "* login", "Full Name" ...); name is blank when there is none.
+    """
+    filename = str(source) if isinstance(source, (str, Path)) else filename
+    raw = Path(source).read_bytes() if isinstance(source, (str, Path)) else source
+    try:
+        if raw[:2] == b"PK" or filename.lower().endswith((".xlsx", ".xlsm")):
+            df = pd.read_excel(io.BytesIO(raw), dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_csv(io.BytesIO(raw), dtype=str, keep_default_na=False, skipinitialspace=True)
+    except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ValueError(f"Could not read the roster {filename}: {e}" if filename else f"Could not read the roster: {e}") from None
+
+    headers = {str(c).strip().lower(): c for c in df.columns}
+    email_col = next((headers[h] for h in EMAIL_HEADERS if h in headers), None)
+    if email_col is None:
+        raise ValueError(f"The roster needs an email column (one of: {', '.join(EMAIL_HEADERS)}).")
+    name_col = next((headers[h] for h in NAME_HEADERS if h in headers), None)
+    return pd.DataFrame({
+        "email": df[email_col].astype(str),
+        "name": df[name_col].astype(str) if name_col is not None else "",
+    })
@@ -0,0 +1,280 @@
+# core/run_history.py
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Union
+
+from .config import default_data_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Item outcomes
+SUCCESS = "success"
+ERROR = "error"
+SKIPPED = "skipped"
+
+# Run statuses
+RUNNING = "running"
+COMPLETED = "completed"
+STOPPED = "stopped"
+FAILED = "failed"
+
+
+def default_history_path() -> Path:
+    return default_data_dir() / "run_history.sqlite3"
+
+
+class RunHistory:
+    """
+    Local SQLite record of tool runs and their per-item outcomes.
+
+    runs:  one row per backend call (tool, parameters, profile, start/end, status)
+    items: one row per processed item (lesson, search, workbook, course ...)
+           with its step, outcome, duration and error text
+
+    Backends write through a RunRecorder (see open_run); the Run History
+    page reads the frames back for charts. Each call opens its own
+    connection, so tab workers can record from their threads.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path) if path else default_history_path()
+        self._clock = clock
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " tool TEXT NOT NULL,"
+                " params_json TEXT NOT NULL,"
+                " profile TEXT NOT NULL,"
+                " started_at REAL NOT NULL,"
+                " ended_at REAL,"
+                " status TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " run_id INTEGER NOT NULL REFERENCES runs (run_id),"
+                " item TEXT NOT NULL,"
+                " step TEXT NOT NULL,"
+                " outcome TEXT NOT NULL,"
+                " duration REAL NOT NULL,"
+                " error TEXT NOT NULL,"
+                " finished_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS items_run ON items (run_id)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:      # commit / rollback
+                yield conn
+        finally:
+            conn.close()
+
+    # ----- writes (via RunRecorder) -----
+
+    def start_run(self, tool: str, params: Dict, profile: str = "") -> int:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (tool, params_json, profile, started_at, status)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (tool, json.dumps(params, default=str), profile, self._clock(), RUNNING),
+            )
+            return cur.lastrowid
+
+    def record_item(
+        self,
+        run_id: int,
+        item: str,
+        outcome: str,
+        duration: float,
+        step: str = "",
+        error: str = "",
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO items (run_id, item, step, outcome, duration, error, finished_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, str(item), step, outcome, float(duration), error, self._clock()),
+            )
+
+    def finish_run(self, run_id: int, status: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET ended_at = ?, status = ? WHERE run_id = ?",
+                (self._clock(), status, run_id),
+            )
+
+    # ----- reads -----
+
+    def runs_frame(self, since: Optional[float] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT r.*, COUNT(i.run_id) AS items,"
+                " COALESCE(SUM(i.outcome = 'error'), 0) AS errors"
+                " FROM runs r LEFT JOIN items i ON i.run_id = r.run_id"
+                " WHERE r.started_at >= ?"
+                " GROUP BY r.run_id ORDER BY r.started_at",
+                conn,
+                params=(since or 0,),
+            )
+        return _with_datetimes(df, ["started_at", "ended_at"])
+
+    def items_frame(self, since: Optional[float] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT i.*, r.tool FROM items i JOIN runs r ON r.run_id = i.run_id"
+                " WHERE i.finished_at >= ? ORDER BY i.finished_at",
+                conn,
+                params=(since or 0,),
+            )
+        return _with_datetimes(df, ["finished_at"])
+
+
+def _with_datetimes(df: pd.DataFrame, columns) -> pd.DataFrame:
+    import pandas as pd
+
+    for col in columns:
+        df[col] = pd.to_datetime(df[col], unit="s")
+    return df
+
+
+class RunRecorder:
+    """
+    One run's handle for a backend. Without a RunHistory every call is a
+    no-op, so backends record unconditionally.
+
+        with open_run(history, "user_search", {...}) as run:
+            with run.item("Alice Tan", step="live_search"):
+                ...
+            if stopped:
+                run.status = STOPPED
+    """
+
+    def __init__(self, history: Optional[RunHistory], tool: str, params: Dict, profile: str = ""):
+        self.history = history
+        self.tool = tool
+        self.status = COMPLETED
+        self.run_id = history.start_run(tool, params, profile) if history else None
+
+    def record(
+        self,
+        item: str,
+        outcome: str = SUCCESS,
+        duration: float = 0.0,
+        step: str = "",
+        error: str = "",
+    ) -> None:
+        if self.history is not None:
+            self.history.record_item(self.run_id, item, outcome, duration, step, error)
+
+    @contextmanager
+    def item(self, item: str, step: str = "") -> Iterator["ItemOutcome"]:
+        """Time the block; an exception records an error (and is re-raised)."""
+        outcome = ItemOutcome()
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception as e:
+            self.record(item, ERROR, time.monotonic() - start, step, f"{type(e).__name__}: {e}")
+            raise
+        self.record(item, outcome.outcome, time.monotonic() - start, step, outcome.error)
+
+    def finish(self, status: Optional[str] = None) -> None:
+        if self.history is not None:
+            self.history.finish_run(self.run_id, status or self.status)
+
+    def __enter__(self) -> "RunRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.finish(FAILED if exc_type else None)
+
+
+class ItemOutcome:
+    """Lets the block inside RunRecorder.item() mark a non-exception outcome."""
+
+    def __init__(self):
+        self.outcome = SUCCESS
+        self.error = ""
+
+    def fail(self, error: str = "") -> None:
+        self.outcome, self.error = ERROR, error
+
+    def skip(self, reason: str = "") -> None:
+        self.outcome, self.error = SKIPPED, reason
+
+
+def open_run(
+    history: Optional[RunHistory],
+    tool: str,
+    params: Dict,
+    profile: str = "",
+) -> RunRecorder:
+    return RunRecorder(history, tool, params, profile)
+
+
+# -----------------------------
+# Analytics (for the Run History page)
+# -----------------------------
+
+def run_throughput(runs: pd.DataFrame) -> pd.DataFrame:
+    """Items per minute for each finished run."""
+    done = runs.dropna(subset=["ended_at"]).copy()
+    minutes = (done["ended_at"] - done["started_at"]).dt.total_seconds() / 60
+    done["items_per_min"] = done["items"] / minutes.where(minutes > 0)
+    return done[["run_id", "tool", "started_at", "status", "items", "errors", "items_per_min"]]
+
+
+def latency_percentiles(items: pd.DataFrame, by: str = "tool") -> pd.DataFrame:
+    """p50 / p95 item duration (seconds) per tool or step; errors included."""
+    import pandas as pd
+
+    grouped = items.groupby(by)["duration"]
+    return pd.DataFrame({
+        "items": grouped.size(),
+        "p50_s": grouped.quantile(0.50),
+        "p95_s": grouped.quantile(0.95),
+    }).reset_index()
+
+
+def error_rate_by_step(items: pd.DataFrame) -> pd.DataFrame:
+    rates = (
+        items.assign(is_error=items["outcome"].eq(ERROR))
+        .groupby(["tool", "step"])
+        .agg(items=("is_error", "size"), errors=("is_error", "sum"))
+        .reset_index()
+    )
+    rates["error_rate"] = rates["errors"] / rates["items"]
+    return rates
+
+
+def weekly_trend(items: pd.DataFrame) -> pd.DataFrame:
+    """Per tool and ISO week (starting Monday): items, error rate, median duration."""
+    weekly = (
+        items.assign(
+            week=items["finished_at"].dt.to_period("W-SUN").dt.start_time,
+            is_error=items["outcome"].eq(ERROR),
+        )
+        .groupby(["week", "tool"])
+        .agg(items=("is_error", "size"), error_rate=("is_error", "mean"), p50_s=("duration", "median"))
+        .reset_index()
+    )
+    return weekly
@@ -0,0 +1,177 @@
+# core/run_log.py
+
+from __future__ import annotations
+
+import json
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
+
+from .config import default_data_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "WARNING": 30, "ERROR": 40}
+
+# Column order for rendering; structured fields only appear when set.
+LOG_COLUMNS = ["timestamp", "feature", "level", "message", "item", "step", "duration"]
+
+
+def level_value(level: str) -> int:
+    return LEVELS.get(str(level).upper(), LEVELS["INFO"])
+
+
+def make_log_entry(feature: str, message: str, level: str = "info", **fields) -> Dict:
+    """
+    The one log-entry shape shared by every backend:
+    timestamp / feature / level / message, plus optional structured
+    fields such as item, step and duration (seconds).
+    """
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "feature": feature,
+        "level": level.upper(),
+        "message": message,
+    }
+    entry.update({k: v for k, v in fields.items() if v is not None})
+    return entry
+
+
+def default_log_dir() -> Path:
+    return default_data_dir() / "logs"
+
+
+def new_log_path(prefix: str) -> Path:
+    """Timestamped JSONL file under data/logs, e.g. user_search_20250101_093000.jsonl."""
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return default_log_dir() / f"{prefix}_{stamp}.jsonl"
+
+
+class RunLog:
+    """
+    Bounded log for a page or run.
+
+    - The latest `capacity` entries are kept in memory (a ring buffer),
+      so a long run never grows the page state.
+    - Every accepted entry is also queued to a background thread that
+      appends it to a JSONL file (spill_path), so the full log survives
+      on disk without slowing the caller.
+    - Entries below min_level are dropped.
+
+    add() takes ready-made entries (a backend's log_callback); log()
+    builds one with make_log_entry.
+    """
+
+    def __init__(
+        self,
+        feature: str = "",
+        capacity: int = 500,
+        min_level: str = "INFO",
+        spill_path: Optional[Union[str, Path]] = None,
+        callback: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.feature = feature
+        self.capacity = capacity
+        self.min_level = min_level
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.callback = callback
+        self.total = 0          # entries accepted since creation (incl. evicted)
+        self._buffer: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+
+    # ----- writing -----
+
+    def log(self, message: str, level: str = "info", **fields) -> Optional[Dict]:
+        return self.add(make_log_entry(self.feature, message, level, **fields))
+
+    __call__ = log
+
+    def add(self, entry: Dict) -> Optional[Dict]:
+        if level_value(entry.get("level", "INFO")) < level_value(self.min_level):
+            return None
+
+        with self._lock:
+            self._buffer.append(entry)
+            self.total += 1
+        if self.spill_path is not None:
+            self._spill(entry)
+        if self.callback is not None:
+            self.callback(entry)
+        return entry
+
+    def _spill(self, entry: Dict) -> None:
+        if self._writer is None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+        self._queue.put(entry)
+
+    def _write_loop(self) -> None:
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    self._queue.task_done()
+                    return
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                # Flush once the backlog is drained rather than per line.
+                if self._queue.empty():
+                    f.flush()
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued entry is on disk."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer.clear()
+
+    # ----- reading -----
+
+    @property
+    def dropped(self) -> int:
+        """Entries evicted from memory (still in the spill file)."""
+        return self.total - len(self._buffer)
+
+    def entries(self, last: Optional[int] = None, min_level: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            items = list(self._buffer)
+        if min_level:
+            floor = level_value(min_level)
+            items = [e for e in items if level_value(e.get("level", "INFO")) >= floor]
+        return items[-last:] if last else items
+
+    def frame(self, last: Optional[int] = None, min_level: Optional[str] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        df = pd.DataFrame(self.entries(last, min_level))
+        if df.empty:
+            return df
+        cols = [c for c in LOG_COLUMNS if c in df.columns]
+        return df[cols + [c for c in df.columns if c not in cols]]
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+
+def read_log_file(path: Union[str, Path]) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
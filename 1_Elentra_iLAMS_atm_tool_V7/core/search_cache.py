@@ -0,0 +1,106 @@
+# core/search_cache.py
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+from .config import default_data_dir
+
+DEFAULT_TTL_DAYS = 7
+
+
+def default_cache_path() -> Path:
+    return default_data_dir() / "user_search_cache.sqlite3"
+
+
+class SearchResultCache:
+    """
+    On-disk cache of iLAMS user search results, keyed by the normalised
+    search key (see core.user_query). Each entry holds the parsed result
+    rows (cell texts), so a hit is answered without touching the browser.
+
+    Entries older than ttl_seconds count as stale. They are not returned,
+    and the next live search overwrites them. Failed searches are never
+    cached.
+
+    Each call opens its own SQLite connection, so one cache object can be
+    shared across Streamlit sessions and threads.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        ttl_seconds: float = DEFAULT_TTL_DAYS * 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path) if path else default_cache_path()
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_results ("
+                " search_key TEXT PRIMARY KEY,"
+                " rows_json TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:      # commit / rollback
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[List[List[str]]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT rows_json, fetched_at FROM search_results WHERE search_key = ?",
+                (key,),
+            ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+        if self._clock() - row[1] > self.ttl_seconds:
+            self.stale += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, matches: List[List[str]]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_results (search_key, rows_json, fetched_at)"
+                " VALUES (?, ?, ?)",
+                (key, json.dumps(matches), self._clock()),
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_results")
+
+    def stats(self) -> Dict[str, int]:
+        cutoff = self._clock() - self.ttl_seconds
+        with self._connect() as conn:
+            entries, fresh = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(fetched_at >= ?), 0) FROM search_results",
+                (cutoff,),
+            ).fetchone()
+        return {
+            "entries": entries,
+            "fresh_entries": fresh,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+        }
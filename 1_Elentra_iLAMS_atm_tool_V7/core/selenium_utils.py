@@ -8,6 +8,7 @@ import subprocess
 import socket
 
 from .config import SeleniumConfig, get_config
+from .run_log import make_log_entry
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -23,10 +24,14 @@ LogCallback = Callable[[Dict], None]
 ProgressCallback = Callable[[int, int], None]
 
 
-def launch_chrome_with_debug(port=9222, retries=3, delay=1) -> bool:
+def launch_chrome_with_debug(port=9222, retries=3, delay=1, profile_dir: Optional[str] = None) -> bool:
     """
     Launch Google Chrome with remote debugging enabled.
     Supports macOS, Windows, Linux.
+
+    profile_dir is Chrome's --user-data-dir (default: ~/chrome-debug-profile).
+    Each debugger port needs its own, since Chrome hands a second launch
+    on the same profile to the instance already running.
     """
 
     # --- DETECT OS ---
@@ -36,10 +41,11 @@ def launch_chrome_with_debug(port=9222, retries=3, delay=1) -> bool:
 
     # --- BUILD COMMAND PER OS ---
     if is_mac:
-        # macOS: using "open -a"
-        profile_dir = os.path.expanduser("~/chrome-debug-profile")
+        # macOS: using "open -a" ("-n" starts a second Chrome for its own profile)
+        open_flags = ["-n", "-a"] if profile_dir else ["-a"]
+        profile_dir = profile_dir or os.path.expanduser("~/chrome-debug-profile")
         launch_cmd = [
-            "open", "-a", "Google Chrome",
+            "open", *open_flags, "Google Chrome",
             "--args",
             f"--remote-debugging-port={port}",
             f"--user-data-dir={profile_dir}",
@@ -48,7 +54,7 @@ def launch_chrome_with_debug(port=9222, retries=3, delay=1) -> bool:
     else:
         # Windows command
         chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-        profile_dir = os.path.expanduser(r"~\chrome-debug-profile")
+        profile_dir = profile_dir or os.path.expanduser(r"~\chrome-debug-profile")
 
         launch_cmd = [
             chrome_path,
@@ -97,15 +103,6 @@ def default_progress_callback(current: int, total: int) -> None:
     pass
 
 
-def make_log_entry(feature: str, message: str, level: str = "info") -> Dict:
-    return {
-        "timestamp": datetime.now().isoformat(timespec="seconds"),
-        "feature": feature,
-        "level": level.upper(),
-        "message": message,
-    }
-
-
 def get_driver(
     config: Optional[SeleniumConfig] = None,
 ):
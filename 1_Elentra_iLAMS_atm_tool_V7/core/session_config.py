@@ -0,0 +1,63 @@
+# core/session_config.py
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import streamlit as st
+
+from .config import SeleniumConfig, get_config
+
+SESSION_KEY = "selenium_config"
+LEASE_KEY = "lease_chrome_per_run"
+# How long a run queues for a free Chrome before giving up.
+LEASE_TIMEOUT_S = 15 * 60
+
+
+def session_config() -> SeleniumConfig:
+    """
+    This browser session's config snapshot, seeded from the process
+    default. Pages pass it to the backends, so one operator's "Save Config"
+    never changes another operator's run.
+    """
+    config = st.session_state.get(SESSION_KEY)
+    if not isinstance(config, SeleniumConfig):
+        config = get_config()
+        st.session_state[SESSION_KEY] = config
+    return config
+
+
+def set_session_config(config: SeleniumConfig) -> SeleniumConfig:
+    st.session_state[SESSION_KEY] = config
+    return config
+
+
+@contextmanager
+def run_config(
+    job: str,
+    stop_flag: Callable[[], bool] = lambda: False,
+    timeout: float = LEASE_TIMEOUT_S,
+) -> Iterator[SeleniumConfig]:
+    """
+    The config a page's run should use. With "one Chrome per run" switched
+    on (Home), the run leases its own debugger port and Chrome profile from
+    the shared pool, queueing while every port is busy, and gives it back
+    when the run ends. Otherwise this is just the session snapshot.
+
+    The queue is left with PortLeaseTimeout after timeout seconds or once
+    stop_flag() is set; pages show it as an error.
+    """
+    config = session_config()
+    if not st.session_state.get(LEASE_KEY, False):
+        yield config
+        return
+
+    from .debug_ports import leased_chrome
+
+    notice = st.empty()
+
+    def on_wait(position: int) -> None:
+        notice.info(f"Every Chrome debug port is in use — queued ({position} waiting).")
+
+    with leased_chrome(job, config, timeout=timeout, on_wait=on_wait, should_stop=stop_flag) as leased:
+        notice.caption(f"This run uses Chrome on {leased.debugger_address}.")
+        yield leased
@@ -0,0 +1,175 @@
+# core/session_supervisor.py
+
+import socket
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple, Union
+
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchWindowException,
+    WebDriverException,
+)
+
+from .config import SeleniumConfig, debugger_port, get_config
+from .selenium_utils import get_driver, launch_chrome_with_debug
+
+# Substrings chromedriver uses when the browser side has gone away
+DEAD_SESSION_MARKERS = (
+    "invalid session id",
+    "no such window",
+    "target window already closed",
+    "web view not found",
+    "tab crashed",
+    "session deleted",
+    "chrome not reachable",
+    "disconnected",
+    "cannot connect to chrome",
+    "unable to receive message from renderer",
+)
+
+
+def is_dead_session_error(exc: BaseException) -> bool:
+    """
+    True if exc means the Selenium session itself is unusable, as opposed
+    to an ordinary page problem such as a missing element or a timeout.
+    Covers a chromedriver process that has exited (connection refused), a
+    crashed or closed tab and a Chrome debugger port that is gone. A read
+    timeout from a slow page is not a dead session.
+    """
+    if isinstance(exc, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    # Connection-level failures only: a ReadTimeoutError is a slow page.
+    if isinstance(exc, (ConnectionError, NewConnectionError, MaxRetryError, ProtocolError)):
+        return True
+    if isinstance(exc, WebDriverException):
+        msg = (exc.msg or str(exc)).lower()
+        return any(marker in msg for marker in DEAD_SESSION_MARKERS)
+    return False
+
+
+# Either a URL to reopen, or a callable(driver, wait) that rebuilds the page
+ResumeTarget = Union[str, Callable[[Any, Any], Any], None]
+
+
+def debugger_port_open(debugger_address: str, timeout: float = 1.0) -> bool:
+    host, _, port = debugger_address.rpartition(":")
+    try:
+        with socket.create_connection((host or "127.0.0.1", int(port)), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+class DriverSupervisor:
+    """
+    Owns the Selenium session for a backend run and brings it back when
+    the browser dies mid-run.
+
+    Backends run each item through run_item(). If the item fails because
+    the session is dead, the supervisor relaunches Chrome if the debugger
+    port has gone, re-attaches a fresh driver, restores the page (resume)
+    and runs the same item again. Any other exception propagates unchanged
+    so the backend's own per-item error handling still applies.
+
+    Steps that must not simply be replayed (e.g. a destructive click) can
+    catch the exception themselves and call try_recover() instead.
+
+    max_recoveries caps consecutive recoveries without a successful item,
+    so a browser that will not come back ends the run instead of looping.
+    """
+
+    _relaunch_lock = threading.Lock()
+
+    def __init__(
+        self,
+        config: Optional[SeleniumConfig] = None,
+        driver_factory: Callable = get_driver,
+        log: Callable[..., None] = lambda msg, level="info": None,
+        max_recoveries: int = 3,
+        relaunch_chrome: bool = True,
+        recovery_delay: float = 2.0,
+    ):
+        self.config = config or get_config()
+        self.driver_factory = driver_factory
+        self.log = log
+        self.max_recoveries = max_recoveries
+        self.relaunch_chrome = relaunch_chrome
+        self.recovery_delay = recovery_delay
+        self.recoveries = 0
+        self._consecutive = 0
+        self.driver = None
+        self.wait = None
+
+    def attach(self) -> Tuple[Any, Any]:
+        self.driver, self.wait = self.driver_factory(self.config)
+        return self.driver, self.wait
+
+    def recover(self, resume: ResumeTarget = None) -> Tuple[Any, Any]:
+        self.recoveries += 1
+        self.log(f"♻️ Browser session lost — recovering (#{self.recoveries}).", "warn")
+
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+        address = self.config.debugger_address
+        with self._relaunch_lock:
+            if self.relaunch_chrome and not debugger_port_open(address):
+                port = debugger_port(address)
+                self.log(f"Chrome debugger port {port} is gone — relaunching Chrome.", "warn")
+                launch_chrome_with_debug(port=port, profile_dir=self.config.chrome_profile_dir)
+
+        time.sleep(self.recovery_delay)
+        self.attach()
+        self.log("Re-attached to Chrome.", "info")
+
+        if isinstance(resume, str):
+            self.driver.get(resume)
+            self.log(f"Restored page: {resume}", "info")
+        elif resume is not None:
+            resume(self.driver, self.wait)
+            self.log("Restored page.", "info")
+
+        return self.driver, self.wait
+
+    def try_recover(self, exc: BaseException, resume: ResumeTarget = None) -> bool:
+        """Recover if exc is a dead session and the budget allows; report success."""
+        if not is_dead_session_error(exc) or self._consecutive >= self.max_recoveries:
+            return False
+        self._consecutive += 1
+        try:
+            self.recover(resume)
+            return True
+        except Exception as e:
+            self.log(f"Recovery failed: {e}", "error")
+            return False
+
+    def run_item(self, fn: Callable[[Any, Any], Any], resume: ResumeTarget = None) -> Any:
+        """Call fn(driver, wait), recovering and retrying on a dead session."""
+        while True:
+            try:
+                if self.driver is None:
+                    self.attach()
+                result = fn(self.driver, self.wait)
+                self._consecutive = 0
+                return result
+            except Exception as e:
+                if not is_dead_session_error(e) or self._consecutive >= self.max_recoveries:
+                    raise
+                self._consecutive += 1
+                try:
+                    self.recover(resume)
+                except Exception as re:
+                    self.log(f"Recovery failed: {re}", "error")
+
+    def quit(self) -> None:
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
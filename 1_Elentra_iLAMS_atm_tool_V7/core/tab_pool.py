@@ -0,0 +1,161 @@
+# core/tab_pool.py
+
+import queue
+import threading
+from dataclasses import dataclass, replace
+from typing import Any, Callable, List, Optional
+
+from .config import SeleniumConfig, get_config
+from .selenium_utils import ProgressCallback, default_progress_callback, get_driver
+from .session_supervisor import DriverSupervisor
+
+
+@dataclass
+class TabContext:
+    """Everything a worker needs to drive its own tab."""
+    worker_id: str
+    supervisor: DriverSupervisor
+    log: Callable[..., None]
+    should_stop: Callable[[], bool]
+
+    @property
+    def driver(self):
+        return self.supervisor.driver
+
+    @property
+    def wait(self):
+        return self.supervisor.wait
+
+
+# worker_fn(ctx, index, item) -> result
+TabWorkerFn = Callable[[TabContext, int, Any], Any]
+
+
+def run_in_tabs(
+    items: List[Any],
+    worker_fn: TabWorkerFn,
+    workers: int,
+    log: Callable[..., None],
+    progress_callback: ProgressCallback = default_progress_callback,
+    stop_flag: Callable[[], bool] = lambda: False,
+    config: Optional[SeleniumConfig] = None,
+    debugger_addresses: Optional[List[str]] = None,
+    driver_factory: Callable = get_driver,
+) -> List[Any]:
+    """
+    Process items across several Chrome tabs in parallel.
+
+    Each worker attaches its own Selenium session (so each tab has its own
+    driver and WebDriverWait), opens a fresh tab and pulls items from a shared
+    queue until it is empty. With debugger_addresses, workers are spread
+    round-robin across several Chrome instances instead of one.
+
+    Every tab has its own DriverSupervisor; worker_fn can wrap its steps in
+    ctx.supervisor.run_item() to survive a crashed tab.
+
+    Workers never touch the callbacks directly: their logs and results are
+    funnelled back to the calling thread, which tags each message with the
+    worker id, reports progress and polls stop_flag. This keeps Streamlit
+    callbacks on the script thread.
+
+    Returns one result per item, in item order (None if not processed).
+    """
+    if config is None:
+        config = get_config()
+
+    total = len(items)
+    results: List[Any] = [None] * total
+    if total == 0:
+        return results
+
+    addresses = debugger_addresses or [config.debugger_address]
+    n_workers = max(1, min(workers, total))
+
+    todo: "queue.Queue" = queue.Queue()
+    for index, item in enumerate(items):
+        todo.put((index, item))
+
+    events: "queue.Queue" = queue.Queue()
+    stop_event = threading.Event()
+
+    def worker(n: int) -> None:
+        worker_id = f"W{n + 1}"
+
+        def worker_log(msg: str, level: str = "info", **fields):
+            events.put(("log", worker_id, msg, level, fields))
+
+        worker_config = replace(config, debugger_address=addresses[n % len(addresses)])
+
+        def open_tab(cfg: SeleniumConfig):
+            driver, wait = driver_factory(cfg)
+            driver.switch_to.new_window("tab")
+            return driver, wait
+
+        # A recovered session gets a fresh tab of its own as well
+        supervisor = DriverSupervisor(worker_config, driver_factory=open_tab, log=worker_log)
+        try:
+            supervisor.attach()
+        except Exception as e:
+            worker_log(f"Failed to open tab on {worker_config.debugger_address}: {e}", "error")
+            return
+
+        worker_log(f"Opened tab on {worker_config.debugger_address}.")
+        ctx = TabContext(worker_id, supervisor, worker_log, stop_event.is_set)
+
+        try:
+            while not stop_event.is_set():
+                try:
+                    index, item = todo.get_nowait()
+                except queue.Empty:
+                    break
+                events.put(("done", index, worker_fn(ctx, index, item)))
+        finally:
+            try:
+                ctx.driver.close()
+                supervisor.quit()
+            except Exception:
+                pass
+            worker_log("Tab closed.")
+
+    threads = [
+        threading.Thread(target=worker, args=(n,), daemon=True)
+        for n in range(n_workers)
+    ]
+    for t in threads:
+        t.start()
+
+    log(f"Started {n_workers} parallel tab worker(s) for {total} item(s).")
+
+    completed = 0
+    while completed < total:
+        if not stop_event.is_set() and stop_flag():
+            stop_event.set()
+            log("🛑 Stop requested — workers will halt after their current item.")
+
+        try:
+            event = events.get(timeout=0.2)
+        except queue.Empty:
+            if not any(t.is_alive() for t in threads) and events.empty():
+                break
+            continue
+
+        if event[0] == "log":
+            _, worker_id, msg, level, fields = event
+            log(f"[{worker_id}] {msg}", level, **fields)
+        else:
+            _, index, result = event
+            results[index] = result
+            completed += 1
+            progress_callback(completed, total)
+
+    for t in threads:
+        t.join()
+
+    # Drain anything posted after the last result (e.g. "Tab closed.")
+    while not events.empty():
+        event = events.get_nowait()
+        if event[0] == "log":
+            _, worker_id, msg, level, fields = event
+            log(f"[{worker_id}] {msg}", level, **fields)
+
+    return results
@@ -0,0 +1,282 @@
+# core/user_directory.py
+
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .config import default_data_dir
+from .user_query import clean_search_term
+
+# Result row layout shared with the live search: [User ID, Login, First Name, Last Name]
+UserRow = List[str]
+
+
+def default_directory_path() -> Path:
+    return default_data_dir() / "user_directory.sqlite3"
+
+
+class UserDirectory:
+    """
+    Local snapshot of the iLAMS admin user list (ID, login, first, last name),
+    filled by backend_2's crawl_user_directory.
+
+    Rows are upserted by user ID, so a refresh only ever adds or updates
+    users. The time of the last completed crawl is kept to judge whether
+    the snapshot is fresh enough to trust a local "not found".
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path) if path else default_directory_path()
+        self._clock = clock
+        self._index: Optional["FuzzyNameIndex"] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " user_id INTEGER PRIMARY KEY,"
+                " login TEXT NOT NULL,"
+                " first_name TEXT NOT NULL,"
+                " last_name TEXT NOT NULL,"
+                " seen_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS users_login ON users (login COLLATE NOCASE)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:      # commit / rollback
+                yield conn
+        finally:
+            conn.close()
+
+    # ----- writes -----
+
+    def upsert(self, rows: Iterable[UserRow]) -> int:
+        """Insert or update users; returns how many user IDs were new."""
+        now = self._clock()
+        records = []
+        for r in rows:
+            if not r or not str(r[0]).strip().isdigit():
+                continue
+            padded = list(r) + [""] * 4
+            records.append((int(r[0]), padded[1], padded[2], padded[3], now))
+
+        if not records:
+            return 0
+
+        ids = sorted({r[0] for r in records})
+        with self._connect() as conn:
+            known = set()
+            for start in range(0, len(ids), 500):     # stay under SQLite's variable limit
+                chunk = ids[start:start + 500]
+                known.update(
+                    row[0] for row in conn.execute(
+                        f"SELECT user_id FROM users WHERE user_id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (user_id, login, first_name, last_name, seen_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+
+        self._index = None
+        return len(set(ids) - known)
+
+    def mark_refreshed(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('refreshed_at', ?)",
+                (str(self._clock()),),
+            )
+
+    # ----- reads -----
+
+    def last_refreshed(self) -> Optional[float]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'refreshed_at'").fetchone()
+        return float(row[0]) if row else None
+
+    def is_fresh(self, max_age_seconds: float) -> bool:
+        refreshed = self.last_refreshed()
+        return refreshed is not None and self._clock() - refreshed <= max_age_seconds
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def all_users(self) -> List[UserRow]:
+        with self._connect() as conn:
+            return [
+                [str(uid), login, first, last]
+                for uid, login, first, last in conn.execute(
+                    "SELECT user_id, login, first_name, last_name FROM users ORDER BY user_id"
+                )
+            ]
+
+    def lookup_login(self, login: str) -> List[UserRow]:
+        """Exact (case-insensitive) login match, for email/login queries."""
+        with self._connect() as conn:
+            return [
+                [str(uid), lg, first, last]
+                for uid, lg, first, last in conn.execute(
+                    "SELECT user_id, login, first_name, last_name FROM users"
+                    " WHERE login = ? COLLATE NOCASE ORDER BY user_id",
+                    (login.strip(),),
+                )
+            ]
+
+    def fuzzy_index(self) -> "FuzzyNameIndex":
+        """Index over the current snapshot, rebuilt only after an upsert."""
+        if self._index is None:
+            self._index = FuzzyNameIndex(self.all_users())
+        return self._index
+
+
+# -----------------------------
+# Fuzzy name matching
+# -----------------------------
+
+def _normalise(text: str) -> str:
+    return clean_search_term(text).casefold()
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance (insert / delete / substitute, cost 1 each)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a: str, b: str) -> float:
+    if not a and not b:
+        return 1.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+@dataclass
+class FuzzyMatch:
+    score: float
+    user: UserRow
+
+
+class FuzzyNameIndex:
+    """
+    Trigram inverted index over user names and logins, with edit-distance
+    scoring of the shortlisted candidates.
+
+    Each user is indexed under "first last", "last first" and the login,
+    so "Tan Alice", "alice tan" and "atan@ntu.edu.sg" all find the same
+    person. A query first shortlists users sharing its rarest trigrams,
+    then scores only that shortlist.
+    """
+
+    def __init__(self, users: List[UserRow], probe_trigrams: int = 8, shortlist: int = 25):
+        self.users = users
+        self.probe_trigrams = probe_trigrams
+        self.shortlist = shortlist
+        self._texts: List[Tuple[int, str]] = []          # (user index, text)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+        for u_idx, (_, login, first, last) in enumerate(users):
+            first, last, login = _normalise(first), _normalise(last), _normalise(login)
+            for text in {f"{first} {last}".strip(), f"{last} {first}".strip(), login}:
+                if not text:
+                    continue
+                t_idx = len(self._texts)
+                self._texts.append((u_idx, text))
+                for gram in _trigrams(text):
+                    self._postings[gram].append(t_idx)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def search(self, query: str, limit: int = 5) -> List[FuzzyMatch]:
+        q = _normalise(query)
+        if not q:
+            return []
+
+        grams = sorted(
+            (g for g in _trigrams(q) if g in self._postings),
+            key=lambda g: len(self._postings[g]),
+        )[: self.probe_trigrams]
+
+        hits: Counter = Counter()
+        for gram in grams:
+            hits.update(self._postings[gram])
+
+        best: Dict[int, float] = {}
+        for t_idx, _ in hits.most_common(self.shortlist):
+            u_idx, text = self._texts[t_idx]
+            score = similarity(q, text)
+            if score > best.get(u_idx, 0.0):
+                best[u_idx] = score
+
+        ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [FuzzyMatch(score, self.users[u_idx]) for u_idx, score in ranked]
+
+
+# -----------------------------
+# Resolution policy
+# -----------------------------
+
+RESOLVED = "resolved"   # answered locally
+CONFIRM = "confirm"     # borderline: confirm with a live search
+
+
+def resolve_locally(
+    index: FuzzyNameIndex,
+    query: str,
+    accept: float = 0.92,
+    borderline: float = 0.75,
+    trust_not_found: bool = False,
+) -> Tuple[str, List[UserRow]]:
+    """
+    Decide whether a query can be answered from the snapshot.
+
+    - Every candidate scoring >= accept becomes a match (one → "Exist",
+      several → "Acc >1"), and no browser is needed, as long as no other
+      candidate sits in the borderline band (the live search would likely
+      return it too).
+    - No candidate >= borderline and trust_not_found (a fresh snapshot)
+      → resolved as "Acc Not Found".
+    - Anything else → CONFIRM with a live search.
+    """
+    matches = index.search(query)
+    confident = [m.user for m in matches if m.score >= accept]
+    near = [m for m in matches if borderline <= m.score < accept]
+
+    if confident and not near:
+        return RESOLVED, confident
+    if not confident and not near and trust_not_found:
+        return RESOLVED, []
+    return CONFIRM, []
@@ -0,0 +1,117 @@
+# core/user_query.py
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# (Private), (TTSH), [Adjunct] ... anywhere in the input
+BRACKETS_RE = re.compile(r"\s*[\(\[][^\)\]]*[\)\]]")
+WHITESPACE_RE = re.compile(r"\s+")
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# one token with a digit (tkoh001) or two or more dots, dashes or
+# underscores (lkc-dl-lams); a single one is usually a name: Jean-Luc, Mary.Ann
+LOGIN_RE = re.compile(r"^(?=.*\d|(?:.*[._-]){2})[a-z0-9][a-z0-9._-]*$", re.IGNORECASE)
+
+# Query kinds
+EMAIL = "email"
+LOGIN = "login"
+NAME = "name"
+EXACT_KINDS = (EMAIL, LOGIN)
+
+
+def clean_search_term(raw: str) -> str:
+    """
+    Turn a pasted line into the text typed into iLAMS: Unicode-normalised
+    (NFKC, so full-width letters and non-breaking spaces become plain
+    ones), bracketed suffixes stripped, whitespace collapsed, and emails
+    lower-cased.
+    """
+    term = unicodedata.normalize("NFKC", raw)
+    term = BRACKETS_RE.sub("", term)
+    term = WHITESPACE_RE.sub(" ", term).strip()
+    if "@" in term:
+        term = term.replace(" ", "").lower()
+    return term
+
+
+def classify_query(term: str) -> str:
+    """
+    EMAIL or LOGIN for inputs that identify one account exactly (answered
+    by an exact login match), NAME for free text that needs a search.
+    """
+    if EMAIL_RE.match(term):
+        return EMAIL
+    if LOGIN_RE.match(term):
+        return LOGIN
+    return NAME
+
+
+def search_key(raw: str) -> str:
+    """Identity of a search: inputs with the same key return the same iLAMS rows."""
+    return clean_search_term(raw).casefold()
+
+
+@dataclass
+class QueryPlan:
+    """
+    Pasted inputs collapsed to one search per unique key.
+
+    inputs/keys are parallel lists, one entry per non-empty input line, in
+    paste order. terms maps each key to the text that will be searched
+    (taken from the first input with that key); counts to how many inputs
+    share it; kinds to its query kind (see classify_query).
+    """
+    inputs: List[str] = field(default_factory=list)
+    keys: List[str] = field(default_factory=list)
+    terms: Dict[str, str] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+    kinds: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def unique_keys(self) -> List[str]:
+        return list(self.terms)
+
+    def is_exact(self, key: str) -> bool:
+        return self.kinds[key] in EXACT_KINDS
+
+    @property
+    def exact_keys(self) -> List[str]:
+        return [k for k in self.terms if self.is_exact(k)]
+
+    @property
+    def name_keys(self) -> List[str]:
+        return [k for k in self.terms if not self.is_exact(k)]
+
+    @property
+    def routed_keys(self) -> List[str]:
+        """Unique keys in run order: exact email/login lookups first, then names."""
+        return self.exact_keys + self.name_keys
+
+    @property
+    def duplicates(self) -> int:
+        return len(self.inputs) - len(self.terms)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of inputs answered by another input's search."""
+        return self.duplicates / len(self.inputs) if self.inputs else 0.0
+
+
+def plan_queries(search_values: List[str]) -> QueryPlan:
+    plan = QueryPlan()
+    for raw in search_values:
+        original = raw.strip()
+        if not original:
+            continue
+        term = clean_search_term(original)
+        if not term:
+            continue
+        key = term.casefold()
+        plan.inputs.append(original)
+        plan.keys.append(key)
+        if key not in plan.terms:
+            plan.terms[key] = term
+            plan.kinds[key] = classify_query(term)
+        plan.counts[key] = plan.counts.get(key, 0) + 1
+    return plan
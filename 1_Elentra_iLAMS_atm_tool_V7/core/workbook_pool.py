@@ -0,0 +1,286 @@
+# core/workbook_pool.py
+"""
+Renders a package's workbooks, serially or across a process pool, and
+adds them to the ZIP in the order the jobs were produced.
+
+Every per-user / per-course workbook is independent, so on a multi-core
+machine they can be rendered side by side. Jobs are consumed lazily and
+only a small window of them is in flight at once, so a large cohort is
+never held in memory as a whole. The archive's entry order does not
+depend on which worker finishes first.
+
+Streamlit Cloud runs on one core; there (or for small packages) the
+same loop runs in-process without starting a pool.
+
+OutputPlan decides the file format and splits any workbook over the
+format's row limit (65,535 data rows for .xls) into numbered parts
+before anything is rendered.
+"""
+
+import csv
+import io
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .package_cache import workbook_key
+from .package_zip import PackageZip
+from .run_history import ERROR, SUCCESS, RunRecorder
+from .xls_writer import MAX_ROWS as XLS_MAX_ROWS, write_columns
+
+# Below this many cells in total a pool costs more to start than it saves.
+PARALLEL_MIN_CELLS = 50_000
+# Jobs in flight per worker.
+WINDOW_PER_WORKER = 2
+
+# Data rows per file (under the header row); None = no limit.
+FORMAT_MAX_ROWS = {
+    "xls": XLS_MAX_ROWS - 1,
+    "xlsx": 1_048_575,
+    "csv": None,
+}
+
+
+@dataclass
+class WorkbookJob:
+    """One .xls file of a package: where it goes and what is in it."""
+    fname: str
+    item: str
+    step: str
+    columns: List[str]
+    data: List[List[Any]]
+    fmt: str = "xls"
+    part: int = 1
+    parts: int = 1
+    # What data was built from (see core.package_cache.workbook_key);
+    # jobs without one are never cached.
+    source: Any = None
+
+    @classmethod
+    def from_frame(cls, fname: str, item: str, step: str, df, **kwargs) -> "WorkbookJob":
+        return cls(fname, item, step, list(df.columns), [df[c].tolist() for c in df.columns], **kwargs)
+
+    @property
+    def rows(self) -> int:
+        return len(self.data[0]) if self.data else 0
+
+    @property
+    def cells(self) -> int:
+        return len(self.columns) * self.rows
+
+
+@dataclass(frozen=True)
+class OutputPlan:
+    """
+    File format of a package's workbooks and the most data rows one file
+    may hold. max_rows=None means the format's own limit; a lower value
+    splits files sooner (e.g. for an importer with a smaller cap).
+    """
+    fmt: str = "xls"
+    max_rows: Optional[int] = None
+
+    def __post_init__(self):
+        if self.fmt not in FORMAT_MAX_ROWS:
+            raise ValueError(f"Unknown output format: {self.fmt!r} (use one of {', '.join(FORMAT_MAX_ROWS)}).")
+        limit = FORMAT_MAX_ROWS[self.fmt]
+        if self.max_rows is not None:
+            if self.max_rows < 1:
+                raise ValueError("max_rows must be at least 1.")
+            if limit is not None and self.max_rows > limit:
+                raise ValueError(f".{self.fmt} files hold at most {limit:,} data rows.")
+
+    @property
+    def row_limit(self) -> Optional[int]:
+        return self.max_rows if self.max_rows is not None else FORMAT_MAX_ROWS[self.fmt]
+
+    def parts(self, rows: int) -> int:
+        """How many files a workbook of rows data rows is written as."""
+        if self.row_limit is None or rows <= self.row_limit:
+            return 1
+        return math.ceil(rows / self.row_limit)
+
+    def file_name(self, fname: str, part: int = 1, parts: int = 1) -> str:
+        """fname with this format's extension and, when split, _partXofY."""
+        stem = fname.rsplit(".", 1)[0]
+        if parts > 1:
+            stem = f"{stem}_part{part}of{parts}"
+        return f"{stem}.{self.fmt}"
+
+    def jobs(self, fname: str, item: str, step: str, df, source: Any = None) -> Iterator[WorkbookJob]:
+        """
+        One job per file of df, splitting it into parts if needed. source
+        describes what df was built from; each part's job gets it along
+        with the part's place in the split.
+        """
+        parts = self.parts(len(df))
+        size = self.row_limit or len(df)
+        for part in range(1, parts + 1):
+            chunk = df.iloc[(part - 1) * size:part * size] if parts > 1 else df
+            yield WorkbookJob.from_frame(
+                self.file_name(fname, part, parts), item, step, chunk,
+                fmt=self.fmt, part=part, parts=parts,
+                source=None if source is None else [source, self.row_limit, part],
+            )
+
+
+def default_workers() -> int:
+    """CPUs this process may run on (1 on Streamlit Cloud)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:      # macOS / Windows
+        return os.cpu_count() or 1
+
+
+class _InlineExecutor(Executor):
+    """Runs each job on submit; the serial fallback."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _rows(columns: Sequence[str], data: Sequence[Sequence[Any]]) -> Iterator[Tuple]:
+    yield tuple(columns)
+    yield from zip(*data)
+
+
+def render_file(columns: Sequence[str], data: Sequence[Sequence[Any]], fmt: str = "xls") -> Tuple[bytes, float]:
+    """One file's bytes plus the time taken; the entry point for pool workers."""
+    start = time.perf_counter()
+    if fmt == "xls":
+        out = write_columns(columns, data)
+    elif fmt == "csv":
+        buf = io.StringIO(newline="")
+        csv.writer(buf).writerows(_rows(columns, data))
+        out = buf.getvalue().encode("utf-8")
+    elif fmt == "xlsx":
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        for row in _rows(columns, data):
+            ws.append([None if v == "" else v for v in row])
+        buf = io.BytesIO()
+        wb.save(buf)
+        out = buf.getvalue()
+    else:
+        raise ValueError(f"Unknown output format: {fmt!r}")
+    return out, time.perf_counter() - start
+
+
+def _executor(workers: int) -> Executor:
+    if workers <= 1:
+        return _InlineExecutor()
+    # spawn, not fork: the Streamlit server has threads running.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def shared_executor(workers: Optional[int] = None) -> Executor:
+    """
+    A pool to hand to several render_into calls (e.g. the packages of a
+    batch), so it is started once. The caller shuts it down.
+    """
+    return _executor(default_workers() if workers is None else workers)
+
+
+def render_into(
+    package: PackageZip,
+    jobs: Iterable[WorkbookJob],
+    run: RunRecorder,
+    workers: Optional[int] = None,
+    cache=None,
+    executor: Optional[Executor] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    total: int = 0,
+) -> int:
+    """
+    Render jobs and add each workbook to package in job order, recording
+    one run-history item per workbook. workers=None picks default_workers();
+    1 renders serially. With a PackageCache, workbooks whose source was
+    rendered before are taken from it instead. executor: a shared_executor()
+    to render in instead of starting a pool here; it is left running.
+    progress(written, total) is called after each file is added; total is
+    the expected file count (raised if more files turn up).
+    Returns the number of workbooks written.
+    """
+    if workers is None:
+        workers = default_workers()
+
+    jobs = iter(jobs)
+    if workers > 1:
+        # Look ahead far enough to tell whether a pool is worth starting.
+        head: List[WorkbookJob] = []
+        cells = 0
+        for job in jobs:
+            head.append(job)
+            cells += job.cells
+            if cells >= PARALLEL_MIN_CELLS and len(head) > 1:
+                break
+        if cells < PARALLEL_MIN_CELLS or len(head) < 2:
+            workers = 1
+        jobs = itertools.chain(head, jobs)
+
+    # Serially a job is rendered on submit, so keep one workbook at a time.
+    window = 1 if workers <= 1 else workers * WINDOW_PER_WORKER
+    pending: deque = deque()
+    written = 0
+
+    def write_next() -> None:
+        nonlocal written
+        _write_next(package, pending, run, cache)
+        written += 1
+        if progress:
+            progress(written, max(total, written))
+
+    if executor is not None and workers > 1:
+        pool = nullcontext(executor)
+    else:
+        pool = _executor(workers)
+
+    with pool as executor:
+        for job in jobs:
+            key = cached = None
+            if cache is not None and job.source is not None:
+                key = workbook_key(job.fmt, job.source)
+                cached = cache.get_workbook(key)
+            if cached is not None:
+                future = Future()
+                future.set_result((cached, 0.0))
+            else:
+                future = executor.submit(render_file, job.columns, job.data, job.fmt)
+            pending.append((job, future, key if cached is None else None))
+            if len(pending) >= window:
+                write_next()
+        while pending:
+            write_next()
+    if progress and written < total:
+        # Fewer files than expected (e.g. a delta): the run is still complete.
+        progress(written, written)
+    return written
+
+
+def _write_next(package: PackageZip, pending: deque, run: RunRecorder, cache=None) -> None:
+    # key is set only for freshly rendered workbooks that should be cached.
+    job, future, key = pending.popleft()
+    try:
+        xls, seconds = future.result()
+    except Exception as e:
+        run.record(job.item, ERROR, 0.0, job.step, f"{type(e).__name__}: {e}")
+        for _, other, _ in pending:
+            other.cancel()
+        raise
+    run.record(job.item, SUCCESS, seconds, job.step)
+    package.add(job.fname, xls)
+    if key is not None:
+        cache.put_workbook(key, xls)
@@ -0,0 +1,197 @@
+# core/xls_writer.py
+"""
+Fast .xls writer for the iLAMS upload workbooks.
+
+xlwt's ws.write() resolves the cell style, type-checks the value and
+builds a cell object for every single cell, and save() then re-encodes
+each cell into BIFF records. The upload sheets are plain tables of
+strings and blanks, so this writer takes the data as column arrays and,
+per row, packs the BIFF cell records itself with one precomputed XF
+(style) index and a per-workbook cache of shared-string (SST) indices
+for repeated values such as "learner", "yes" or "Australia".
+
+The header row is packed once per column layout (XlsTemplate) and reused
+by every workbook with that layout.
+
+Cell types match ws.write(): non-empty str -> text, "" / None -> blank,
+int / float -> number. Any other value (bool, dates, ...) sends its row
+through ws.write() unchanged.
+"""
+
+import gc
+from functools import lru_cache
+from io import BytesIO
+from struct import pack
+from typing import Any, Dict, List, Sequence, Tuple
+
+import xlwt
+
+# BIFF8 record ids
+LABELSST = 0x00FD
+BLANK = 0x0201
+MULBLANK = 0x00BE
+NUMBER = 0x0203
+
+MAX_ROWS = 65536        # .xls sheet limit, header included
+MAX_COLS = 256
+
+
+class _PackedCells:
+    """
+    Pre-packed BIFF records for a run of cells, stored on the row as the
+    cell of its first column; xlwt writes them out verbatim.
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def get_biff_data(self) -> bytes:
+        return self.data
+
+
+def _packable(value: Any) -> bool:
+    t = type(value)
+    return t is str or t is int or t is float or value is None
+
+
+def _pack_cells(rowx: int, values: Sequence[Any], xf: int, sst: Dict[str, int], add_str) -> bytes:
+    """
+    BIFF records for values[0 .. n-1] of one row. Runs of blanks become a
+    single MULBLANK record, as xlwt itself does.
+    """
+    pieces = []
+    n = len(values)
+    colx = 0
+    while colx < n:
+        value = values[colx]
+        if value is None or value == "":
+            end = colx
+            while end + 1 < n and (values[end + 1] is None or values[end + 1] == ""):
+                end += 1
+            if end == colx:
+                pieces.append(pack("<5H", BLANK, 6, rowx, colx, xf))
+            else:
+                count = end - colx + 1
+                pieces.append(pack("<4H", MULBLANK, 2 * count + 6, rowx, colx))
+                pieces.append(pack(f"<{count}H", *([xf] * count)))
+                pieces.append(pack("<H", end))
+            colx = end + 1
+            continue
+
+        if type(value) is str:
+            idx = sst.get(value)
+            if idx is None:
+                # Only the first occurrence goes through the SST; the
+                # total-reference count in the SST header is not used by
+                # readers.
+                idx = sst[value] = add_str(value)
+            pieces.append(pack("<5HL", LABELSST, 10, rowx, colx, xf, idx))
+        else:
+            pieces.append(pack("<5Hd", NUMBER, 14, rowx, colx, xf, value))
+        colx += 1
+    return b"".join(pieces)
+
+
+class XlsTemplate:
+    """
+    A column layout: header strings plus the header row pre-packed for a
+    fresh workbook (where the header strings are always SST entries
+    0, 1, 2, ... in column order).
+    """
+
+    def __init__(self, columns: Sequence[str], sheet_name: str = "Sheet1"):
+        columns = [str(c) for c in columns]
+        if not columns:
+            raise ValueError("An .xls layout needs at least one column.")
+        if len(columns) > MAX_COLS:
+            raise ValueError(f".xls sheets hold at most {MAX_COLS} columns, got {len(columns)}.")
+        self.columns = columns
+        self.sheet_name = sheet_name
+
+        # A fresh workbook hands out the default style's XF index and the
+        # header strings' SST indices deterministically, so the header row
+        # can be packed once here.
+        self._xf = xlwt.Workbook().add_style(xlwt.Style.default_style)
+        self._header_strings: List[str] = []
+
+        def add_str(s):
+            self._header_strings.append(s)
+            return len(self._header_strings) - 1
+
+        self._header_cells = _pack_cells(0, columns[:-1], self._xf, {}, add_str)
+
+    def render(self, data: Sequence[Sequence[Any]]) -> bytes:
+        """
+        data is one sequence per column (all the same length). Returns
+        the .xls file as bytes.
+        """
+        ncols = len(self.columns)
+        if len(data) != ncols:
+            raise ValueError(f"Expected {ncols} columns of data, got {len(data)}.")
+        nrows = len(data[0]) if data else 0
+        if any(len(col) != nrows for col in data):
+            raise ValueError("All columns must have the same length.")
+        if nrows + 1 > MAX_ROWS:
+            raise ValueError(f".xls sheets hold at most {MAX_ROWS - 1} data rows, got {nrows}.")
+
+        wb = xlwt.Workbook()
+        ws = wb.add_sheet(self.sheet_name)
+        xf = wb.add_style(xlwt.Style.default_style)
+        add_str = wb.add_str
+
+        sst: Dict[str, int] = {}
+        for s in self._header_strings:
+            sst[s] = add_str(s)
+        last = ncols - 1
+
+        header = ws.row(0)
+        if self._header_cells:
+            header_cells = self._header_cells
+            if xf != self._xf:
+                header_cells = _pack_cells(0, self.columns[:-1], xf, sst, add_str)
+            header.insert_cell(0, _PackedCells(header_cells))
+        header.write(last, self.columns[last])      # sets the row / sheet column bounds
+
+        # Checked per column first, so all-plain data skips the per-row check.
+        plain = all(all(map(_packable, col)) for col in data)
+        for rowx, values in enumerate(zip(*data), start=1):
+            row = ws.row(rowx)
+            if plain or all(map(_packable, values)):
+                if last:
+                    row.insert_cell(0, _PackedCells(_pack_cells(rowx, values[:last], xf, sst, add_str)))
+                row.write(last, values[last])
+            else:
+                for colx, value in enumerate(values):
+                    row.write(colx, value)
+
+        bio = BytesIO()
+        wb.save(bio)
+        # Rows point back at their sheet, so without this the whole sheet
+        # lives until the cycle collector runs; over a package of many
+        # workbooks that pile-up was the peak memory. The row table is
+        # private to xlwt (pinned in requirements.txt); should it ever
+        # move, collect the cycle explicitly instead.
+        rows = getattr(ws, "_Worksheet__rows", None)
+        if isinstance(rows, dict):
+            rows.clear()
+        else:
+            ws = wb = add_str = header = row = None
+            gc.collect()
+        return bio.getvalue()
+
+
+@lru_cache(maxsize=32)
+def _template(columns: Tuple[str, ...], sheet_name: str) -> XlsTemplate:
+    return XlsTemplate(columns, sheet_name)
+
+
+def write_columns(columns: Sequence[str], data: Sequence[Sequence[Any]], sheet_name: str = "Sheet1") -> bytes:
+    """One-sheet .xls with the given header and column arrays."""
+    return _template(tuple(str(c) for c in columns), sheet_name).render(data)
+
+
+def frame_to_xls(df, sheet_name: str = "Sheet1") -> bytes:
+    """A DataFrame as a one-sheet .xls (header row + values)."""
+    return write_columns(list(df.columns), [df[c].tolist() for c in df.columns], sheet_name)
+
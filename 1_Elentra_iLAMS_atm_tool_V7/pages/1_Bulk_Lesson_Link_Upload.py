@@ -1,9 +1,11 @@
 # pages/1_Elentra_Link_Upload.py
 
 import streamlit as st
-import pandas as pd
 
-from core.backend_1_Lesson_Link_Upload import run_elentra_link_upload
+from core.run_history import RunHistory
+from core.debug_ports import PortLeaseTimeout
+from core.session_config import run_config
+from core.log_view import LiveLogView, page_log, render_log_panel
 
 from core.theme import apply_ntu_purple_theme
 from core.theme import apply_claude_theme
@@ -26,8 +28,7 @@ https://googlechromelabs.github.io/chrome-for-testing/
 )
 
 # --- Safe defaults ---
-if "elentra_logs" not in st.session_state:
-    st.session_state["elentra_logs"] = []
+run_log = page_log("elentra_log", "ElentraUpload")
 if "upload_running" not in st.session_state:
     st.session_state["upload_running"] = False
 if "stop_requested" not in st.session_state:
@@ -74,6 +75,21 @@ with st.form("elentra_upload_form"):
     st.caption("Elentra Base URL : https://ntu.elentra.cloud/events?id=")
     st.markdown("---")
 
+    workers = st.number_input(
+        "Parallel tabs",
+        min_value=1,
+        max_value=8,
+        value=1,
+        help="Number of Chrome tabs to upload with at the same time. Use 1 to watch a single tab.",
+    )
+    debugger_addresses_raw = st.text_input(
+        "Chrome debugger addresses (optional)",
+        value="",
+        help="Comma-separated host:port list to spread the tabs over several Chrome windows, "
+             "e.g. 127.0.0.1:9222, 127.0.0.1:9223. Leave empty to use the Home page address.",
+    )
+    st.markdown("---")
+
     # -------------------------------
     # Buttons inside the same form
     # -------------------------------
@@ -100,42 +116,48 @@ with st.form("elentra_upload_form"):
     # RUN BUTTON HANDLING (the actual automation)
     # -------------------------------------------------
     if submitted:
-        st.session_state["elentra_logs"] = []
+        run_log.clear()
         st.session_state["upload_running"] = True
         st.session_state["stop_requested"] = False    # reset stop flag
-        collected_logs = []
 
         progress_bar = st.progress(0.0)
 
-        # Log callback
-        def log_callback(entry):
-            if isinstance(entry, dict):
-                collected_logs.append(entry)
-            else:
-                collected_logs.append({
-                    "time": "",
-                    "module": "ElentraUpload",
-                    "level": "INFO",
-                    "message": str(entry),
-                })
+        # Log callback: bounded page log, live view of the latest entries
+        log_callback = LiveLogView(run_log)
 
         # Progress callback
         def progress_callback(current, total):
             if total > 0:
                 progress_bar.progress(min(current / total, 1.0))
 
-        # Run Selenium automation
-        logs = run_elentra_link_upload(
-            lams_lesson_titles_raw = lams_lesson_titles_raw,
-            lams_lesson_ids_raw = lams_lesson_ids_raw,
-            elentra_event_ids_raw = elentra_event_ids_raw,
-            upload_student = upload_student,
-            upload_monitor = upload_monitor,
-            log_callback = log_callback,
-            progress_callback = progress_callback,
-        )
-
-        st.session_state["elentra_logs"] = collected_logs
+        # Run Selenium automation (imported here so the page renders without Selenium)
+        from core.backend_1_Lesson_Link_Upload import run_elentra_link_upload
+
+        stop_flag = lambda: st.session_state.get("stop_requested", False)
+        try:
+            with run_config("lesson_link_upload", stop_flag=stop_flag) as config:
+                logs = run_elentra_link_upload(
+                    lams_lesson_titles_raw = lams_lesson_titles_raw,
+                    lams_lesson_ids_raw = lams_lesson_ids_raw,
+                    elentra_event_ids_raw = elentra_event_ids_raw,
+                    upload_student = upload_student,
+                    upload_monitor = upload_monitor,
+                    log_callback = log_callback,
+                    progress_callback = progress_callback,
+                    workers = int(workers),
+                    debugger_addresses = [
+                        x.strip() for x in debugger_addresses_raw.split(",") if x.strip()
+                    ] or None,
+                    history = RunHistory(),
+                    stop_flag = stop_flag,
+                    config = config,
+                )
+        except PortLeaseTimeout as e:
+            st.session_state["upload_running"] = False
+            st.error(f"⛔ {e}")
+            st.stop()
+
+        log_callback.clear()
         st.session_state["upload_running"] = False
 
         st.success("Elentra upload run completed. See logs below.")
@@ -144,7 +166,4 @@ with st.form("elentra_upload_form"):
 # ---------------------------------------------------------
 # LOG DISPLAY (outside form: persists across reruns)
 # ---------------------------------------------------------
-if st.session_state["elentra_logs"]:
-    st.subheader("Logs")
-    df_logs = pd.DataFrame(st.session_state["elentra_logs"])
-    st.dataframe(df_logs, width='stretch')
+render_log_panel(run_log, "elentra_log")
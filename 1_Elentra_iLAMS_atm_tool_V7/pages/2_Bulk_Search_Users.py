@@ -1,11 +1,19 @@
 import streamlit as st
-import pandas as pd
 from io import BytesIO
 import re
 
 
-from core.backend_2_Bulk_Search_Users import run_user_search
-from core.backend_2_Bulk_Search_Users import go_user_search_page
+# The Selenium backend is imported where it is used, so the page renders
+# without loading Selenium.
+from core.result_sink import CsvResultSink, new_result_path, read_result_file
+from pathlib import Path
+from core.search_cache import SearchResultCache, DEFAULT_TTL_DAYS
+from core.user_directory import UserDirectory
+from core.run_history import RunHistory
+from core.debug_ports import PortLeaseTimeout
+from core.session_config import run_config, session_config
+from core.log_view import LiveLogView, page_log, render_log_panel
+from datetime import datetime
 
 from core.theme import apply_ntu_purple_theme
 from core.theme import apply_claude_theme
@@ -40,29 +48,21 @@ open_user_search = st.button(
     width='stretch',
 )
 
-if open_user_search:
-    st.session_state.setdefault("elentra_logs", [])
+# -------------------------
+# Session state
+# -------------------------
+run_log = page_log("search_log", "iLAMS User Search")
 
-    def log_callback(entry):
-        st.session_state["elentra_logs"].append(entry)
+if open_user_search:
+    from core.backend_2_Bulk_Search_Users import go_user_search_page
 
     result = go_user_search_page(
-        log_callback=log_callback
+        log_callback=run_log.add,
+        config=session_config(),
     )
 
     st.success("iLAMS User Search page opened in Chrome.")
 
-if st.session_state.get("elentra_logs"):
-    df_logs = pd.DataFrame(st.session_state["elentra_logs"])
-    df_logs["message"] = df_logs["message"].astype(str)
-    st.dataframe(df_logs, width="stretch")
-
-
-# -------------------------
-# Session state
-# -------------------------
-if "search_logs" not in st.session_state:
-    st.session_state["search_logs"] = []
 if "search_df" not in st.session_state:
     st.session_state["search_df"] = None
 
@@ -77,6 +77,103 @@ raw_text = st.text_area(
     value="lkc-dl-lams (TTSH)\ntimothy.koh@ntu.edu.sg"
 )
 
+# -------------------------
+# Result cache
+# -------------------------
+with st.expander("Result cache", expanded=False):
+    cache_ttl_days = st.number_input(
+        "Reuse cached results younger than (days)",
+        min_value=0,
+        max_value=90,
+        value=DEFAULT_TTL_DAYS,
+        help="Names/emails searched within this window are answered from the local cache.",
+    )
+    force_refresh = st.checkbox(
+        "Force refresh (search everything live and update the cache)",
+        value=False,
+    )
+
+    cache = SearchResultCache(ttl_seconds=cache_ttl_days * 86400)
+    stats = cache.stats()
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Cached searches", stats["entries"])
+    c2.metric("Fresh (within TTL)", stats["fresh_entries"])
+    c3.metric("Stale", stats["entries"] - stats["fresh_entries"])
+
+    last_run = st.session_state.get("search_cache_stats")
+    if last_run:
+        st.caption(
+            f"Last run: {last_run['hits']} cache hit(s), "
+            f"{last_run['misses'] + last_run['stale']} searched live "
+            f"({last_run['stale']} stale)."
+        )
+
+    if st.button("🗑 Clear cache", type="secondary"):
+        cache.clear()
+        st.session_state.pop("search_cache_stats", None)
+        st.success("Search result cache cleared.")
+
+# -------------------------
+# Local user directory
+# -------------------------
+with st.expander("Local user directory", expanded=False):
+    st.caption(
+        "A snapshot of the iLAMS user list. Confident name matches are answered "
+        "from it; only borderline matches are confirmed with a live search."
+    )
+    directory = UserDirectory()
+    refreshed_at = directory.last_refreshed()
+
+    d1, d2 = st.columns(2)
+    d1.metric("Users in snapshot", directory.count())
+    d2.metric(
+        "Last refreshed",
+        datetime.fromtimestamp(refreshed_at).strftime("%Y-%m-%d %H:%M") if refreshed_at else "never",
+    )
+
+    use_directory = st.checkbox(
+        "Resolve from local directory first",
+        value=directory.count() > 0,
+    )
+    directory_max_age_days = st.number_input(
+        "Trust 'not found' from a snapshot younger than (days)",
+        min_value=0.0,
+        max_value=30.0,
+        value=1.0,
+        step=0.5,
+    )
+
+    r1, r2 = st.columns(2)
+    refresh_clicked = r1.button("🔄 Refresh (new users only)", width="stretch")
+    recrawl_clicked = r2.button("🗂 Full re-crawl", width="stretch")
+
+    if refresh_clicked or recrawl_clicked:
+        from core.backend_2_Bulk_Search_Users import crawl_user_directory
+
+        stop_flag = lambda: st.session_state.get("usersearch_stop", False)
+        try:
+            with st.spinner("Crawling iLAMS user list..."):
+                with run_config("user_directory_crawl", stop_flag=stop_flag) as config:
+                    crawl = crawl_user_directory(
+                        directory,
+                        incremental=refresh_clicked,
+                        log_callback=run_log.add,
+                        stop_flag=stop_flag,
+                        config=config,
+                    )
+        except PortLeaseTimeout as e:
+            st.error(f"⛔ {e}")
+            st.stop()
+        summary = f"{crawl['new_users']} new user(s) over {crawl['pages']} page(s)"
+        if crawl["complete"]:
+            st.success(f"Directory crawl done: {summary}.")
+        else:
+            st.warning(
+                f"Directory crawl incomplete: {summary}. The snapshot is not marked fresh, "
+                "so users it lacks are still searched live. See the log."
+            )
+
 # -------------------------
 # On submit
 # -------------------------
@@ -103,17 +200,26 @@ if stop_clicked:
     st.session_state.usersearch_running = False
 
 if st.session_state.usersearch_running:
+    from core.backend_2_Bulk_Search_Users import RESULT_COLUMNS, run_user_search
+
     st.success("▶ RUNNING")
 
     progress_bar = st.progress(0.0)
-    collected_logs = []
+    live_table = st.empty()
+    log_callback = LiveLogView(run_log)
 
-    def log_callback(entry):
-        collected_logs.append(entry)
+    # Rows are streamed to disk as they arrive, so a stopped or crashed
+    # run still leaves a downloadable partial CSV. The live table shows
+    # the sink's in-memory tail instead of re-reading that file each item.
+    sink = CsvResultSink(new_result_path("user_search"), RESULT_COLUMNS, keep_recent=200)
+    st.session_state["search_result_path"] = str(sink.path)
+    st.session_state.search_df = None
 
     def progress_callback(current, total):
         if total > 0:
             progress_bar.progress(min(current / total, 1.0))
+        if sink.rows_written:
+            live_table.dataframe(sink.recent_frame(), width="stretch")
 
     # Split pasted text into lines
     search_values = [
@@ -122,15 +228,31 @@ if st.session_state.usersearch_running:
         if line.strip()
     ]
 
-    result = run_user_search(
-        search_values=search_values,   # ✅ now a LIST
-        log_callback=log_callback,
-        progress_callback=progress_callback,
-        stop_flag=lambda: st.session_state.usersearch_stop,
-    )
-
+    stop_flag = lambda: st.session_state.usersearch_stop
+    try:
+        with sink:
+            with run_config("user_search", stop_flag=stop_flag) as config:
+                result = run_user_search(
+                    search_values=search_values,   # ✅ now a LIST
+                    log_callback=log_callback,
+                    progress_callback=progress_callback,
+                    stop_flag=stop_flag,
+                    cache=cache,
+                    force_refresh=force_refresh,
+                    directory=directory if use_directory else None,
+                    directory_max_age_days=directory_max_age_days,
+                    sink=sink,
+                    history=RunHistory(),
+                    config=config,
+                )
+    except PortLeaseTimeout as e:
+        st.session_state.usersearch_running = False
+        st.error(f"⛔ {e}")
+        st.stop()
+    live_table.empty()
+    log_callback.clear()
+    st.session_state["search_cache_stats"] = cache.stats()
 
-    st.session_state.search_logs.extend(collected_logs + result["logs"])
     st.session_state.search_df = result["dataframe"]
 
     if st.session_state.usersearch_stop:
@@ -144,6 +266,23 @@ if st.session_state.usersearch_running:
 # -------------------------
 # Results
 # -------------------------
+partial_path = st.session_state.get("search_result_path")
+if (
+    st.session_state["search_df"] is None
+    and partial_path
+    and Path(partial_path).exists()
+):
+    # The last run did not finish: offer what was streamed to disk so far.
+    partial_df = read_result_file(partial_path)
+    st.subheader("Partial Results (run did not finish)")
+    st.dataframe(partial_df, width="stretch")
+    st.download_button(
+        label="Download Partial Results CSV",
+        data=Path(partial_path).read_bytes(),
+        file_name=Path(partial_path).name,
+        mime="text/csv",
+    )
+
 if st.session_state["search_df"] is not None:
     df = st.session_state["search_df"]
 
@@ -164,8 +303,5 @@ if st.session_state["search_df"] is not None:
 # -------------------------
 # Logs
 # -------------------------
-if st.session_state["search_logs"]:
-    st.subheader("Logs")
-    df_logs = pd.DataFrame(st.session_state["search_logs"])
-    st.dataframe(df_logs, width='stretch')
+render_log_panel(run_log, "search_log")
 
@@ -1,13 +1,10 @@
 import streamlit as st
-import pandas as pd
-
-from core.backend_3_Bulk_User_Excel_Gen import (
-    generate_staff_package,
-    generate_student_package,
-)
 
 from pathlib import Path
 
+from core.run_history import RunHistory
+from core.log_view import page_log, render_log_panel
+
 from core.theme import apply_ntu_purple_theme
 from core.theme import apply_claude_theme
 apply_ntu_purple_theme()
@@ -45,8 +42,9 @@ if "pkg_name" not in st.session_state:
     st.session_state.pkg_name = None
 if "pkg_audit" not in st.session_state:
     st.session_state.pkg_audit = None
-if "pkg_logs" not in st.session_state:
-    st.session_state.pkg_logs = []
+if "pkg_roster" not in st.session_state:
+    st.session_state.pkg_roster = None
+pkg_log = page_log("pkg_log", "BulkExcelGen")
 
 # -------------------------------------------------
 # Mode selection (OUTSIDE any form)
@@ -62,7 +60,10 @@ def set_mode_staff():
 def set_mode_student():
     st.session_state.user_mode = "Student"
 
-c1, c2 = st.columns(2)
+def set_mode_batch():
+    st.session_state.user_mode = "Batch"
+
+c1, c2, c3 = st.columns(3)
 
 c1.button(
     "STAFFS / CEs",
@@ -78,6 +79,13 @@ c2.button(
     on_click=set_mode_student,
 )
 
+c3.button(
+    "BATCH (CSV)",
+    type="primary" if st.session_state.user_mode == "Batch" else "secondary",
+    width='stretch',
+    on_click=set_mode_batch,
+)
+
 mode = st.session_state.user_mode
 
 st.markdown("---")
@@ -90,6 +98,9 @@ cohort_name = ""
 full_name = ""
 raw_emails = ""
 raw_course_ids = ""
+raw_names = ""
+batch_csv = None
+roster_file = None
 roles = ["monitor"]  # default for staff
 
 # -------------------------------------------------
@@ -123,6 +134,24 @@ elif mode == "Student":
         default=["learner"],
     )
 
+elif mode == "Batch":
+    st.markdown("### Batch Manifest")
+    batch_csv = st.file_uploader(
+        "Packages CSV",
+        type=["csv"],
+        help="One row per user: package, mode (staff / student), email, name, "
+             "course_ids and roles (both ';'-separated; the first row of a package is enough). "
+             "Every package is generated into one ZIP with a combined batch_audit.csv.",
+    )
+
+if mode in ("Staff", "Student"):
+    roster_file = st.file_uploader(
+        "...or upload a roster (CSV / XLSX)",
+        type=["csv", "xlsx"],
+        help="A sheet with an email column and, optionally, a name column. "
+             "Replaces the emails and names typed above.",
+    )
+
 full_names = [x.strip() for x in raw_names.splitlines() if x.strip()]
 
 # -------------------------------------------------
@@ -155,6 +184,30 @@ with st.form("action_form"):
             value=True,   # sensible default
         )
 
+    if mode == "Batch":
+        gen_new_users = st.checkbox(
+            "📝 Generate New Users .xls",
+            value=False
+        )
+        gen_course_map = st.checkbox(
+            "🗺️ Generate Course Mapping .xls",
+            value=True,   # sensible default
+        )
+
+    output_format = st.selectbox(
+        "File format",
+        ["xls", "xlsx", "csv"],
+        help="iLAMS imports .xls. Files over 65,535 rows are split into numbered parts; "
+             "use xlsx or csv for very large imports.",
+    )
+
+    previous_package = None if mode == "Batch" else st.file_uploader(
+        "Previous package (optional)",
+        type=["zip", "json"],
+        help="Upload an earlier package ZIP (or its manifest.json) to generate only "
+             "the users and courses added since then.",
+    )
+
     run_generation = st.form_submit_button(
         "🔍 Check Package",
         type="primary",
@@ -167,15 +220,38 @@ with st.form("action_form"):
     else "🔍 Generate Package"
     )
 
-collected_logs = []
-
-def log_callback(entry):
-    collected_logs.append(entry)
+log_callback = pkg_log.add
 
 if run_generation:
+    # pandas / xlwt are only loaded once a package is actually generated.
+    from core.backend_3_Bulk_User_Excel_Gen import (
+        generate_staff_package,
+        generate_student_package,
+    )
+    from core.package_batch import generate_batch
+    from core.package_cache import get_package_cache
+    from core.roster import read_roster
+
+    pkg_log.clear()
     try:
+        if mode == "Batch" and batch_csv is None:
+            st.warning("Please upload a packages CSV.")
+            st.stop()
+
+        if roster_file is not None:
+            roster = read_roster(roster_file.getvalue(), roster_file.name)
+            roster = roster[roster["email"].str.strip() != ""]
+            raw_emails = "\n".join(roster["email"])
+            full_names = roster["name"].tolist() if roster["name"].str.strip().any() else []
+
         course_ids, invalid_course_ids = parse_course_ids(raw_course_ids)
 
+        progress_bar = st.progress(0.0)
+
+        def progress_callback(current, total):
+            if total:
+                progress_bar.progress(min(current / total, 1.0), text=f"{current} / {total} files")
+
         if invalid_course_ids:
             st.error(
                 "Invalid Course IDs detected (must be integers only):\n"
@@ -194,6 +270,11 @@ if run_generation:
                 generate_new_users=gen_new_users,
                 generate_course_map=gen_course_map,
                 log_callback=log_callback,
+                history=RunHistory(),
+                output_format=output_format,
+                cache=get_package_cache(),
+                previous=previous_package.getvalue() if previous_package else None,
+                progress_callback=progress_callback,
             )
 
         elif mode == "Student" and (gen_new_users or gen_course_map):
@@ -206,28 +287,66 @@ if run_generation:
                 generate_y1_new_users=gen_new_users,
                 generate_course_map=gen_course_map,
                 log_callback=log_callback,
+                history=RunHistory(),
+                output_format=output_format,
+                cache=get_package_cache(),
+                previous=previous_package.getvalue() if previous_package else None,
+                progress_callback=progress_callback,
+            )
+
+        elif mode == "Batch" and (gen_new_users or gen_course_map):
+
+            pkg = generate_batch(
+                batch_csv.getvalue(),
+                generate_new_users=gen_new_users,
+                generate_course_map=gen_course_map,
+                log_callback=log_callback,
+                history=RunHistory(),
+                output_format=output_format,
+                cache=get_package_cache(),
             )
+            if pkg.failed:
+                st.warning("Not generated (see log): " + ", ".join(pkg.failed))
 
         else:
             st.warning("Please select at least one action.")
             st.stop()
 
-        st.session_state.pkg_zip = pkg.zip_bytes
+        if st.session_state.pkg_zip is not None:
+            st.session_state.pkg_zip.close()
+        # Kept as the spooled file; the ZIP is only read when downloaded.
+        st.session_state.pkg_zip = pkg.zip_file
         st.session_state.pkg_name = pkg.zip_filename
         st.session_state.pkg_audit = pkg.audit_df
-        st.session_state.pkg_logs = pkg.logs
+        st.session_state.pkg_roster = pkg.roster
 
         st.success("Package generated. Download below.")
 
     except Exception as e:
         st.error(str(e))
 
+roster_problems = st.session_state.pkg_roster
+if roster_problems is not None and not roster_problems.empty:
+    left_out = int((roster_problems["status"] == "error").sum())
+    st.warning(
+        f"Roster check: {left_out} line(s) left out, "
+        f"{len(roster_problems) - left_out} kept with a warning."
+    )
+    with st.expander("Roster report", expanded=left_out > 0):
+        st.dataframe(roster_problems, hide_index=True, width='stretch')
+        st.download_button(
+            "⬇️ Download roster report (CSV)",
+            data=roster_problems.to_csv(index=False),
+            file_name="roster_report.csv",
+            mime="text/csv",
+        )
+
 st.markdown("### Download")
 
 if st.session_state.pkg_zip:
     st.download_button(
         "⬇️ Download ZIP Package",
-        data=st.session_state.pkg_zip,
+        data=st.session_state.pkg_zip.read,
         file_name=st.session_state.pkg_name,
         mime="application/zip",
         width='stretch',
@@ -239,3 +358,4 @@ else:
         width='stretch',
     )
 
+render_log_panel(pkg_log, "pkg_log")
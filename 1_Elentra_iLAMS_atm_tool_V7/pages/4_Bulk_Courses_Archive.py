@@ -1,10 +1,12 @@
 # pages/4_iLAMS_Bulk_Courses_Archive.py
 
 import streamlit as st
-import pandas as pd
 from io import BytesIO
 
-from core.backend_4_Bulk_Courses_Archive import run_bulk_course_archive
+from core.run_history import RunHistory
+from core.debug_ports import PortLeaseTimeout
+from core.session_config import run_config
+from core.log_view import LiveLogView, page_log, render_log_panel
 
 from core.theme import apply_ntu_purple_theme
 from core.theme import apply_claude_theme
@@ -31,8 +33,7 @@ st.markdown(
     """
 )
 
-if "archive_logs" not in st.session_state:
-    st.session_state["archive_logs"] = []
+run_log = page_log("archive_log", "BulkArchive")
 if "archive_df" not in st.session_state:
     st.session_state["archive_df"] = None
 
@@ -84,28 +85,37 @@ if stop_clicked:
 
 
 if st.session_state.archive_running:
+    # Imported here so the page renders without loading Selenium.
+    from core.backend_4_Bulk_Courses_Archive import run_bulk_course_archive
+
     st.success("▶ RUNNING")
     progress_bar = st.progress(0.0)
-    collected_logs = []
-
-    def log_callback(entry):
-        collected_logs.append(entry)
+    log_callback = LiveLogView(run_log)
 
     def progress_callback(current, total):
         if total > 0:
             progress_bar.progress(min(current / total, 1.0))
 
-    result = run_bulk_course_archive(
-        excluded_ids = [x.strip() for x in excluded_text.split(",") if x.strip()],
-        dry_run=dry_run,
-        max_courses=max_courses,
-        log_callback=log_callback,
-        progress_callback=progress_callback,
-        pause_flag=lambda: st.session_state.archive_pause,
-        stop_flag=lambda: st.session_state.archive_stop,
-    )
-
-    st.session_state.archive_logs.extend(collected_logs + result["logs"])
+    stop_flag = lambda: st.session_state.archive_stop
+    try:
+        with run_config("course_archive", stop_flag=stop_flag) as config:
+            result = run_bulk_course_archive(
+                excluded_ids = [x.strip() for x in excluded_text.split(",") if x.strip()],
+                dry_run=dry_run,
+                max_courses=max_courses,
+                log_callback=log_callback,
+                progress_callback=progress_callback,
+                pause_flag=lambda: st.session_state.archive_pause,
+                stop_flag=stop_flag,
+                history=RunHistory(),
+                config=config,
+            )
+    except PortLeaseTimeout as e:
+        st.session_state.archive_running = False
+        st.error(f"⛔ {e}")
+        st.stop()
+
+    log_callback.clear()
     st.session_state.archive_df = result["dataframe"]
 
     if st.session_state.archive_stop:
@@ -131,7 +141,4 @@ if st.session_state["archive_df"] is not None:
         mime="text/csv",
     )
 
-if st.session_state["archive_logs"]:
-    st.subheader("Logs")
-    df_logs = pd.DataFrame(st.session_state["archive_logs"])
-    st.dataframe(df_logs, width='stretch')
+render_log_panel(run_log, "archive_log")
@@ -7,7 +7,6 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT))
 
 import streamlit as st
-from chatbot.qa import KnowledgeAssistant
 
 from core.theme import apply_ntu_purple_theme
 from core.theme import apply_claude_theme
@@ -32,6 +31,10 @@ if st.button("🔄 Clear Knowledge Cache", type="secondary"):
 
 @st.cache_resource
 def init_assistant():
+    # Imported on first use: docling, faiss and ollama are the slowest
+    # imports in the app and are only needed once the assistant is built.
+    from chatbot.qa import KnowledgeAssistant
+
     return KnowledgeAssistant()
 
 assistant = init_assistant()
@@ -0,0 +1,107 @@
+# pages/6_Run_History.py
+
+import time
+
+import streamlit as st
+
+from core.run_history import (
+    RunHistory,
+    error_rate_by_step,
+    latency_percentiles,
+    run_throughput,
+    weekly_trend,
+)
+
+from core.theme import apply_ntu_purple_theme
+from core.theme import apply_claude_theme
+apply_ntu_purple_theme()
+#apply_claude_theme()
+
+st.set_page_config(page_title="RunHistory",page_icon="🦾")
+st.title("Run History & Throughput")
+
+st.markdown(
+    """
+**Context:**
+Every run of the bulk tools is recorded locally (tool, parameters, start/end
+and each item's outcome and duration). Use this page to see whether a change
+or an iLAMS / Elentra slowdown moved throughput.
+"""
+)
+
+history = RunHistory()
+
+lookback_days = st.slider("Look back (days)", min_value=7, max_value=365, value=90, step=7)
+since = time.time() - lookback_days * 86400
+
+runs = history.runs_frame(since=since)
+items = history.items_frame(since=since)
+
+if runs.empty:
+    st.info("No runs recorded yet. Runs from the bulk tools will appear here.")
+    st.stop()
+
+tools = sorted(runs["tool"].unique())
+selected_tools = st.multiselect("Tools", tools, default=tools)
+runs = runs[runs["tool"].isin(selected_tools)]
+items = items[items["tool"].isin(selected_tools)]
+
+# -------------------------
+# Summary
+# -------------------------
+c1, c2, c3 = st.columns(3)
+c1.metric("Runs", len(runs))
+c2.metric("Items", len(items))
+c3.metric("Error rate", f"{items['outcome'].eq('error').mean():.1%}" if len(items) else "–")
+
+# -------------------------
+# Throughput per run
+# -------------------------
+st.subheader("Items per minute (per run)")
+throughput = run_throughput(runs)
+if throughput["items_per_min"].notna().any():
+    st.line_chart(
+        throughput.pivot_table(index="started_at", columns="tool", values="items_per_min"),
+    )
+st.dataframe(throughput, width="stretch")
+
+if items.empty:
+    st.stop()
+
+# -------------------------
+# Latency
+# -------------------------
+st.subheader("Item latency (p50 / p95, seconds)")
+by = st.radio("Group by", ["tool", "step"], horizontal=True)
+latency = latency_percentiles(items, by=by)
+st.bar_chart(latency.set_index(by)[["p50_s", "p95_s"]])
+st.dataframe(latency, width="stretch")
+
+# -------------------------
+# Errors by step
+# -------------------------
+st.subheader("Error rate by step")
+errors = error_rate_by_step(items)
+st.bar_chart(errors.assign(label=errors["tool"] + " · " + errors["step"]).set_index("label")["error_rate"])
+st.dataframe(errors, width="stretch")
+
+# -------------------------
+# Weekly trend
+# -------------------------
+st.subheader("Weekly trend")
+weekly = weekly_trend(items)
+metric = st.selectbox(
+    "Metric",
+    ["items", "p50_s", "error_rate"],
+    format_func={"items": "Items processed", "p50_s": "Median item latency (s)", "error_rate": "Error rate"}.get,
+)
+st.line_chart(weekly.pivot_table(index="week", columns="tool", values=metric))
+
+# -------------------------
+# Recent runs
+# -------------------------
+st.subheader("Recent runs")
+st.dataframe(
+    runs.sort_values("started_at", ascending=False).head(50),
+    width="stretch",
+)
@@ -1,7 +1,10 @@
+import time
+
 import pytest
 from unittest.mock import MagicMock, patch
 
 from core.backend_1_Lesson_Link_Upload import run_elentra_link_upload
+from core.rate_limiter import AdaptiveRateLimiter
 
 
 # -------------------------------------------------
@@ -67,23 +70,49 @@ def test_non_integer_elentra_event_id():
 # STOP REQUEST HANDLING
 # -------------------------------------------------
 
-@patch("core.backend_1_Lesson_Link_Upload.st")
-def test_stop_requested_immediate_exit(mock_st):
+@patch("core.backend_1_Lesson_Link_Upload.get_driver")
+def test_stop_requested_immediate_exit(mock_get_driver):
     """
-    If stop_requested is already True, Selenium should never run.
+    If stop is already requested, Selenium should never run.
     """
-    mock_st.session_state = {"stop_requested": True}
-
-    logs = run_elentra_link_upload(
+    result = run_elentra_link_upload(
         lams_lesson_titles_raw="Lesson A",
         lams_lesson_ids_raw="100",
         elentra_event_ids_raw="200",
         upload_student=True,
         upload_monitor=True,
+        stop_flag=lambda: True,
     )
 
-    assert isinstance(logs, list)
-    assert any("Stop requested" in l["message"] for l in logs)
+    mock_get_driver.assert_not_called()
+
+    assert result["stopped"] and not result["completed"]
+    assert any("Stop requested" in l["message"] for l in result["logs"])
+
+
+@patch("core.backend_1_Lesson_Link_Upload._upload_lesson")
+@patch("core.backend_1_Lesson_Link_Upload.get_driver")
+def test_stop_flag_checked_between_lessons(mock_get_driver, mock_upload):
+    mock_get_driver.return_value = (MagicMock(), MagicMock())
+    processed = []
+
+    def upload(driver, lesson, *args):
+        processed.append(lesson["lesson_title"])
+        return {**lesson, "status": "success"}
+    mock_upload.side_effect = upload
+
+    result = run_elentra_link_upload(
+        lams_lesson_titles_raw="Lesson A\nLesson B",
+        lams_lesson_ids_raw="100\n101",
+        elentra_event_ids_raw="200\n201",
+        upload_student=True,
+        upload_monitor=True,
+        stop_flag=lambda: len(processed) >= 1,
+    )
+
+    assert processed == ["Lesson A"]
+    assert result["stopped"] and [r["lesson_title"] for r in result["results"]] == ["Lesson A"]
+    assert any("Stop requested" in l["message"] for l in result["logs"])
 
 
 # -------------------------------------------------
@@ -91,13 +120,10 @@ def test_stop_requested_immediate_exit(mock_st):
 # -------------------------------------------------
 
 @patch("core.backend_1_Lesson_Link_Upload.get_driver")
-@patch("core.backend_1_Lesson_Link_Upload.st")
-def test_driver_called_once(mock_st, mock_get_driver):
+def test_driver_called_once(mock_get_driver):
     """
     Verify Selenium driver is requested once for valid input.
     """
-    mock_st.session_state = {"stop_requested": False}
-
     dummy_driver = MagicMock()
     dummy_wait = MagicMock()
     mock_get_driver.return_value = (dummy_driver, dummy_wait)
@@ -122,10 +148,7 @@ def test_driver_called_once(mock_st, mock_get_driver):
 # -------------------------------------------------
 
 @patch("core.backend_1_Lesson_Link_Upload.get_driver")
-@patch("core.backend_1_Lesson_Link_Upload.st")
-def test_multiple_rows_progress(mock_st, mock_get_driver):
-    mock_st.session_state = {"stop_requested": False}
-
+def test_multiple_rows_progress(mock_get_driver):
     dummy_driver = MagicMock()
     dummy_wait = MagicMock()
     mock_get_driver.return_value = (dummy_driver, dummy_wait)
@@ -154,10 +177,7 @@ def test_multiple_rows_progress(mock_st, mock_get_driver):
 # -------------------------------------------------
 
 @patch("core.backend_1_Lesson_Link_Upload.get_driver")
-@patch("core.backend_1_Lesson_Link_Upload.st")
-def test_log_schema(mock_st, mock_get_driver):
-    mock_st.session_state = {"stop_requested": False}
-
+def test_log_schema(mock_get_driver):
     dummy_driver = MagicMock()
     dummy_wait = MagicMock()
     mock_get_driver.return_value = (dummy_driver, dummy_wait)
@@ -173,5 +193,196 @@ def test_log_schema(mock_st, mock_get_driver):
     logs = result["logs"]
     assert logs
 
-    required_keys = {"time", "module", "level", "message"}
+    required_keys = {"timestamp", "feature", "level", "message"}
     assert required_keys.issubset(logs[0].keys())
+
+
+# -------------------------------------------------
+# PARALLEL TABS
+# -------------------------------------------------
+
+@patch("core.backend_1_Lesson_Link_Upload._upload_lesson")
+@patch("core.backend_1_Lesson_Link_Upload.get_driver")
+def test_parallel_tabs_process_every_lesson(mock_get_driver, mock_upload):
+    mock_get_driver.side_effect = lambda config: (MagicMock(), MagicMock())
+    mock_upload.side_effect = (
+        lambda driver, lesson, *args: {**lesson, "status": "success"}
+    )
+
+    progress_calls = []
+
+    result = run_elentra_link_upload(
+        lams_lesson_titles_raw="Lesson A\nLesson B\nLesson C",
+        lams_lesson_ids_raw="100\n101\n102",
+        elentra_event_ids_raw="200\n201\n202",
+        upload_student=True,
+        upload_monitor=True,
+        progress_callback=lambda c, t: progress_calls.append((c, t)),
+        workers=2,
+    )
+
+    # one Selenium session (tab) per worker
+    assert mock_get_driver.call_count == 2
+    assert [r["lams_lesson_id"] for r in result["results"]] == ["100", "101", "102"]
+    assert progress_calls[-1] == (3, 3)
+    assert any(l["message"].startswith("[W1]") for l in result["logs"])
+    assert any(l["message"].startswith("[W2]") for l in result["logs"])
+
+
+@patch("core.backend_1_Lesson_Link_Upload._upload_lesson")
+@patch("core.backend_1_Lesson_Link_Upload.get_driver")
+def test_worker_back_off_is_logged_on_the_calling_thread(mock_get_driver, mock_upload):
+    import threading
+    from selenium.common.exceptions import TimeoutException
+
+    mock_get_driver.side_effect = lambda config: (MagicMock(), MagicMock())
+    callers = []
+
+    def upload(supervisor, lesson, upload_student, upload_monitor, log, should_stop, limiter):
+        with limiter.track(log):
+            raise TimeoutException("page did not load")
+    mock_upload.side_effect = upload
+
+    result = run_elentra_link_upload(
+        lams_lesson_titles_raw="Lesson A",
+        lams_lesson_ids_raw="100",
+        elentra_event_ids_raw="200",
+        upload_student=True,
+        upload_monitor=True,
+        log_callback=lambda entry: callers.append(threading.current_thread()),
+        workers=2,
+    )
+
+    assert set(callers) == {threading.main_thread()}
+    throttled = [l["message"] for l in result["logs"] if "Throttling down" in l["message"]]
+    assert throttled and all(m.startswith("[W") for m in throttled)
+
+
+# -------------------------------------------------
+# CHECKPOINTED RESOURCES
+# -------------------------------------------------
+
+def make_supervisor(drivers):
+    from core.config import SeleniumConfig
+    from core.session_supervisor import DriverSupervisor
+
+    factory = MagicMock(side_effect=[(d, MagicMock()) for d in drivers])
+    sup = DriverSupervisor(
+        SeleniumConfig(debugger_address="127.0.0.1:9222"),
+        driver_factory=factory, relaunch_chrome=False, recovery_delay=0,
+    )
+    sup.attach()
+    return sup
+
+
+LESSON = {"lesson_title": "Lesson A", "lams_lesson_id": "100", "elentra_event_id": 200}
+
+
+@patch("core.backend_1_Lesson_Link_Upload._open_event", return_value="Event")
+def test_resource_lost_before_save_is_redone(mock_open):
+    from core.backend_1_Lesson_Link_Upload import _upload_lesson
+    from selenium.common.exceptions import InvalidSessionIdException
+
+    drivers = [MagicMock(name="first"), MagicMock(name="second")]
+    sup = make_supervisor(drivers)
+    calls = []
+
+    def add_resource(driver, title, url, log, should_stop, saving):
+        calls.append(driver)
+        if driver is drivers[0]:
+            raise InvalidSessionIdException("invalid session id")
+        with saving():
+            pass
+        return True
+
+    with patch("core.backend_1_Lesson_Link_Upload._add_monitor_resource", side_effect=add_resource):
+        result = _upload_lesson(sup, LESSON, False, True, lambda *a, **k: None, lambda: False, AdaptiveRateLimiter())
+
+    assert result["status"] == "success"
+    assert calls == drivers
+    assert mock_open.call_count == 2      # the event is reopened on the new session
+
+
+@patch("core.backend_1_Lesson_Link_Upload._open_event", return_value="Event")
+def test_resource_lost_after_save_is_not_replayed(mock_open):
+    from core.backend_1_Lesson_Link_Upload import _upload_lesson
+    from selenium.common.exceptions import InvalidSessionIdException
+
+    sup = make_supervisor([MagicMock(), MagicMock()])
+    monitor, student = MagicMock(), MagicMock(return_value=True)
+
+    def add_then_crash(driver, title, url, log, should_stop, saving):
+        with saving():
+            pass
+        raise InvalidSessionIdException("invalid session id")
+    monitor.side_effect = add_then_crash
+
+    with patch("core.backend_1_Lesson_Link_Upload._add_monitor_resource", monitor), \
+            patch("core.backend_1_Lesson_Link_Upload._add_student_resource", student):
+        with pytest.raises(RuntimeError, match="not retried"):
+            _upload_lesson(sup, LESSON, True, True, lambda *a, **k: None, lambda: False, AdaptiveRateLimiter())
+
+    assert monitor.call_count == 1
+    student.assert_not_called()
+    assert sup.recoveries == 1            # the next lesson gets a live session
+    assert mock_open.call_count == 1      # but this event is not reopened
+
+
+def test_a_normal_length_lesson_does_not_back_off():
+    """A lesson takes far longer than slow_latency; only its round-trips are timed."""
+    import core.backend_1_Lesson_Link_Upload as backend
+    from types import SimpleNamespace
+
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    def click(*args, sleep_after=None, **kwargs):
+        sleep(1.0 + (sleep_after or 0))     # a healthy click / page response
+
+    messages = []
+    limiter = AdaptiveRateLimiter(clock=lambda: now[0], sleep=sleep, jitter=0)
+    driver = MagicMock()
+    driver.find_element.return_value.is_displayed.return_value = True
+    sup = make_supervisor([driver])
+
+    with patch.object(backend, "time", SimpleNamespace(sleep=sleep)), \
+            patch.object(backend, "wait_and_click", click), \
+            patch.object(backend, "click_text", click), \
+            patch.object(backend, "highlight", lambda el: sleep(0.5)):
+        result = backend._upload_lesson(
+            sup, LESSON, True, True,
+            lambda msg, level="info", **f: messages.append(msg), lambda: False, limiter,
+        )
+
+    assert result["status"] == "success"
+    assert now[0] > 3 * limiter.slow_latency
+    assert not any("Throttling down" in m for m in messages)
+    assert limiter.rate > 20.0
+
+
+@patch("core.backend_1_Lesson_Link_Upload._upload_lesson")
+@patch("core.backend_1_Lesson_Link_Upload.get_driver")
+def test_stopped_parallel_run_reports_stopped(mock_get_driver, mock_upload):
+    mock_get_driver.side_effect = lambda config: (MagicMock(), MagicMock())
+    processed = []
+
+    def upload(supervisor, lesson, *args):
+        processed.append(lesson["lesson_title"])
+        time.sleep(0.5)     # long enough for the pool to see the stop
+        return {**lesson, "status": "success"}
+    mock_upload.side_effect = upload
+
+    result = run_elentra_link_upload(
+        lams_lesson_titles_raw="Lesson A\nLesson B\nLesson C",
+        lams_lesson_ids_raw="100\n101\n102",
+        elentra_event_ids_raw="200\n201\n202",
+        upload_student=True,
+        upload_monitor=True,
+        workers=2,
+        stop_flag=lambda: len(processed) >= 1,
+    )
+
+    assert result["stopped"] and not result["completed"]
+    assert len(result["results"]) < 3
@@ -204,3 +204,205 @@ def test_log_schema(mock_get_driver):
 
     required_keys = {"timestamp", "feature", "level", "message"}
     assert required_keys.issubset(logs[0].keys())
+
+
+# -------------------------------------------------
+# DEDUPE / NORMALISATION
+# -------------------------------------------------
+
+def test_plan_queries_collapses_variants():
+    from core.user_query import plan_queries
+
+    plan = plan_queries([
+        "lkc-dl-lams (TTSH)",
+        "  LKC-DL-LAMS  ",
+        "Alice   Tan",
+        "alice tan [Adjunct]",
+        "Timothy.Koh@NTU.edu.sg",
+        "",
+    ])
+
+    assert plan.unique_keys == ["lkc-dl-lams", "alice tan", "timothy.koh@ntu.edu.sg"]
+    assert plan.terms["alice tan"] == "Alice Tan"
+    assert plan.terms["timothy.koh@ntu.edu.sg"] == "timothy.koh@ntu.edu.sg"
+    assert plan.hit_rate == pytest.approx(2 / 5)
+
+
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_duplicate_inputs_searched_once_and_fanned_out(mock_get_driver):
+    driver = MagicMock()
+    wait = MagicMock()
+
+    row = make_fake_row(["123", "alice", "Alice", "Tan"])
+    driver.find_elements.return_value = [row]
+    mock_get_driver.return_value = (driver, wait)
+
+    result = run_user_search(
+        search_values=["Alice Tan", "alice tan (TTSH)", "ALICE  TAN"],
+    )
+
+    df = result["dataframe"]
+
+    # one iLAMS search, three result rows — one per pasted line
+    assert driver.find_elements.call_count == 1
+    assert list(df["Input"]) == ["Alice Tan", "alice tan (TTSH)", "ALICE  TAN"]
+    assert set(df["User ID"]) == {"123"}
+    assert any("dedupe hit-rate" in l["message"] for l in result["logs"])
+
+
+# -------------------------------------------------
+# RESULT CACHE
+# -------------------------------------------------
+
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_cached_results_skip_the_browser(mock_get_driver, tmp_path):
+    from core.search_cache import SearchResultCache
+
+    cache = SearchResultCache(tmp_path / "cache.sqlite3")
+    cache.put("alice tan", [["123", "alice", "Alice", "Tan"]])
+
+    result = run_user_search(search_values=["Alice Tan (TTSH)"], cache=cache)
+
+    mock_get_driver.assert_not_called()
+    df = result["dataframe"]
+    assert df.loc[0, "DL check account?"] == "Exist"
+    assert df.loc[0, "User ID"] == "123"
+    assert cache.stats()["hits"] == 1
+
+
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_stale_or_forced_entries_are_searched_live(mock_get_driver, tmp_path):
+    from core.search_cache import SearchResultCache
+
+    driver = MagicMock()
+    driver.find_elements.return_value = []
+    mock_get_driver.return_value = (driver, MagicMock())
+
+    now = [1000.0]
+    cache = SearchResultCache(tmp_path / "cache.sqlite3", ttl_seconds=60, clock=lambda: now[0])
+    cache.put("bob lim", [["9", "bob", "Bob", "Lim"]])
+    now[0] += 120   # entry is now stale
+
+    result = run_user_search(search_values=["Bob Lim"], cache=cache)
+
+    assert result["dataframe"].loc[0, "DL check account?"] == "Acc Not Found"
+    assert cache.get("bob lim") == []      # refreshed with the live result
+
+    run_user_search(search_values=["Bob Lim"], cache=cache, force_refresh=True)
+    assert driver.find_elements.call_count == 2
+
+
+# -------------------------------------------------
+# EMAIL / LOGIN ROUTING
+# -------------------------------------------------
+
+def test_classify_query():
+    from core.user_query import EMAIL, LOGIN, NAME, classify_query
+
+    assert classify_query("timothy.koh@ntu.edu.sg") == EMAIL
+    assert classify_query("lkc-dl-lams") == LOGIN
+    assert classify_query("tkoh001") == LOGIN
+    assert classify_query("Alice Tan") == NAME
+    assert classify_query("Alice") == NAME
+    assert classify_query("Jean-Luc") == NAME
+    assert classify_query("Mary.Ann") == NAME
+    assert classify_query("O_Brien") == NAME
+
+
+@patch("core.backend_2_Bulk_Search_Users._search_ilams")
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_exact_lookups_run_first_and_narrow_to_login(mock_get_driver, mock_search):
+    mock_get_driver.return_value = (MagicMock(), MagicMock())
+
+    def fake_search(driver, wait, term):
+        if "@" in term:   # substring match also lists natan@
+            return [["1", "natan@ntu.edu.sg", "Nat", "Tan"], ["2", "atan@ntu.edu.sg", "Alice", "Tan"]]
+        return [["3", "bob", "Bob", "Lim"]]
+    mock_search.side_effect = fake_search
+
+    result = run_user_search(search_values=["Bob Lim", "ATan@ntu.edu.sg"])
+
+    searched = [c.args[2] for c in mock_search.call_args_list]
+    assert searched == ["atan@ntu.edu.sg", "Bob Lim"]
+
+    df = result["dataframe"]
+    assert list(df["Input"]) == ["Bob Lim", "ATan@ntu.edu.sg"]   # paste order kept
+    assert df.loc[1, "DL check account?"] == "Exist"
+    assert df.loc[1, "User ID"] == "2"
+
+
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_exact_login_answered_from_directory(mock_get_driver, tmp_path):
+    from core.user_directory import UserDirectory
+
+    directory = UserDirectory(tmp_path / "dir.sqlite3")
+    directory.upsert([["7", "lkc-dl-lams", "LKC", "DL"]])
+
+    result = run_user_search(search_values=["LKC-DL-LAMS (TTSH)"], directory=directory)
+
+    mock_get_driver.assert_not_called()
+    assert result["dataframe"].loc[0, "User ID"] == "7"
+
+
+@patch("core.backend_2_Bulk_Search_Users._search_ilams")
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_login_missing_from_directory_is_matched_as_a_name(mock_get_driver, mock_search, tmp_path):
+    from core.user_directory import UserDirectory
+
+    mock_get_driver.return_value = (MagicMock(), MagicMock())
+    mock_search.return_value = [["8", "jltan@ntu.edu.sg", "Jean-Luc", "Tan"]]
+    directory = UserDirectory(tmp_path / "dir.sqlite3")
+    directory.upsert([["8", "jltan@ntu.edu.sg", "Jean-Luc", "Tan"]])
+    directory.mark_refreshed()
+
+    # Login-shaped, but no such login: not answered "Acc Not Found" locally
+    result = run_user_search(search_values=["jean-luc.tan"], directory=directory)
+
+    assert [c.args[2] for c in mock_search.call_args_list] == ["jean-luc.tan"]
+    assert result["dataframe"].loc[0, "User ID"] == "8"
+
+
+# -------------------------------------------------
+# STREAMING RESULT SINK
+# -------------------------------------------------
+
+@patch("core.backend_2_Bulk_Search_Users._search_ilams")
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_rows_stream_to_sink_as_they_are_answered(mock_get_driver, mock_search, tmp_path):
+    from core.backend_2_Bulk_Search_Users import RESULT_COLUMNS
+    from core.result_sink import CsvResultSink
+
+    mock_get_driver.return_value = (MagicMock(), MagicMock())
+    sink = CsvResultSink(tmp_path / "results.csv", RESULT_COLUMNS)
+    seen_on_disk = []
+
+    def fake_search(driver, wait, term):
+        seen_on_disk.append(len(sink.read_frame()))
+        if term == "Bob Lim":
+            raise RuntimeError("boom")
+        return [["1", "alice", "Alice", "Tan"]]
+    mock_search.side_effect = fake_search
+
+    with sink:
+        result = run_user_search(
+            search_values=["Alice Tan", "Bob Lim", "alice tan"],
+            sink=sink,
+        )
+
+    assert seen_on_disk == [0, 2]        # Alice's two rows were on disk before Bob's search
+    on_disk = sink.read_frame()
+    assert list(on_disk.columns) == RESULT_COLUMNS
+    assert list(on_disk["Input"]) == ["Alice Tan", "alice tan", "Bob Lim"]   # completion order
+    assert on_disk.loc[2, "DL check account?"] == "ERROR"
+    assert list(result["dataframe"]["Input"]) == ["Alice Tan", "Bob Lim", "alice tan"]
+
+
+def test_sink_keeps_its_latest_rows_in_memory(tmp_path):
+    from core.result_sink import CsvResultSink
+
+    with CsvResultSink(tmp_path / "results.csv", ["Input", "Login"], keep_recent=2) as sink:
+        sink.write_many({"Input": f"user {i}", "Login": f"u{i}"} for i in range(5))
+
+        recent = sink.recent_frame()
+        assert list(recent["Input"]) == ["user 3", "user 4"]
+        assert recent.equals(sink.read_frame(tail=2).reset_index(drop=True))
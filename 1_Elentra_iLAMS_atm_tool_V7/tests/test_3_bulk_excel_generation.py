@@ -8,6 +8,8 @@ from core.backend_3_Bulk_User_Excel_Gen import (
     generate_student_package,
     USERS_COLUMNS,
     ROLES_COLUMNS,
+    _make_roles_df,
+    _make_users_df,
 )
 
 # -------------------------------------------------
@@ -174,5 +176,107 @@ def test_student_new_users_schema():
     assert len(df) == 1
 
 
+# -------------------------------------------------
+# FRAME BUILDERS
+# -------------------------------------------------
+
+def test_users_frame_broadcasts_constants():
+    df = _make_users_df(["a@e.ntu.edu.sg", "b@e.ntu.edu.sg"], ["A", "B"])
+
+    assert list(df.columns) == USERS_COLUMNS
+    assert df["* login"].tolist() == df["* email"].tolist() == ["a@e.ntu.edu.sg", "b@e.ntu.edu.sg"]
+    assert set(df["country"]) == {"Australia"}
+    assert set(df["title"]) == {""}
+    assert _make_users_df([], []).shape == (0, len(USERS_COLUMNS))
+
+
+def test_roles_frame_is_grouped_by_user_or_by_course():
+    by_user = _make_roles_df(["a", "b"], ["101", "102", "103"], "monitor", by="email")
+    by_course = _make_roles_df(["a", "b"], [101, 102], "learner", by="course")
+
+    assert list(by_user.columns) == ROLES_COLUMNS
+    assert by_user["* login"].tolist() == ["a"] * 3 + ["b"] * 3
+    assert by_user["* organisation"].tolist() == ["101", "102", "103"] * 2
+    assert by_course["* login"].tolist() == ["a", "b", "a", "b"]
+    assert by_course["* organisation"].tolist() == [101, 101, 102, 102]
+    assert set(by_course["* add_to_lessons"]) == {"yes"}
+
+
+# -------------------------------------------------
+# ROW LIMITS / OUTPUT FORMATS
+# -------------------------------------------------
+
+def test_combined_course_map_over_the_limit_is_split_into_parts():
+    pkg = generate_staff_package(
+        department_name="DL",
+        full_names=[],
+        raw_emails="\n".join(f"u{i}@ntu.edu.sg" for i in range(5)),
+        raw_course_ids="\n".join(str(100 + c) for c in range(4)),
+        selected_roles=["monitor"],
+        generate_new_users=False,
+        generate_course_map=True,
+        max_rows=6,
+    )
+
+    zf = open_zip(pkg.zip_bytes)
+    parts = sorted(n for n in zf.namelist() if "CourseMap_Combi_" in n)
+    combined = pkg.audit_df[pkg.audit_df["file"].str.contains("CourseMap_Combi_")]
+
+    assert [p.rsplit("_", 1)[-1] for p in parts] == [f"part{i}of4.xls" for i in range(1, 5)]
+    assert combined["rows"].tolist() == [6, 6, 6, 2]
+    assert combined["parts"].unique().tolist() == [4]
+    with zf.open(parts[0]) as f:
+        first = pd.read_excel(f)
+    assert list(first.columns) == ROLES_COLUMNS and len(first) == 6
+    assert any("writing 4 parts" in entry["message"] for entry in pkg.logs)
+
+
+def test_individual_new_users_audit_counts_one_row_each():
+    pkg = generate_staff_package(
+        department_name="DL",
+        full_names=["A", "B", "C"],
+        raw_emails="a@ntu.edu.sg\nb@ntu.edu.sg\nc@ntu.edu.sg",
+        raw_course_ids="101",
+        selected_roles=["monitor"],
+        generate_new_users=True,
+        generate_course_map=False,
+    )
+
+    rows = dict(zip(pkg.audit_df["file"], pkg.audit_df["rows"]))
+    assert [n for f, n in rows.items() if "/2_NewUsersList/" in f] == [1, 1, 1]
+    assert [n for f, n in rows.items() if "NewUsers_Combi_" in f] == [3]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_student_package_in_other_formats(fmt):
+    pkg = generate_student_package(
+        cohort_name="Cohort2026",
+        full_names=["Student One", "Student Two"],
+        raw_emails="s1@e.ntu.edu.sg\ns2@e.ntu.edu.sg",
+        raw_course_ids="201",
+        generate_y1_new_users=True,
+        generate_course_map=True,
+        output_format=fmt,
+    )
+
+    zf = open_zip(pkg.zip_bytes)
+    assert all(n.endswith((f".{fmt}", "manifest.json")) for n in zf.namelist())
+    with zf.open(next(n for n in zf.namelist() if "CID201" in n)) as f:
+        df = pd.read_csv(f) if fmt == "csv" else pd.read_excel(f)
+    assert list(df.columns) == ROLES_COLUMNS
+    assert df["* login"].tolist() == ["s1@e.ntu.edu.sg", "s2@e.ntu.edu.sg"]
+
+
+def test_plan_predicts_parts_before_generation():
+    from core.backend_3_Bulk_User_Excel_Gen import plan_outputs
+
+    plan = {p["workbook"]: p for p in plan_outputs("student", 500, 150, True, True)}
+    staff = {p["workbook"]: p for p in plan_outputs("staff", 500, 150, False, True)}
+
+    assert plan["CourseMap_Combi (per course)"] == {"workbook": "CourseMap_Combi (per course)", "files": 150, "rows": 500, "parts": 1}
+    assert staff["CourseMap_Combi"]["rows"] == 75_000
+    assert staff["CourseMap_Combi"]["parts"] == 2
+
+
 
 # pytest --cov=core.backend_3_Bulk_User_Excel_Gen --cov-report=term-missing
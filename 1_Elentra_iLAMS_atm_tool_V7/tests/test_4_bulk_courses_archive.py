@@ -57,3 +57,31 @@ def test_dry_run_produces_audit_only(mock_get_driver, mock_row_count):
     mock_get_driver.return_value = (driver, wait)
 
     mock_row_count.r
+
+
+# -------------------------------------------------
+# BROWSER RECOVERY
+# -------------------------------------------------
+
+@patch("core.backend_4_Bulk_Courses_Archive.AdaptiveRateLimiter", MagicMock())
+@patch("core.session_supervisor.time.sleep")
+@patch("core.session_supervisor.debugger_port_open", return_value=True)
+@patch("core.backend_4_Bulk_Courses_Archive.Select")
+@patch("core.backend_4_Bulk_Courses_Archive._read_course_row", return_value=("C1", "Course One"))
+@patch("core.backend_4_Bulk_Courses_Archive._load_course_list", return_value=1)
+@patch("core.backend_4_Bulk_Courses_Archive.get_driver")
+def test_recovered_archive_records_one_outcome(
+    mock_get_driver, _load, _read, _select, _port_open, _sleep, tmp_path,
+):
+    from selenium.common.exceptions import InvalidSessionIdException
+    from core.run_history import RunHistory
+
+    dead = MagicMock()
+    dead.find_element.side_effect = InvalidSessionIdException("invalid session id")
+    mock_get_driver.side_effect = [(dead, MagicMock()), (MagicMock(), MagicMock())]
+    history = RunHistory(tmp_path / "history.sqlite3")
+
+    result = run_bulk_course_archive(excluded_ids=[], dry_run=False, max_courses=1, history=history)
+
+    assert list(result["dataframe"]["action"]) == ["ARCHIVED"]
+    assert history.items_frame()["outcome"].tolist() == ["success"]
@@ -0,0 +1,136 @@
+import io
+import json
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from core.cli import EXIT_OK, EXIT_STOPPED, main, read_lessons_csv
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+def run_cli(argv):
+    out = io.StringIO()
+    code = main(argv, stream=out)
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    return code, events
+
+
+def test_cli_does_not_import_streamlit():
+    code = "import sys, core.cli; print('streamlit' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_read_lessons_csv(tmp_path):
+    path = tmp_path / "lessons.csv"
+    path.write_text("lesson_title,lams_lesson_id,elentra_event_id\nLesson A,100,200\nLesson B,101,201\n")
+
+    lessons = read_lessons_csv(str(path))
+
+    assert lessons["lesson_title"] == ["Lesson A", "Lesson B"]
+    assert lessons["elentra_event_id"] == ["200", "201"]
+
+
+def test_package_writes_zip_and_streams_json_lines(tmp_path):
+    (tmp_path / "emails.txt").write_text("alice.tan@ntu.edu.sg\nbad-email\n")
+    (tmp_path / "names.txt").write_text("Alice Tan\n")
+    (tmp_path / "courses.txt").write_text("104\n650\n")
+
+    code, events = run_cli([
+        "--no-history", "package", "staff",
+        "--name", "DL",
+        "--emails", str(tmp_path / "emails.txt"),
+        "--names", str(tmp_path / "names.txt"),
+        "--course-ids", str(tmp_path / "courses.txt"),
+        "--course-map",
+        "--output", str(tmp_path),
+        "--no-cache",
+    ])
+
+    assert code == EXIT_OK
+    assert events[0]["event"] == "log" and "bad-email" in events[0]["message"]
+    result = events[-1]
+    assert result["event"] == "result"
+    with zipfile.ZipFile(result["output"]) as zf:
+        assert len(zf.namelist()) == len(result["files"]) == 3     # 2 workbooks + manifest.json
+
+
+def test_batch_writes_one_archive(tmp_path):
+    (tmp_path / "packages.csv").write_text(
+        "package,mode,email,course_ids\n"
+        "DL,staff,alice.tan@ntu.edu.sg,104\n"
+        "Y1,student,c001@e.ntu.edu.sg,104;650\n"
+    )
+
+    code, events = run_cli([
+        "--no-history", "batch", str(tmp_path / "packages.csv"),
+        "--course-map", "--workers", "1", "--output", str(tmp_path), "--no-cache",
+    ])
+
+    assert code == EXIT_OK
+    result = events[-1]
+    assert result["packages"] == 2 and result["failed"] == []
+    with zipfile.ZipFile(result["output"]) as zf:
+        assert sum(name.endswith(".zip") for name in zf.namelist()) == 2
+
+
+@patch("core.backend_1_Lesson_Link_Upload.run_elentra_link_upload")
+def test_stopped_upload_exits_as_stopped(mock_upload, tmp_path):
+    mock_upload.return_value = {
+        "logs": [], "results": [{"status": "success"}], "completed": False, "stopped": True,
+    }
+    path = tmp_path / "lessons.csv"
+    path.write_text("lesson_title,lams_lesson_id,elentra_event_id\nLesson A,100,200\nLesson B,101,201\n")
+
+    code, events = run_cli(["--no-history", "upload", str(path), "--monitor", "--workers", "2"])
+
+    assert code == EXIT_STOPPED
+    assert events[-1]["completed"] is False
+
+
+@patch("core.backend_2_Bulk_Search_Users._search_ilams")
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_search_streams_progress_and_writes_csv(mock_get_driver, mock_search, tmp_path):
+    mock_get_driver.return_value = (MagicMock(), MagicMock())
+    mock_search.return_value = [["1", "alice", "Alice", "Tan"]]
+    (tmp_path / "names.txt").write_text("Alice Tan\nalice tan\n")
+    output = tmp_path / "out.csv"
+
+    code, events = run_cli([
+        "--no-history", "search", str(tmp_path / "names.txt"),
+        "--no-cache", "--output", str(output),
+    ])
+
+    assert code == EXIT_OK
+    assert {e["event"] for e in events} == {"log", "progress", "result"}
+    assert events[-1]["statuses"] == {"Exist": 2}
+    assert len(output.read_text().splitlines()) == 1 + 2      # header + one row per input
+
+
+@patch("core.backend_2_Bulk_Search_Users._search_ilams")
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_profile_option_targets_that_profiles_chrome(mock_get_driver, mock_search, tmp_path):
+    from core import config as config_module
+    from core.config import ConfigProfiles, SeleniumConfig
+
+    profiles = ConfigProfiles(tmp_path / "profiles.json")
+    profiles.save("chrome-b", SeleniumConfig(debugger_address="127.0.0.1:9333"))
+    mock_get_driver.return_value = (MagicMock(), MagicMock())
+    mock_search.return_value = []
+    (tmp_path / "names.txt").write_text("Alice Tan\n")
+
+    argv = ["--no-history", "--profile", "chrome-b", "search", str(tmp_path / "names.txt"),
+            "--no-cache", "--output", str(tmp_path / "out.csv")]
+    with patch.object(config_module, "_profiles", profiles):
+        code, _ = run_cli(argv)
+        assert code == EXIT_OK
+        assert mock_get_driver.call_args[0][0].debugger_address == "127.0.0.1:9333"
+
+        code, events = run_cli(argv[:2] + ["missing"] + argv[3:])
+    assert code == 1
+    assert events[-1] == {"event": "error", "message": "Unknown config profile: missing"}
@@ -0,0 +1,52 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Pages whose first render is only a form: Selenium, pandas and xlwt
+# should load once a run starts, not before.
+FORM_PAGES = [
+    "Home.py",
+    "pages/1_Bulk_Lesson_Link_Upload.py",
+    "pages/2_Bulk_Search_Users.py",
+    "pages/3_[Cloud]_Bulk_User_Excel_Gen.py",
+    "pages/4_Bulk_Courses_Archive.py",
+]
+
+PROBE = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+print(json.dumps({
+    "exception": [e.message for e in at.exception],
+    "loaded": [m for m in ("selenium", "pandas", "xlwt") if m in sys.modules],
+}))
+"""
+
+
+@pytest.mark.parametrize("page", FORM_PAGES)
+def test_first_render_skips_heavy_imports(page):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, page],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert probe["exception"] == []
+    assert probe["loaded"] == []
+
+
+def test_chatbot_imports_without_its_model_stack():
+    code = (
+        "import sys, chatbot.qa; "
+        "print([m for m in ('ollama', 'faiss', 'docling', 'pytesseract') if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,96 @@
+import dataclasses
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from core import config as config_module
+from core.config import ConfigProfiles, SeleniumConfig
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    return ConfigProfiles(tmp_path / "profiles.json")
+
+
+def test_snapshots_are_immutable():
+    cfg = SeleniumConfig(debugger_address="127.0.0.1:9222")
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.debugger_address = "127.0.0.1:9333"
+
+    changed = cfg.replace(debugger_address="127.0.0.1:9333", lams_base_url=None)
+    assert cfg.debugger_address == "127.0.0.1:9222"
+    assert changed.debugger_address == "127.0.0.1:9333"
+    assert changed.lams_base_url == cfg.lams_base_url      # None leaves a field as is
+
+
+def test_set_config_does_not_touch_handed_out_snapshots(profiles):
+    with patch.object(config_module, "_profiles", profiles), patch.object(config_module, "_override", None):
+        running_job = config_module.get_config()
+        updated = config_module.set_config(debugger_address="127.0.0.1:9333")
+
+        assert config_module.get_config() is updated
+        assert running_job.debugger_address == "127.0.0.1:9222"
+
+
+def test_profiles_round_trip_through_the_file(profiles):
+    profiles.save("chrome-b", SeleniumConfig(debugger_address="127.0.0.1:9333"))
+    profiles.save("default", SeleniumConfig())
+
+    reloaded = ConfigProfiles(profiles.path)
+
+    assert reloaded.names() == ["chrome-b", "default"]
+    assert reloaded.get("chrome-b").debugger_address == "127.0.0.1:9333"
+    assert reloaded.get("missing") is None
+
+    reloaded.delete("chrome-b")
+    assert ConfigProfiles(profiles.path).names() == ["default"]
+
+
+def test_profiles_need_a_debugger_port(profiles):
+    assert config_module.debugger_port("localhost:9333") == 9333
+
+    for address in ("localhost", "127.0.0.1:", "127.0.0.1:port", "127.0.0.1:70000"):
+        with pytest.raises(ValueError, match="host:port"):
+            profiles.save("bad", SeleniumConfig(debugger_address=address))
+    assert profiles.names() == []
+
+
+def test_profiles_file_is_read_once(profiles):
+    profiles.save("a", SeleniumConfig())
+    fresh = ConfigProfiles(profiles.path)
+    assert fresh.names() == ["a"]
+
+    # Edits to the file after the first read are not picked up.
+    profiles.path.write_text(json.dumps({"b": {}}))
+    assert fresh.names() == ["a"]
+
+
+def test_profiles_ignore_unknown_fields(profiles):
+    profiles.path.write_text(json.dumps({"old": {"debugger_address": "127.0.0.1:9444", "retired": 1}}))
+
+    assert profiles.get("old").debugger_address == "127.0.0.1:9444"
+
+
+def test_concurrent_saves_keep_every_profile(profiles):
+    def save(n):
+        profiles.save(f"p{n}", SeleniumConfig(debugger_address=f"127.0.0.1:{9222 + n}"))
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(ConfigProfiles(profiles.path).names()) == 20
+
+
+def test_default_profile_seeds_get_config(profiles):
+    profiles.save("default", SeleniumConfig(debugger_address="127.0.0.1:9555"))
+
+    with patch.object(config_module, "_profiles", profiles), patch.object(config_module, "_override", None):
+        assert config_module.get_config().debugger_address == "127.0.0.1:9555"
+        with pytest.raises(ValueError):
+            config_module.load_profile("missing")
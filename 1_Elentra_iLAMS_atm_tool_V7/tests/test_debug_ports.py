@@ -0,0 +1,125 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.config import SeleniumConfig
+from core.debug_ports import DebugPortPool, PortLeaseTimeout, leased_chrome
+
+
+@pytest.fixture
+def pool(tmp_path):
+    return DebugPortPool(ports=[9301, 9302], profile_root=tmp_path)
+
+
+def test_each_job_gets_its_own_port_and_profile(pool, tmp_path):
+    a = pool.acquire("a")
+    b = pool.acquire("b")
+
+    assert {a.port, b.port} == {9301, 9302}
+    assert a.profile_dir == str(tmp_path / f"port_{a.port}")
+    assert a.profile_dir != b.profile_dir
+
+    cfg = a.config(SeleniumConfig())
+    assert cfg.debugger_address == f"127.0.0.1:{a.port}"
+    assert cfg.chrome_profile_dir == a.profile_dir
+
+
+def test_saturated_pool_queues_until_a_release(pool):
+    held = [pool.acquire("a"), pool.acquire("b")]
+    waits, got = [], []
+
+    def job():
+        got.append(pool.acquire("c", on_wait=waits.append))
+
+    t = threading.Thread(target=job)
+    t.start()
+    time.sleep(0.1)
+    assert got == [] and waits == [1] and pool.waiting == 1
+
+    pool.release(held[1])
+    t.join(timeout=2)
+    assert got[0].port == held[1].port
+    assert pool.waiting == 0
+
+
+def test_waiting_jobs_are_served_in_order(pool):
+    held = [pool.acquire("a"), pool.acquire("b")]
+    order = []
+
+    def job(name):
+        lease = pool.acquire(name)
+        order.append(name)
+        time.sleep(0.05)
+        pool.release(lease)
+
+    threads = []
+    for name in ("c", "d", "e"):
+        threads.append(threading.Thread(target=job, args=(name,)))
+        threads[-1].start()
+        time.sleep(0.05)
+
+    pool.release(held[0])
+    for t in threads:
+        t.join(timeout=5)
+    assert order == ["c", "d", "e"]
+
+
+def test_acquire_times_out(pool):
+    pool.acquire("a")
+    pool.acquire("b")
+
+    with pytest.raises(TimeoutError):
+        pool.acquire("c", timeout=0.05)
+    assert pool.waiting == 0
+
+
+def test_stop_flag_leaves_the_queue(pool):
+    pool.acquire("a")
+    pool.acquire("b")
+
+    started = time.monotonic()
+    with pytest.raises(PortLeaseTimeout):
+        pool.acquire("c", should_stop=lambda: time.monotonic() - started > 0.1)
+    assert time.monotonic() - started < 3
+    assert pool.waiting == 0
+
+
+def test_lease_is_released_when_the_job_fails(pool):
+    with pytest.raises(RuntimeError):
+        with pool.lease("a"):
+            raise RuntimeError("tab crashed")
+
+    assert pool.status() == []
+
+
+def test_lease_of_a_dead_thread_is_reclaimed(pool):
+    t = threading.Thread(target=lambda: (pool.acquire("a"), pool.acquire("b")))
+    t.start()
+    t.join()
+
+    lease = pool.acquire("c", timeout=2)
+    assert lease.port in (9301, 9302)
+    assert [row["job"] for row in pool.status()] == ["c"]
+
+
+@patch("core.session_supervisor.debugger_port_open", return_value=False)
+def test_leased_chrome_launches_on_the_lease_profile(mock_open, pool):
+    launch = MagicMock(return_value=True)
+
+    with leased_chrome("search", SeleniumConfig(), pool=pool, launch=launch) as cfg:
+        port = int(cfg.debugger_address.rpartition(":")[2])
+        launch.assert_called_once_with(port=port, profile_dir=cfg.chrome_profile_dir)
+        assert pool.status()[0]["job"] == "search"
+
+    assert pool.status() == []
+
+
+@patch("core.session_supervisor.debugger_port_open", return_value=False)
+def test_leased_chrome_releases_when_launch_fails(mock_open, pool):
+    with pytest.raises(RuntimeError):
+        with leased_chrome("search", SeleniumConfig(), pool=pool, launch=MagicMock(return_value=False)):
+            pass
+
+    assert pool.status() == []
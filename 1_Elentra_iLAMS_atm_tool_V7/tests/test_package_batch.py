@@ -0,0 +1,126 @@
+import zipfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import workbook_pool
+from core.backend_3_Bulk_User_Excel_Gen import generate_staff_package
+from core.package_batch import AUDIT_NAME, generate_batch, read_batch_manifest
+from core.run_history import RunHistory
+
+MANIFEST = b"""package,mode,email,name,course_ids,roles
+DL,staff,alice.tan@ntu.edu.sg,Alice Tan,104;650,monitor;author
+DL,staff,bob.lim@ntu.edu.sg,Bob Lim,,
+Y1,Student,c001@e.ntu.edu.sg,Chan Wei,104;650,
+Y1,student,c002@e.ntu.edu.sg,Dan Ng,104;650,
+"""
+
+
+def members_of(raw):
+    zf = zipfile.ZipFile(BytesIO(raw))
+    return {name: zf.read(name) for name in zf.namelist()}
+
+
+def members(handle):
+    return members_of(handle.read())
+
+
+def test_rows_are_grouped_into_packages():
+    dl, y1 = read_batch_manifest(MANIFEST)
+
+    assert (dl.mode, dl.name, dl.emails) == ("staff", "DL", ["alice.tan@ntu.edu.sg", "bob.lim@ntu.edu.sg"])
+    assert dl.course_ids == ["104", "650"] and dl.roles == ["monitor", "author"]
+    assert (y1.mode, y1.full_names) == ("student", ["Chan Wei", "Dan Ng"])
+
+
+def test_bad_rows_are_reported_by_line():
+    with pytest.raises(ValueError, match="lines 3"):
+        read_batch_manifest(b"package,mode,email\nDL,staff,a@ntu.edu.sg\nDL,teacher,b@ntu.edu.sg\n")
+    with pytest.raises(ValueError, match="email"):
+        read_batch_manifest(b"package,mode\nDL,staff\n")
+
+
+def test_names_that_share_a_file_name_are_rejected():
+    manifest = b"package,mode,email\nDL/1,staff,a@ntu.edu.sg\nDL/1,staff,b@ntu.edu.sg\nDL1,staff,c@ntu.edu.sg\n"
+    with pytest.raises(ValueError, match="line 4 'DL1' has the same file name as line 2 'DL/1'"):
+        read_batch_manifest(manifest)
+    with pytest.raises(ValueError, match="line 3 'dl'"):
+        read_batch_manifest(b"package,mode,email\nDL,staff,a@ntu.edu.sg\ndl,staff,b@ntu.edu.sg\n")
+
+    # The same name in both modes is fine: the file names differ by prefix.
+    assert len(read_batch_manifest(b"package,mode,email\nDL,staff,a@ntu.edu.sg\nDL,student,c@e.ntu.edu.sg\n")) == 2
+
+
+def test_batch_archive_holds_every_package_and_a_combined_audit():
+    batch = generate_batch(MANIFEST, generate_new_users=True, generate_course_map=True, workers=1)
+
+    files = members(batch.zip_file)
+    inner = [name for name in files if name.endswith(".zip")]
+    assert len(inner) == batch.packages == 2
+    assert inner[0].startswith("StaffCEs_DL_") and inner[1].startswith("Student_Y1_")
+    assert batch.audit_df.columns[:3].tolist() == ["package", "mode", "zip"]
+    assert set(batch.audit_df["package"]) == {"DL", "Y1"}
+    assert files[AUDIT_NAME].decode().startswith("package,mode,zip,file,rows")
+
+    # Each inner ZIP is the package a single-package run produces.
+    single = generate_staff_package(
+        department_name="DL", full_names=["Alice Tan", "Bob Lim"],
+        raw_emails="alice.tan@ntu.edu.sg\nbob.lim@ntu.edu.sg", raw_course_ids="104\n650",
+        selected_roles=["monitor", "author"], generate_new_users=True, generate_course_map=True, workers=1,
+    )
+    assert inner[0] == single.zip_filename
+    assert members_of(files[inner[0]]).keys() == members(single.zip_file).keys()
+
+
+def test_a_failing_package_does_not_stop_the_batch(tmp_path):
+    manifest = MANIFEST + b"BAD,student,e001@e.ntu.edu.sg,Eve,12x,\n"
+    history = RunHistory(tmp_path / "runs.db")
+
+    batch = generate_batch(manifest, generate_new_users=False, generate_course_map=True, workers=1, history=history)
+
+    assert batch.failed == ["BAD"]
+    assert batch.packages == 2
+    assert any(e["level"] == "ERROR" and e["message"].startswith("student BAD") for e in batch.logs)
+    items = history.items_frame()
+    batch_items = items[items["tool"] == "batch_package"]
+    assert batch_items.set_index("item")["outcome"].to_dict() == {"DL": "success", "Y1": "success", "BAD": "error"}
+
+
+def test_batch_shares_one_pool(monkeypatch):
+    started = []
+    real = workbook_pool._executor
+
+    def counting(workers):
+        started.append(workers)
+        return real(1)
+
+    monkeypatch.setattr(workbook_pool, "_executor", counting)
+    monkeypatch.setattr(workbook_pool, "PARALLEL_MIN_CELLS", 1)
+
+    batch = generate_batch(MANIFEST, generate_new_users=True, generate_course_map=True, workers=2)
+
+    assert started == [2]
+    assert batch.packages == 2
+
+
+def test_package_without_valid_emails_is_left_out():
+    manifest = MANIFEST + b"XX,staff,not-an-email,Nobody,104,\n"
+    batch = generate_batch(manifest, generate_new_users=True, generate_course_map=True, workers=1)
+
+    assert batch.packages == 2
+    assert "XX" not in set(batch.audit_df["package"])
+    assert any(e["level"] == "WARN" and e["message"] == "staff XX: no valid emails; left out." for e in batch.logs)
+
+
+def test_blank_cells_of_a_frame_are_empty_strings():
+    df = pd.DataFrame({
+        "package": ["DL", "DL"], "mode": ["staff", "staff"],
+        "email": ["a@ntu.edu.sg", "b@ntu.edu.sg"], "name": ["A", None],
+        "course_ids": ["104", np.nan], "roles": [None, "monitor"],
+    })
+    (dl,) = read_batch_manifest(df)
+
+    assert dl.course_ids == ["104"] and dl.roles == ["monitor"]
+    assert dl.full_names == []
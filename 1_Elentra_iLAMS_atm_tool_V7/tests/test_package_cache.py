@@ -0,0 +1,151 @@
+import json
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from core.backend_3_Bulk_User_Excel_Gen import generate_staff_package, generate_student_package
+from core.package_cache import PackageCache, package_key, workbook_key
+from core.package_zip import PackageZip
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PackageCache(tmp_path / "cache")
+
+
+def zip_of(*names, size=10):
+    package = PackageZip()
+    for name in names:
+        package.add(name, b"x" * size)
+    return package.finish()
+
+
+def staff(cache, emails="a@ntu.edu.sg\nb@ntu.edu.sg", courses="101\n102", **kwargs):
+    args = dict(
+        department_name="DL",
+        full_names=["A", "B"],
+        raw_emails=emails,
+        raw_course_ids=courses,
+        selected_roles=["monitor"],
+        generate_new_users=False,
+        generate_course_map=True,
+        cache=cache,
+    )
+    args.update(kwargs)
+    return generate_staff_package(**args)
+
+
+def test_key_ignores_line_order_but_not_pairing():
+    flags = {"new_users": True}
+    key = package_key("staff", "DL", ["a", "b"], ["A", "B"], ["1", "2"], ["monitor", "author"], flags, "20260101")
+
+    assert key == package_key("staff", "DL", ["b", "a"], ["B", "A"], ["2", "1"], ["author", "monitor"], flags, "20260101")
+    assert key != package_key("staff", "DL", ["a", "b"], ["B", "A"], ["1", "2"], ["monitor", "author"], flags, "20260101")
+    assert key != package_key("staff", "DL", ["a", "b"], ["A", "B"], ["1", "2"], ["monitor", "author"], flags, "20260102")
+
+
+def test_identical_request_is_answered_from_the_cache(cache):
+    first = staff(cache)
+    second = staff(cache, emails="b@ntu.edu.sg\na@ntu.edu.sg")
+
+    assert cache.stats()["hits"] == 1
+    assert second.zip_filename == first.zip_filename
+    assert second.zip_bytes == first.zip_bytes
+    assert second.audit_df.equals(first.audit_df)
+    assert "reusing it from the cache" in second.logs[-1]["message"]
+
+
+def test_cache_hit_reports_progress(cache):
+    first = staff(cache)
+    progress = []
+    staff(cache, progress_callback=lambda done, total: progress.append((done, total)))
+
+    files = len(first.audit_df)
+    assert progress == [(files, files)]
+
+
+def test_names_key_the_package_only_when_they_are_in_it(cache):
+    pkg = staff(cache)
+    staff(cache, full_names=["X", "Y"])
+    assert cache.stats()["hits"] == 1
+
+    zf = zipfile.ZipFile(BytesIO(pkg.zip_bytes))
+    manifest = json.loads(zf.read(next(n for n in zf.namelist() if n.endswith("manifest.json"))))
+    assert {u["name"] for u in manifest["users"]} == {""}
+
+    staff(cache, generate_new_users=True)
+    staff(cache, generate_new_users=True, full_names=["X", "Y"])
+    assert cache.stats()["hits"] == 1
+
+
+def test_workbook_key_follows_the_source_not_the_cells():
+    assert workbook_key("xls", ["roles", "a"]) == workbook_key("xls", ["roles", "a"])
+    assert workbook_key("xls", ["roles", "a"]) != workbook_key("csv", ["roles", "a"])
+    assert workbook_key("xls", ["roles", "a"]) != workbook_key("xls", ["roles", "b"])
+
+
+def test_put_package_leaves_no_temp_files(cache):
+    cache.put_package("a", zip_of("f.xls"), {"zip_filename": "a", "audit": []})
+
+    assert sorted(p.name for p in cache.path.iterdir()) == ["a.json", "a.zip"]
+
+
+def test_cache_survives_a_restart(cache):
+    first = staff(cache)
+    reopened = PackageCache(cache.path)
+
+    assert staff(reopened).zip_bytes == first.zip_bytes
+    assert reopened.stats()["hits"] == 1
+
+
+def test_shared_courses_reuse_workbooks(cache):
+    staff(cache)
+    # One more user: the two existing per-user course maps are reused.
+    staff(cache, emails="a@ntu.edu.sg\nb@ntu.edu.sg\nc@ntu.edu.sg", full_names=["A", "B", "C"])
+
+    stats = cache.stats()
+    assert stats["hits"] == 0
+    assert stats["workbook_hits"] == 2
+
+
+def test_toggling_an_output_reuses_the_other_workbooks(cache):
+    args = dict(
+        cohort_name="Y1",
+        full_names=["S1", "S2"],
+        raw_emails="s1@e.ntu.edu.sg\ns2@e.ntu.edu.sg",
+        raw_course_ids="201\n202",
+        generate_course_map=True,
+        cache=cache,
+    )
+    generate_student_package(generate_y1_new_users=False, **args)
+    pkg = generate_student_package(generate_y1_new_users=True, **args)
+
+    assert cache.stats()["workbook_hits"] == 2
+    assert len(zipfile.ZipFile(BytesIO(pkg.zip_bytes)).namelist()) == 4      # + manifest.json
+
+
+def test_packages_are_evicted_least_recently_used_first(tmp_path):
+    cache = PackageCache(tmp_path / "cache", max_bytes=250)
+    for key in ("a", "b"):
+        cache.put_package(key, zip_of("f.xls", size=10), {"zip_filename": key, "audit": []})
+    cache.get_package("a")                      # a is now the most recent
+    cache.put_package("c", zip_of("f.xls", size=10), {"zip_filename": "c", "audit": []})
+
+    assert cache.get_package("b") is None
+    assert cache.get_package("a") is not None
+    assert not (cache.path / "b.zip").exists()
+
+
+def test_workbooks_are_capped_by_size(tmp_path):
+    cache = PackageCache(tmp_path / "cache", workbook_max_bytes=25)
+    cache.put_workbook("a", b"x" * 10)
+    cache.put_workbook("b", b"x" * 10)
+    cache.get_workbook("a")
+    cache.put_workbook("c", b"x" * 10)
+    cache.put_workbook("huge", b"x" * 100)
+
+    assert cache.get_workbook("b") is None
+    assert cache.get_workbook("a") == b"x" * 10
+    assert cache.get_workbook("huge") is None
+    assert cache.stats()["workbook_bytes"] == 20
@@ -0,0 +1,126 @@
+import json
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from core.backend_3_Bulk_User_Excel_Gen import generate_staff_package, generate_student_package
+from core.package_manifest import RosterDelta, load_manifest
+
+
+def student(emails, courses, previous=None, **kwargs):
+    return generate_student_package(
+        cohort_name="Y1",
+        full_names=[e.split("@")[0].upper() for e in emails],
+        raw_emails="\n".join(emails),
+        raw_course_ids="\n".join(courses),
+        previous=previous,
+        **{"generate_y1_new_users": True, "generate_course_map": True, **kwargs},
+    )
+
+
+def sheets(pkg):
+    zf = zipfile.ZipFile(BytesIO(pkg.zip_bytes))
+    out = {}
+    for name in zf.namelist():
+        if name.endswith(".xls"):
+            with zf.open(name) as f:
+                out[name.rsplit("/", 1)[-1]] = pd.read_excel(f)
+    return out
+
+
+def test_every_package_carries_its_roster():
+    pkg = student(["a@e.ntu.edu.sg", "b@e.ntu.edu.sg"], ["201"])
+    manifest = load_manifest(pkg.zip_bytes)
+
+    assert manifest["mode"] == "student"
+    assert [u["email"] for u in manifest["users"]] == ["a@e.ntu.edu.sg", "b@e.ntu.edu.sg"]
+    assert manifest["course_ids"] == ["201"]
+    assert "delta" not in manifest
+
+
+def test_student_delta_holds_only_new_rows():
+    before = student(["a@e.ntu.edu.sg", "b@e.ntu.edu.sg"], ["201", "202"])
+    after = student(["a@e.ntu.edu.sg", "c@e.ntu.edu.sg"], ["201", "202", "203"], previous=before.zip_bytes)
+
+    files = sheets(after)
+    users = next(df for name, df in files.items() if name.startswith("NewUsers_"))
+    cid201 = next(df for name, df in files.items() if "CID201" in name)
+    cid203 = next(df for name, df in files.items() if "CID203" in name)
+
+    assert after.zip_filename.endswith("_delta.zip")
+    assert users["* login"].tolist() == ["c@e.ntu.edu.sg"]
+    assert cid201["* login"].tolist() == ["c@e.ntu.edu.sg"]                  # new student only
+    assert cid203["* login"].tolist() == ["a@e.ntu.edu.sg", "c@e.ntu.edu.sg"]  # new course: everyone
+    assert any("b@e.ntu.edu.sg" in e["message"] and e["level"] == "WARN" for e in after.logs)
+
+    manifest = load_manifest(after.zip_bytes)
+    assert manifest["delta"]["removed_users"] == ["b@e.ntu.edu.sg"]
+    assert [u["email"] for u in manifest["users"]] == ["a@e.ntu.edu.sg", "c@e.ntu.edu.sg"]
+
+
+def test_unchanged_roster_gives_a_manifest_only_delta(tmp_path):
+    before = student(["a@e.ntu.edu.sg"], ["201"])
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps(load_manifest(before.zip_bytes)))
+
+    after = student(["a@e.ntu.edu.sg"], ["201"], previous=str(manifest_path))
+
+    assert sheets(after) == {}
+    assert after.audit_df["file"].str.endswith("manifest.json").all()
+
+
+def test_staff_delta_and_role_changes():
+    args = dict(department_name="DL", full_names=[], generate_new_users=False, generate_course_map=True)
+    before = generate_staff_package(raw_emails="a@ntu.edu.sg", raw_course_ids="101", selected_roles=["monitor"], **args)
+
+    added_course = generate_staff_package(
+        raw_emails="a@ntu.edu.sg", raw_course_ids="101\n102", selected_roles=["monitor"],
+        previous=before.zip_bytes, **args,
+    )
+    new_roles = generate_staff_package(
+        raw_emails="a@ntu.edu.sg", raw_course_ids="101", selected_roles=["monitor", "author"],
+        previous=before.zip_bytes, **args,
+    )
+
+    combined = next(df for name, df in sheets(added_course).items() if name.startswith("CourseMap_Combi_"))
+    assert combined["* organisation"].tolist() == [102]
+    assert next(df for name, df in sheets(new_roles).items() if name.startswith("CourseMap_Combi_"))["* roles"].tolist() == ["monitor|author"]
+
+
+def test_previous_package_must_match_the_mode():
+    before = student(["a@e.ntu.edu.sg"], ["201"])
+    with pytest.raises(ValueError):
+        generate_staff_package(
+            department_name="DL", full_names=[], raw_emails="a@ntu.edu.sg", raw_course_ids="101",
+            selected_roles=["monitor"], generate_new_users=False, generate_course_map=True,
+            previous=before.zip_bytes,
+        )
+    with pytest.raises(ValueError):
+        load_manifest(b"not a manifest")
+
+
+def test_delta_masks():
+    delta = RosterDelta.between(
+        {"mode": "student", "users": [{"email": "a"}], "course_ids": ["1"], "roles": ["learner"]},
+        "student", ["a", "b"], [1, 2], ["learner"],
+    )
+
+    assert delta.added_users == ["b"] and delta.added_courses == ["2"]
+    assert delta.new_rows(["a", "b", "a", "b"], [1, 1, 2, 2]).tolist() == [False, True, True, True]
+
+
+def test_output_missing_from_the_previous_package_is_written_in_full():
+    emails = ["a@e.ntu.edu.sg", "b@e.ntu.edu.sg"]
+    before = student(emails, ["201"], generate_y1_new_users=False)
+    after = student(emails + ["c@e.ntu.edu.sg"], ["201"], previous=before.zip_bytes)
+
+    files = sheets(after)
+    users = next(df for name, df in files.items() if name.startswith("NewUsers_"))
+    cid201 = next(df for name, df in files.items() if "CID201" in name)
+
+    assert load_manifest(before.zip_bytes)["outputs"] == {"new_users": False, "course_map": True}
+    assert users["* login"].tolist() == emails + ["c@e.ntu.edu.sg"]   # never written before: everyone
+    assert cid201["* login"].tolist() == ["c@e.ntu.edu.sg"]           # written before: new rows only
+    assert load_manifest(after.zip_bytes)["delta"]["full_outputs"] == ["new_users"]
@@ -0,0 +1,46 @@
+import os
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from core.package_zip import PackageZip, ZipHandle
+
+
+def test_entries_are_written_as_they_are_added(tmp_path):
+    with PackageZip() as package:
+        package.add("pkg/a.xls", b"a" * 1000)
+        package.add("pkg/b.xls", b"b")
+        handle = package.finish()
+
+    zf = zipfile.ZipFile(BytesIO(handle.read()))
+    assert zf.namelist() == ["pkg/a.xls", "pkg/b.xls"]
+    assert zf.read("pkg/a.xls") == b"a" * 1000
+    assert handle.size == len(handle.read())
+
+    saved = handle.save(tmp_path / "pkg.zip")
+    assert saved.read_bytes() == handle.read()
+
+
+def test_large_packages_roll_over_to_disk():
+    data = os.urandom(64 * 1024)     # does not deflate below the spool limit
+    package = PackageZip(spool_max=1024)
+    package.add("big.bin", data)
+
+    assert package._file._rolled
+    assert zipfile.ZipFile(BytesIO(package.finish().read())).read("big.bin") == data
+
+
+def test_a_failed_build_discards_the_spool():
+    with pytest.raises(RuntimeError):
+        with PackageZip() as package:
+            package.add("a.xls", b"a")
+            raise RuntimeError("boom")
+
+    assert package._file.closed
+    with pytest.raises(ValueError):
+        package.add("b.xls", b"b")
+
+
+def test_empty_package_is_a_valid_zip():
+    assert zipfile.ZipFile(BytesIO(ZipHandle.empty().read())).namelist() == []
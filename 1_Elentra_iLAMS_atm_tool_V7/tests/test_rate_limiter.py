@@ -0,0 +1,102 @@
+import pytest
+
+from selenium.common.exceptions import TimeoutException
+
+from core.rate_limiter import AdaptiveRateLimiter
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock, **kwargs):
+    return AdaptiveRateLimiter(clock=clock, sleep=clock.sleep, jitter=0, **kwargs)
+
+
+# -------------------------------------------------
+# PACING
+# -------------------------------------------------
+
+def test_wait_spaces_requests_at_current_rate():
+    clock = FakeClock()
+    limiter = make_limiter(clock, initial_rate=30.0)   # one every 2s
+
+    limiter.wait()          # first request goes straight away
+    clock.now += 0.5        # request took 0.5s
+    limiter.wait()
+
+    assert clock.slept == [pytest.approx(1.5)]
+
+
+# -------------------------------------------------
+# AIMD
+# -------------------------------------------------
+
+def test_additive_increase_on_healthy_responses():
+    clock = FakeClock()
+    limiter = make_limiter(clock, initial_rate=20.0, increase_step=2.0, max_rate=24.0)
+
+    for _ in range(3):
+        limiter.record_success(latency=1.0)
+
+    assert limiter.rate == 24.0   # capped at max_rate
+
+
+def test_multiplicative_decrease_on_trouble():
+    clock = FakeClock()
+    logs = []
+    limiter = make_limiter(
+        clock,
+        initial_rate=20.0,
+        min_rate=4.0,
+        log=lambda msg, level="info": logs.append(msg),
+    )
+
+    with pytest.raises(TimeoutException):
+        with limiter.track():
+            raise TimeoutException("page did not load")
+    assert limiter.rate == 10.0
+
+    limiter.record_success(latency=30.0)     # slow response also backs off
+    assert limiter.rate == 5.0
+
+    limiter.record_error(TimeoutException())
+    assert limiter.rate == 4.0               # floored at min_rate
+    assert any("Throttling down" in m for m in logs)
+
+
+def test_non_site_errors_do_not_back_off():
+    clock = FakeClock()
+    limiter = make_limiter(clock, initial_rate=20.0)
+
+    with pytest.raises(ValueError):
+        with limiter.track():
+            raise ValueError("bad input")
+
+    assert limiter.rate == 20.0
+
+
+def test_back_off_is_reported_through_the_request_log():
+    clock = FakeClock()
+    shared, own = [], []
+    limiter = make_limiter(clock, log=lambda msg, level="info": shared.append(msg))
+
+    with pytest.raises(TimeoutException):
+        with limiter.track(lambda msg, level="info": own.append(msg)):
+            raise TimeoutException("page did not load")
+
+    assert shared == []
+    assert any("Throttling down" in m for m in own)
@@ -0,0 +1,113 @@
+import io
+import time
+
+import pandas as pd
+import pytest
+
+from core.backend_3_Bulk_User_Excel_Gen import generate_staff_package
+from core.roster import read_roster, validate_roster
+
+
+def reasons(report):
+    return dict(zip(report.rows["line"], report.rows["reason"]))
+
+
+def test_lines_are_checked_and_the_first_problem_reported():
+    report = validate_roster(
+        ["alice.tan@ntu.edu.sg", "", "not-an-email", "c001@e.ntu.edu.sg", "Alice.Tan@ntu.edu.sg",
+         "alice.tan@ntu.edu.sg", "alicetan@ntu.edu.sg"],
+        mode="staff",
+    )
+
+    assert reasons(report) == {
+        1: "",
+        2: "Email is empty",
+        3: "Invalid email format",
+        4: "Staff email must end with @ntu.edu.sg",
+        5: "Same email as line 1 in another case",
+        6: "Duplicate of line 1",
+        7: "Looks like line 1 (alice.tan@ntu.edu.sg)",
+    }
+    assert report.emails == ["alice.tan@ntu.edu.sg", "alicetan@ntu.edu.sg"]   # warnings are kept
+    assert report.summary() == "7 lines: 1 ok, 1 with warnings, 5 left out."
+
+
+def test_names_travel_with_their_emails():
+    report = validate_roster(
+        ["alice.tan@ntu.edu.sg", "bad", "bob.lim@ntu.edu.sg"], ["Alice Tan", "Nobody", "Bob Lim"], "staff",
+    )
+
+    assert report.aligned
+    assert report.names == ["Alice Tan", "Bob Lim"]
+
+
+def test_name_alignment_problems():
+    shifted = validate_roster(["alice.tan@ntu.edu.sg", "bob.lim@ntu.edu.sg"], ["Bob Lim", "Alice Tan"], "staff")
+    assert set(shifted.problems["reason"]) == {"Name does not match the email"}
+
+    extra = validate_roster(["alice.tan@ntu.edu.sg"], ["Alice Tan", "Bob Lim"], "staff")
+    assert not extra.aligned and extra.names == []
+    assert extra.problems["reason"].tolist() == ["Name without an email"]
+
+    missing = validate_roster(["alice.tan@ntu.edu.sg", "bob.lim@ntu.edu.sg"], ["Alice Tan"], "staff")
+    assert missing.problems["reason"].tolist() == ["No name on this line"]
+
+
+def test_names_are_only_checked_when_asked():
+    emails = ["alice.tan@ntu.edu.sg", "bob.lim@ntu.edu.sg"]
+    assert validate_roster(emails, ["Bob Lim", "Alice Tan", "Carol"], "staff", check_names=False).problems.empty
+    assert validate_roster(emails, ["Alice Tan"], "staff", check_names=False).problems.empty
+
+
+def test_course_map_only_package_skips_the_name_checks():
+    pkg = generate_staff_package(
+        department_name="DL",
+        full_names=["Bob Lim", "Alice Tan"],
+        raw_emails="alice.tan@ntu.edu.sg\nbob.lim@ntu.edu.sg",
+        raw_course_ids="104",
+        selected_roles=["monitor"],
+        generate_new_users=False,
+        generate_course_map=True,
+    )
+
+    assert pkg.roster.empty
+    assert not any(e["level"] == "WARN" for e in pkg.logs)
+
+
+def test_a_large_roster_validates_quickly():
+    emails = [f"student.{i}@e.ntu.edu.sg" for i in range(20_000)]
+    names = [f"Student {i}" for i in range(20_000)]
+
+    start = time.perf_counter()
+    report = validate_roster(emails, names, "student")
+
+    assert time.perf_counter() - start < 2.0    # generous; ~0.3s here
+    assert len(report.emails) == 20_000
+
+
+def test_read_roster_csv_and_xlsx():
+    csv = b"Full Name,Email\nAlice Tan,alice.tan@ntu.edu.sg\n"
+    assert read_roster(csv, "roster.csv").to_dict("records") == [{"email": "alice.tan@ntu.edu.sg", "name": "Alice Tan"}]
+
+    buf = io.BytesIO()
+    pd.DataFrame({"* login": ["bob.lim@ntu.edu.sg"]}).to_excel(buf, index=False)
+    assert read_roster(buf.getvalue(), "roster.xlsx").to_dict("records") == [{"email": "bob.lim@ntu.edu.sg", "name": ""}]
+
+    with pytest.raises(ValueError):
+        read_roster(b"who,what\n1,2\n", "roster.csv")
+
+
+def test_package_drops_bad_lines_with_their_names():
+    pkg = generate_staff_package(
+        department_name="DL",
+        full_names=["Alice Tan", "Nobody", "Alice Again"],
+        raw_emails="alice.tan@ntu.edu.sg\nnope\nALICE.TAN@ntu.edu.sg",
+        raw_course_ids="104",
+        selected_roles=["monitor"],
+        generate_new_users=True,
+        generate_course_map=False,
+    )
+
+    assert pkg.roster["line"].tolist() == [2, 3]
+    assert pkg.audit_df["file"].str.contains("NewUsers_DL_alice.tan_").any()
+    assert sum("Skipped" in e["message"] for e in pkg.logs) == 2
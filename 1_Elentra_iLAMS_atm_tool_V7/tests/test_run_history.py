@@ -0,0 +1,132 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from core.run_history import (
+    COMPLETED,
+    ERROR,
+    FAILED,
+    SUCCESS,
+    RunHistory,
+    error_rate_by_step,
+    latency_percentiles,
+    open_run,
+    run_throughput,
+    weekly_trend,
+)
+
+
+# -------------------------------------------------
+# RECORDING
+# -------------------------------------------------
+
+def test_recorder_writes_run_and_items(tmp_path):
+    now = [1_700_000_000.0]
+    history = RunHistory(tmp_path / "history.sqlite3", clock=lambda: now[0])
+
+    with open_run(history, "user_search", {"inputs": 3}, profile="127.0.0.1:9222") as run:
+        with run.item("Alice Tan", step="name_search"):
+            pass
+        with pytest.raises(RuntimeError):
+            with run.item("Bob Lim", step="name_search"):
+                raise RuntimeError("boom")
+        with run.item("Carol", step="name_search") as outcome:
+            outcome.skip("stopped")
+        now[0] += 60
+
+    runs = history.runs_frame()
+    assert runs.loc[0, "tool"] == "user_search"
+    assert runs.loc[0, "status"] == COMPLETED
+    assert runs.loc[0, "items"] == 3
+    assert runs.loc[0, "errors"] == 1
+
+    items = history.items_frame()
+    assert list(items["outcome"]) == [SUCCESS, ERROR, "skipped"]
+    assert "boom" in items.loc[1, "error"]
+
+
+def test_run_marked_failed_on_exception_and_noop_without_store(tmp_path):
+    history = RunHistory(tmp_path / "history.sqlite3")
+
+    with pytest.raises(ValueError):
+        with open_run(history, "staff_package", {}):
+            raise ValueError("Number of names must match number of emails.")
+    assert history.runs_frame().loc[0, "status"] == FAILED
+
+    with open_run(None, "staff_package", {}) as run:     # nothing recorded
+        run.record("x")
+    assert len(history.runs_frame()) == 1
+
+
+# -------------------------------------------------
+# ANALYTICS
+# -------------------------------------------------
+
+def make_items():
+    return pd.DataFrame({
+        "tool": ["search"] * 4 + ["upload"] * 2,
+        "step": ["live", "live", "live", "cache", "upload", "upload"],
+        "outcome": [SUCCESS, SUCCESS, ERROR, SUCCESS, SUCCESS, ERROR],
+        "duration": [1.0, 2.0, 3.0, 0.0, 10.0, 20.0],
+        "finished_at": pd.to_datetime(
+            ["2025-03-03", "2025-03-04", "2025-03-10", "2025-03-10", "2025-03-05", "2025-03-05"]
+        ),
+    })
+
+
+def test_latency_and_error_rates():
+    items = make_items()
+
+    latency = latency_percentiles(items).set_index("tool")
+    assert latency.loc["search", "p50_s"] == pytest.approx(1.5)
+    assert latency.loc["upload", "p95_s"] == pytest.approx(19.5)
+
+    errors = error_rate_by_step(items).set_index(["tool", "step"])
+    assert errors.loc[("search", "live"), "error_rate"] == pytest.approx(1 / 3)
+    assert errors.loc[("search", "cache"), "error_rate"] == 0
+
+
+def test_weekly_trend_and_throughput():
+    weekly = weekly_trend(make_items())
+    search = weekly[weekly["tool"] == "search"].set_index("week")
+    assert list(search["items"]) == [2, 2]                      # weeks of 3 Mar and 10 Mar
+    assert search.index[0] == pd.Timestamp("2025-03-03")
+
+    runs = pd.DataFrame({
+        "run_id": [1, 2],
+        "tool": ["search", "search"],
+        "status": [COMPLETED, "running"],
+        "items": [30, 5],
+        "errors": [0, 0],
+        "started_at": pd.to_datetime(["2025-03-03 09:00", "2025-03-04 09:00"]),
+        "ended_at": pd.to_datetime(["2025-03-03 09:10", None]),
+    })
+    throughput = run_throughput(runs)
+    assert list(throughput["items_per_min"]) == [3.0]           # unfinished run left out
+
+
+# -------------------------------------------------
+# BACKEND INTEGRATION
+# -------------------------------------------------
+
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_user_search_records_each_unique_search(mock_get_driver, tmp_path):
+    from core.backend_2_Bulk_Search_Users import run_user_search
+    from core.search_cache import SearchResultCache
+
+    history = RunHistory(tmp_path / "history.sqlite3")
+    cache = SearchResultCache(tmp_path / "cache.sqlite3")
+    cache.put("alice tan", [["1", "alice", "Alice", "Tan"]])
+    mock_get_driver.side_effect = Exception("Chrome not running")
+
+    run_user_search(
+        search_values=["Alice Tan", "alice tan", "Bob Lim"],
+        cache=cache,
+        history=history,
+    )
+
+    runs = history.runs_frame()
+    assert runs.loc[0, "status"] == FAILED        # could not attach for Bob Lim
+    items = history.items_frame()
+    assert list(items["item"]) == ["Alice Tan"]
+    assert list(items["step"]) == ["cache"]
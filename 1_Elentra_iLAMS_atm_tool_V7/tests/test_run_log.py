@@ -0,0 +1,43 @@
+from core.run_log import RunLog, make_log_entry, read_log_file
+
+
+def test_entry_shape_and_structured_fields():
+    entry = make_log_entry("BulkArchive", "Archived 123", "info", item="123", step="archive", duration=1.5, error=None)
+
+    assert entry["feature"] == "BulkArchive"
+    assert entry["level"] == "INFO"
+    assert entry["item"] == "123"
+    assert entry["duration"] == 1.5
+    assert "error" not in entry          # unset fields are left out
+
+
+def test_ring_buffer_keeps_latest_window_and_level_filter():
+    run_log = RunLog("Test", capacity=3, min_level="info")
+
+    run_log.log("noise", "debug")        # below min_level: dropped
+    for i in range(5):
+        run_log.log(f"m{i}", "warn" if i == 4 else "info")
+
+    assert [e["message"] for e in run_log.entries()] == ["m2", "m3", "m4"]
+    assert run_log.total == 5
+    assert run_log.dropped == 2
+    assert [e["message"] for e in run_log.entries(min_level="warn")] == ["m4"]
+    assert list(run_log.frame(last=1)["message"]) == ["m4"]
+
+
+def test_every_entry_spills_to_jsonl(tmp_path):
+    path = tmp_path / "logs" / "run.jsonl"
+    seen = []
+    run_log = RunLog("Test", capacity=2, spill_path=path, callback=seen.append)
+
+    for i in range(10):
+        run_log.log(f"m{i}", item=str(i))
+    run_log.flush()
+
+    on_disk = read_log_file(path)
+    assert [e["message"] for e in on_disk] == [f"m{i}" for i in range(10)]
+    assert on_disk[3]["item"] == "3"
+    assert len(seen) == 10
+    assert len(run_log) == 2
+
+    run_log.close()
@@ -0,0 +1,128 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchElementException,
+    WebDriverException,
+)
+
+from urllib3.exceptions import NewConnectionError, ReadTimeoutError
+
+from core.config import SeleniumConfig
+from core.session_supervisor import DriverSupervisor, is_dead_session_error
+from core.backend_2_Bulk_Search_Users import run_user_search
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def make_supervisor(factory, **kwargs):
+    return DriverSupervisor(
+        SeleniumConfig(debugger_address="127.0.0.1:9222"),
+        driver_factory=factory,
+        relaunch_chrome=False,
+        recovery_delay=0,
+        **kwargs,
+    )
+
+
+# -------------------------------------------------
+# DEAD SESSION DETECTION
+# -------------------------------------------------
+
+def test_dead_session_classification():
+    assert is_dead_session_error(InvalidSessionIdException("invalid session id"))
+    assert is_dead_session_error(WebDriverException("chrome not reachable"))
+    assert is_dead_session_error(ConnectionRefusedError())
+    assert is_dead_session_error(NewConnectionError(None, "connection refused"))
+    assert not is_dead_session_error(ReadTimeoutError(None, "/session", "read timed out"))
+    assert not is_dead_session_error(NoSuchElementException("no such element"))
+    assert not is_dead_session_error(ValueError("bad input"))
+
+
+# -------------------------------------------------
+# RECOVERY
+# -------------------------------------------------
+
+def test_run_item_reattaches_and_retries():
+    drivers = [MagicMock(name="first"), MagicMock(name="second")]
+    factory = MagicMock(side_effect=[(d, MagicMock()) for d in drivers])
+
+    calls = []
+
+    def item(driver, wait):
+        calls.append(driver)
+        if driver is drivers[0]:
+            raise InvalidSessionIdException("invalid session id")
+        return "ok"
+
+    sup = make_supervisor(factory)
+    sup.attach()
+
+    assert sup.run_item(item, resume="https://example.test/page") == "ok"
+    assert calls == drivers
+    drivers[1].get.assert_called_once_with("https://example.test/page")
+    assert sup.recoveries == 1
+
+
+def test_ordinary_errors_are_not_retried():
+    factory = MagicMock(return_value=(MagicMock(), MagicMock()))
+    sup = make_supervisor(factory)
+
+    def item(driver, wait):
+        raise NoSuchElementException("missing")
+
+    with pytest.raises(NoSuchElementException):
+        sup.run_item(item)
+    assert sup.recoveries == 0
+
+
+def test_gives_up_after_max_recoveries():
+    factory = MagicMock(side_effect=lambda config: (MagicMock(), MagicMock()))
+    sup = make_supervisor(factory, max_recoveries=2)
+
+    def item(driver, wait):
+        raise InvalidSessionIdException("invalid session id")
+
+    with pytest.raises(InvalidSessionIdException):
+        sup.run_item(item)
+    assert sup.recoveries == 2
+
+
+@patch("core.session_supervisor.launch_chrome_with_debug")
+@patch("core.session_supervisor.debugger_port_open", return_value=False)
+def test_relaunch_uses_the_configs_chrome_profile(mock_port_open, mock_launch):
+    factory = MagicMock(return_value=(MagicMock(), MagicMock()))
+    sup = DriverSupervisor(
+        SeleniumConfig(debugger_address="127.0.0.1:9224", chrome_profile_dir="/tmp/port_9224"),
+        driver_factory=factory,
+        recovery_delay=0,
+    )
+
+    sup.recover()
+
+    mock_launch.assert_called_once_with(port=9224, profile_dir="/tmp/port_9224")
+
+
+# -------------------------------------------------
+# BACKEND INTEGRATION
+# -------------------------------------------------
+
+@patch("core.session_supervisor.time.sleep")
+@patch("core.session_supervisor.debugger_port_open", return_value=True)
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_user_search_survives_dead_driver(mock_get_driver, _port_open, _sleep):
+    dead = MagicMock()
+    dead.find_elements.side_effect = InvalidSessionIdException("invalid session id")
+    alive = MagicMock()
+    alive.find_elements.return_value = []
+
+    mock_get_driver.side_effect = [(dead, MagicMock()), (alive, MagicMock())]
+
+    result = run_user_search(search_values=["Alice Tan"])
+
+    df = result["dataframe"]
+    assert df.loc[0, "DL check account?"] == "Acc Not Found"
+    assert any("recovering" in l["message"] for l in result["logs"])
@@ -0,0 +1,145 @@
+from unittest.mock import patch
+
+from core.backend_2_Bulk_Search_Users import run_user_search
+from core.user_directory import (
+    CONFIRM,
+    RESOLVED,
+    FuzzyNameIndex,
+    UserDirectory,
+    edit_distance,
+    resolve_locally,
+)
+
+
+USERS = [
+    ["101", "atan@ntu.edu.sg", "Alice", "Tan"],
+    ["102", "btan@ntu.edu.sg", "Alicia", "Tan"],
+    ["103", "bob.lim@ntu.edu.sg", "Bob", "Lim"],
+    ["104", "cwong@ntu.edu.sg", "Chloe", "Wong"],
+]
+
+
+# -------------------------------------------------
+# SNAPSHOT STORE
+# -------------------------------------------------
+
+def test_upsert_counts_only_new_ids(tmp_path):
+    directory = UserDirectory(tmp_path / "dir.sqlite3")
+
+    assert directory.upsert(USERS[:2]) == 2
+    assert directory.upsert([["102", "btan@ntu.edu.sg", "Alicia", "Tan-Lee"], USERS[2]]) == 1
+    assert directory.upsert([["", "header"], ["User ID", "Login"]]) == 0
+
+    assert directory.count() == 3
+    assert directory.all_users()[1] == ["102", "btan@ntu.edu.sg", "Alicia", "Tan-Lee"]
+
+
+def test_freshness_follows_last_completed_crawl(tmp_path):
+    now = [1000.0]
+    directory = UserDirectory(tmp_path / "dir.sqlite3", clock=lambda: now[0])
+
+    assert not directory.is_fresh(3600)
+    directory.mark_refreshed()
+    assert directory.is_fresh(3600)
+    now[0] += 7200
+    assert not directory.is_fresh(3600)
+
+
+# -------------------------------------------------
+# FUZZY INDEX
+# -------------------------------------------------
+
+def test_edit_distance():
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("", "abc") == 3
+
+
+def test_index_matches_reordered_names_and_logins():
+    index = FuzzyNameIndex(USERS)
+
+    assert index.search("Tan Alice")[0].user[0] == "101"
+    assert index.search("alice  tan (TTSH)")[0].score == 1.0
+    assert index.search("BOB.LIM@ntu.edu.sg")[0].user[0] == "103"
+    assert index.search("Chloe Wnog")[0].user[0] == "104"    # typo
+
+
+def test_resolution_policy():
+    index = FuzzyNameIndex(USERS)
+
+    assert resolve_locally(index, "Bob Lim") == (RESOLVED, [USERS[2]])
+    # Alicia Tan sits in the borderline band next to Alice Tan
+    assert resolve_locally(index, "Alice Tan")[0] == CONFIRM
+    assert resolve_locally(index, "Zed Unknown")[0] == CONFIRM
+    assert resolve_locally(index, "Zed Unknown", trust_not_found=True) == (RESOLVED, [])
+
+
+# -------------------------------------------------
+# RUN_USER_SEARCH INTEGRATION
+# -------------------------------------------------
+
+@patch("core.backend_2_Bulk_Search_Users.get_driver")
+def test_confident_local_matches_skip_the_browser(mock_get_driver, tmp_path):
+    directory = UserDirectory(tmp_path / "dir.sqlite3")
+    directory.upsert(USERS)
+    directory.mark_refreshed()
+
+    result = run_user_search(
+        search_values=["Lim Bob", "Zed Unknown"],
+        directory=directory,
+    )
+
+    mock_get_driver.assert_not_called()
+    df = result["dataframe"]
+    assert list(df["DL check account?"]) == ["Exist", "Acc Not Found"]
+    assert df.loc[0, "User ID"] == "103"
+    assert any("resolved locally" in l["message"] for l in result["logs"])
+
+
+# -------------------------------------------------
+# CRAWL VERIFICATION
+# -------------------------------------------------
+
+def crawl(tmp_path, pages, total, incremental=False):
+    from unittest.mock import MagicMock
+    from core.backend_2_Bulk_Search_Users import crawl_user_directory
+
+    directory = UserDirectory(tmp_path / "dir.sqlite3")
+    remaining = list(pages)
+    with patch("core.backend_2_Bulk_Search_Users.get_driver", return_value=(MagicMock(), MagicMock())), \
+            patch("core.backend_2_Bulk_Search_Users._open_full_user_list"), \
+            patch("core.backend_2_Bulk_Search_Users._user_list_total", return_value=total), \
+            patch("core.backend_2_Bulk_Search_Users._read_result_table", side_effect=lambda d: remaining.pop(0)), \
+            patch("core.backend_2_Bulk_Search_Users._next_user_list_page", side_effect=lambda d, w: bool(remaining)):
+        result = crawl_user_directory(directory, incremental=incremental)
+    return directory, result
+
+
+def test_crawl_is_only_trusted_when_it_matches_the_lists_total(tmp_path):
+    directory, result = crawl(tmp_path / "a", [USERS[:2], USERS[2:]], total=4)
+    assert result["complete"] and directory.is_fresh(3600)
+
+    # The pager was not found after page 1: 2 of 4 users read
+    directory, result = crawl(tmp_path / "b", [USERS[:2]], total=4)
+    assert not result["complete"] and not directory.is_fresh(3600)
+    assert directory.count() == 2          # what was read is still kept
+
+    # No total on the page: cannot be verified
+    directory, result = crawl(tmp_path / "c", [USERS], total=None)
+    assert not result["complete"] and not directory.is_fresh(3600)
+
+
+def test_crawl_fails_without_the_page_size_control(tmp_path):
+    from unittest.mock import MagicMock
+    from selenium.common.exceptions import NoSuchElementException
+    from core.backend_2_Bulk_Search_Users import crawl_user_directory
+
+    driver = MagicMock()
+    driver.find_element.side_effect = NoSuchElementException("select.pagesize")
+    directory = UserDirectory(tmp_path / "dir.sqlite3")
+
+    with patch("core.backend_2_Bulk_Search_Users.get_driver", return_value=(driver, MagicMock())), \
+            patch("core.backend_2_Bulk_Search_Users.time.sleep"):
+        result = crawl_user_directory(directory, incremental=False)
+
+    assert not result["complete"] and not directory.is_fresh(3600)
+    assert any("crawl failed" in l["message"] for l in result["logs"])
@@ -0,0 +1,145 @@
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from core import workbook_pool
+from core.backend_3_Bulk_User_Excel_Gen import generate_student_package
+from core.package_zip import PackageZip
+from core.run_history import RunHistory, open_run
+from core.workbook_pool import OutputPlan, WorkbookJob, render_into
+
+
+def jobs(n, rows=3):
+    for i in range(n):
+        yield WorkbookJob(f"pkg/{i:02d}.xls", f"item{i}", "course_map", ["* login", "* organisation"],
+                          [[f"u{r}@e.ntu.edu.sg" for r in range(rows)], [str(i)] * rows])
+
+
+def entries(handle):
+    zf = zipfile.ZipFile(BytesIO(handle.read()))
+    return [(name, zf.read(name)) for name in zf.namelist()]
+
+
+def render(n, workers, history=None):
+    with open_run(history, "test", {}) as run, PackageZip() as package:
+        render_into(package, jobs(n), run, workers=workers)
+        return package.finish()
+
+
+@pytest.fixture
+def no_pool(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+    monkeypatch.setattr(workbook_pool, "ProcessPoolExecutor", fail)
+
+
+def test_pool_output_matches_serial_output(monkeypatch):
+    monkeypatch.setattr(workbook_pool, "PARALLEL_MIN_CELLS", 1)
+
+    parallel = entries(render(7, workers=2))
+
+    assert [name for name, _ in parallel] == [f"pkg/{i:02d}.xls" for i in range(7)]
+    assert parallel == entries(render(7, workers=1))
+
+
+def test_small_packages_stay_in_process(no_pool):
+    assert len(entries(render(5, workers=4))) == 5
+
+
+def test_one_worker_never_starts_a_pool(no_pool, monkeypatch):
+    monkeypatch.setattr(workbook_pool, "PARALLEL_MIN_CELLS", 1)
+    assert len(entries(render(5, workers=1))) == 5
+
+
+def test_each_workbook_is_recorded(tmp_path):
+    history = RunHistory(tmp_path / "runs.db")
+    render(3, workers=1, history=history)
+
+    items = history.items_frame()
+    assert list(items["item"]) == ["item0", "item1", "item2"]
+    assert set(items["outcome"]) == {"success"}
+
+
+def test_a_failing_workbook_is_recorded_and_raised(tmp_path):
+    history = RunHistory(tmp_path / "runs.db")
+    bad = WorkbookJob("pkg/bad.xls", "bad", "course_map", ["a", "b"], [["x"], []])
+
+    with pytest.raises(ValueError):
+        with open_run(history, "test", {}) as run, PackageZip() as package:
+            render_into(package, [bad], run, workers=1)
+
+    assert history.items_frame()["outcome"].tolist() == ["error"]
+
+
+def test_student_package_is_the_same_with_a_pool(monkeypatch):
+    monkeypatch.setattr(workbook_pool, "PARALLEL_MIN_CELLS", 1)
+    args = dict(
+        cohort_name="Y1",
+        full_names=["A", "B"],
+        raw_emails="a@e.ntu.edu.sg\nb@e.ntu.edu.sg",
+        raw_course_ids="101\n102\n103",
+        generate_y1_new_users=True,
+        generate_course_map=True,
+    )
+
+    serial = generate_student_package(**args, workers=1)
+    parallel = generate_student_package(**args, workers=2)
+
+    assert entries(parallel.zip_file) == entries(serial.zip_file)
+    assert parallel.audit_df.equals(serial.audit_df)
+
+
+def test_output_plan_limits():
+    assert OutputPlan().row_limit == 65_535
+    assert OutputPlan("csv").parts(10**7) == 1
+    assert OutputPlan("xls").parts(75_000) == 2
+    assert OutputPlan("xls", max_rows=10).file_name("pkg/a.xls", 2, 3) == "pkg/a_part2of3.xls"
+    assert OutputPlan("csv").file_name("pkg/a.xls") == "pkg/a.csv"
+
+    with pytest.raises(ValueError):
+        OutputPlan("xls", max_rows=70_000)
+    with pytest.raises(ValueError):
+        OutputPlan("ods")
+
+
+def test_serial_rendering_holds_one_workbook_at_a_time():
+    with open_run(None, "test", {}) as run, PackageZip() as package:
+        written_when_produced = []
+
+        def lazy_jobs():
+            for job in jobs(4):
+                written_when_produced.append(len(package.names))
+                yield job
+
+        render_into(package, lazy_jobs(), run, workers=1)
+        package.discard()
+
+    # Each workbook is in the ZIP before the next one is built.
+    assert written_when_produced == [0, 1, 2, 3]
+
+
+def test_progress_is_reported_per_file():
+    calls = []
+    with open_run(None, "test", {}) as run, PackageZip() as package:
+        render_into(package, jobs(3), run, workers=1, progress=lambda *a: calls.append(a), total=5)
+        package.discard()
+
+    # total was an overestimate: the last call completes the run.
+    assert calls == [(1, 5), (2, 5), (3, 5), (3, 3)]
+
+
+def test_student_package_reports_progress_per_course():
+    calls = []
+    generate_student_package(
+        cohort_name="Y1",
+        full_names=["A", "B"],
+        raw_emails="a@e.ntu.edu.sg\nb@e.ntu.edu.sg",
+        raw_course_ids="101\n102\n103",
+        generate_y1_new_users=True,
+        generate_course_map=True,
+        workers=1,
+        progress_callback=lambda *a: calls.append(a),
+    )
+
+    assert calls == [(1, 4), (2, 4), (3, 4), (4, 4)]
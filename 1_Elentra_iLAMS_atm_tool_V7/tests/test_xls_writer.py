@@ -0,0 +1,116 @@
+import gc
+from datetime import date
+from io import BytesIO
+
+import pandas as pd
+import pytest
+import xlrd
+import xlwt
+
+from core.xls_writer import frame_to_xls, write_columns
+
+
+def legacy_xls(df: pd.DataFrame) -> bytes:
+    # The cell-by-cell writer the columnar one replaces.
+    wb = xlwt.Workbook()
+    ws = wb.add_sheet("Sheet1")
+    for col_idx, col in enumerate(df.columns):
+        ws.write(0, col_idx, col)
+    for row_idx, row in enumerate(df.itertuples(index=False), start=1):
+        for col_idx, value in enumerate(row):
+            ws.write(row_idx, col_idx, value)
+    bio = BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
+
+
+def cells(xls: bytes):
+    sheet = xlrd.open_workbook(file_contents=xls, formatting_info=True).sheet_by_index(0)
+    return sheet.name, [[(c.ctype, c.value) for c in sheet.row(r)] for r in range(sheet.nrows)]
+
+
+def assert_same_cells(a, b):
+    # NaN != NaN, so compare through repr.
+    assert repr(cells(a)) == repr(cells(b))
+
+
+def test_roster_matches_the_cell_by_cell_writer():
+    df = pd.DataFrame({
+        "* login": ["a@e.ntu.edu.sg", "b@e.ntu.edu.sg", "c@e.ntu.edu.sg"],
+        "* password": ["Nanyang!23"] * 3,
+        "title": ["", "", ""],
+        "address_1": ["", "Blk 1", ""],
+        "country": ["Australia"] * 3,
+        "time_zone": ["", "", ""],
+    })
+
+    assert_same_cells(frame_to_xls(df), legacy_xls(df))
+
+
+def test_numbers_nan_and_single_blanks_match():
+    df = pd.DataFrame({
+        "id": [1, 2, 3],
+        "score": [1.5, None, 2.0],
+        "note": ["x", "", "y"],
+        "tag": ["learner", "learner", ""],
+    })
+
+    assert_same_cells(frame_to_xls(df), legacy_xls(df))
+
+
+def test_other_types_fall_back_to_xlwt_per_row():
+    df = pd.DataFrame({
+        "name": ["a", "b"],
+        "flag": [True, "no"],
+        "when": [date(2024, 1, 2), ""],
+    })
+
+    assert_same_cells(frame_to_xls(df), legacy_xls(df))
+
+
+def test_repeated_strings_share_one_table_entry():
+    xls = write_columns(["* roles", "* add_to_lessons"], [["learner"] * 500, ["yes"] * 500])
+    sheet = xlrd.open_workbook(file_contents=xls).sheet_by_index(0)
+
+    assert sheet.nrows == 501
+    assert {sheet.cell_value(r, 0) for r in range(1, 501)} == {"learner"}
+    assert xls.count(b"learner") == 1
+
+
+def test_layout_template_is_reused_across_workbooks():
+    columns = ["* login", "* organisation"]
+    first = write_columns(columns, [["a"], ["101"]])
+    second = write_columns(columns, [["b", "c"], ["102", "103"]])
+
+    assert cells(first)[1] == [[(1, "* login"), (1, "* organisation")], [(1, "a"), (1, "101")]]
+    assert cells(second)[1][2] == [(1, "c"), (1, "103")]
+
+
+def test_single_column_and_empty_frames():
+    assert cells(write_columns(["only"], [["x", ""]]))[1] == [[(1, "only")], [(1, "x")], [(6, "")]]
+    assert cells(write_columns(["a", "b"], [[], []]))[1] == [[(1, "a"), (1, "b")]]
+
+
+def test_ragged_or_oversized_data_is_rejected():
+    with pytest.raises(ValueError):
+        write_columns(["a", "b"], [["x"], []])
+    with pytest.raises(ValueError):
+        write_columns(["a"], [[""] * 65536])
+
+
+def test_a_rendered_sheet_is_freed_without_the_cycle_collector():
+    gc.collect()
+    gc.disable()
+    try:
+        write_columns(["* login", "* organisation"], [["a@e.ntu.edu.sg", "b@e.ntu.edu.sg"], [1, 2]])
+        left = [o for o in gc.get_objects() if isinstance(o, xlwt.Row)]
+    finally:
+        gc.enable()
+    assert left == []
+
+
+def test_a_rendered_sheet_is_freed_if_xlwt_moves_its_rows(monkeypatch):
+    from core import xls_writer
+
+    monkeypatch.setattr(xls_writer, "getattr", lambda obj, name, default=None: default, raising=False)
+    test_a_rendered_sheet_is_freed_without_the_cycle_collector()